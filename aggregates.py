@@ -0,0 +1,162 @@
+# aggregates.py
+# 聚合立方体：按各章节用到的维度分组，保存事件数与受害人数之和。
+# 每个章节只按自己用到的少数维度分组、只保留用到的度量；分组数以各维度取值个数的乘积为上限，
+# 维度越少上限越低（按年份或国家分组只有几十到几百组，维度多的立方体分组数仍可能接近事件数）。
+# 分块结果可以直接相加合并；流式模式下每个分块的结果随即并入累计立方体，
+# 内存以分组数为上限，与文件长度无关。
+import numpy as np
+import pandas as pd
+
+from data_quality import COUNT_COLUMNS, HARM_TYPES, validate
+from organizations import BITSET_COLUMN, ORG_TYPES, encode
+
+# 完整立方体：所有章节维度的组合，仅用于国家简报等离线批处理
+CUBE_DIMENSIONS = [
+    "Year",
+    "Month",
+    "Country",
+    "Region",
+    "Means of attack",
+    "Location",
+    "Actor type",
+    BITSET_COLUMN,
+]
+CUBE_MEASURES = ["Incidents"] + COUNT_COLUMNS + ORG_TYPES
+
+HARM_MEASURES = [f"Total {h}" for h in HARM_TYPES]
+TIME_MEASURES = HARM_MEASURES + ["Total affected"]
+# 各章节的立方体：名称 -> (维度, 除事件数以外的度量)
+SECTION_CUBES = {
+    "yearly": (["Year"], HARM_MEASURES),
+    "countries": (["Year", "Country"], []),
+    "regions": (["Region"], []),
+    "attacks": (["Year", "Means of attack", "Location"], []),
+    "actors": (["Country", "Actor type"], HARM_MEASURES),
+    "cross": (["Country", "Means of attack"], HARM_MEASURES),
+    "monthly": (["Year", "Month", "Country"], TIME_MEASURES),
+    "monthly_attacks": (["Year", "Month", "Means of attack"], TIME_MEASURES),
+    "victims": (["Year", "Country", "Actor type"], COUNT_COLUMNS),
+    "organizations": (["Year", "Country", BITSET_COLUMN], COUNT_COLUMNS + ORG_TYPES),
+}
+# 机构位集由各机构列派生，不在 CSV 中
+SOURCE_COLUMNS = CUBE_DIMENSIONS[:-1] + COUNT_COLUMNS + ORG_TYPES
+
+# 图表不读取的长文本列，流式模式下不解析
+TEXT_COLUMNS = ["Details", "Source"]
+
+CHUNK_SIZE = 100_000
+
+
+def build_cube(df, dimensions=CUBE_DIMENSIONS, measures=CUBE_MEASURES[1:]):
+    """Group one frame (or one chunk) into a cube over ``dimensions``."""
+    measures = list(measures)
+    counts = df[[d for d in dimensions if d != BITSET_COLUMN] + measures].copy()
+    counts[measures] = counts[measures].fillna(0).astype(np.int64)
+    if BITSET_COLUMN in dimensions:
+        counts[BITSET_COLUMN] = encode(df)
+    counts["Incidents"] = 1
+    # dropna=False：缺失的维度值也要计入总数
+    return counts.groupby(dimensions, dropna=False)[["Incidents"] + measures].sum()
+
+
+def merge_cubes(cubes):
+    """Partial cubes are mergeable by summing matching groups."""
+    cubes = list(cubes)
+    levels = cubes[0].index.names
+    return pd.concat(cubes).groupby(level=levels, dropna=False).sum()
+
+
+def fold_cube(running, part):
+    """Add a partial cube into a running one (None before the first chunk)."""
+    return part if running is None else merge_cubes([running, part])
+
+
+def finalize_cube(cube):
+    return cube.reset_index()
+
+
+def build_cubes(df):
+    """Every section's cube from one frame, keyed by ``SECTION_CUBES`` name."""
+    return {
+        name: finalize_cube(build_cube(df, dimensions, measures))
+        for name, (dimensions, measures) in SECTION_CUBES.items()
+    }
+
+
+def _structured_columns(path):
+    header = pd.read_csv(path, nrows=0).columns
+    return [c for c in header if c not in TEXT_COLUMNS]
+
+
+def stream_cube(path, chunksize=CHUNK_SIZE):
+    """The full cube (``CUBE_DIMENSIONS``), built chunk by chunk without the
+    text columns."""
+    cube = None
+    for chunk in pd.read_csv(path, usecols=SOURCE_COLUMNS, chunksize=chunksize):
+        cube = fold_cube(cube, build_cube(chunk))
+    return finalize_cube(cube)
+
+
+def stream_cubes(path, exclude=None, chunksize=CHUNK_SIZE):
+    """Every section's cube, built chunk by chunk in one pass over the file.
+
+    Each chunk's partial is folded into a running cube, so memory is
+    bounded by the number of groups rather than the length of the file.
+    With ``exclude`` (Incident IDs), a second set of cubes without those
+    incidents is built in the same pass; otherwise the second value is None.
+    """
+    cubes = dict.fromkeys(SECTION_CUBES)
+    kept_cubes = dict.fromkeys(SECTION_CUBES)
+    columns = SOURCE_COLUMNS + ["Incident ID"]
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        kept = None if exclude is None else chunk[~chunk["Incident ID"].isin(exclude)]
+        for name, (dimensions, measures) in SECTION_CUBES.items():
+            cubes[name] = fold_cube(
+                cubes[name], build_cube(chunk, dimensions, measures)
+            )
+            if kept is not None:
+                kept_cubes[name] = fold_cube(
+                    kept_cubes[name], build_cube(kept, dimensions, measures)
+                )
+    cubes = {name: finalize_cube(cube) for name, cube in cubes.items()}
+    if exclude is None:
+        return cubes, None
+    return cubes, {name: finalize_cube(cube) for name, cube in kept_cubes.items()}
+
+
+def stream_validate(path, chunksize=CHUNK_SIZE):
+    """Chunked validation report.
+
+    Row-level rules are exact. Rules that compare rows with each other
+    (duplicate IDs, country footprint, country codes) only see one chunk
+    at a time. Each chunk's report is added into a running one, so only the
+    flagged Incident IDs accumulate.
+    """
+    merged = None
+    for chunk in pd.read_csv(
+        path, usecols=_structured_columns(path), chunksize=chunksize
+    ):
+        report = validate(chunk)
+        if merged is None:
+            merged = report[["Rule", "Description", "Violations"]].copy()
+            merged["Incident IDs"] = [list(ids) for ids in report["Incident IDs"]]
+            continue
+        merged["Violations"] += report["Violations"].to_numpy()
+        for flagged, ids in zip(merged["Incident IDs"], report["Incident IDs"]):
+            flagged.extend(ids)
+    return merged
+
+
+def fetch_rows(path, incident_ids, chunksize=CHUNK_SIZE, columns=None):
+    """Lazily read only the rows with the given Incident IDs (for drill-downs).
+
+    Only matching rows are kept between chunks, so memory is bounded by the
+    result rather than the file.
+    """
+    wanted = pd.Index(incident_ids)
+    parts = []
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        rows = chunk[chunk["Incident ID"].isin(wanted)]
+        if len(rows) or not parts:
+            parts.append(rows)
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,142 @@
+# briefings.py
+# 批量生成各国安全简报：每国一页（静态图片 + 汇总表），在进程池中并行渲染。
+# 聚合立方体与受害人张量只计算一次，传给每个工作进程后按国家切片。
+#
+# 用法: python briefings.py [--out briefings] [--workers N] [--countries A B ...]
+import argparse
+import html
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from aggregates import stream_cube
+from data_quality import file_fingerprint
+from figures import country_briefing
+from victims import VictimTensor
+
+DATA_PATH = "security_incidents.csv"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{country} · Security Briefing</title>
+<style>
+body {{ font-family: "Source Sans Pro", sans-serif; color: #31333f; max-width: 1200px; margin: 2rem auto; }}
+.tables {{ display: flex; gap: 2rem; align-items: flex-start; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ddd; padding: 0.25rem 0.5rem; text-align: right; }}
+img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<img src="{image}" alt="{country} briefing charts">
+<div class="tables">
+{tables}
+</div>
+<p><small>Source: Aid Worker Security Database, data version {version}.</small></p>
+</body>
+</html>
+"""
+
+# 每个工作进程持有一份共享聚合
+_shared = {}
+
+
+def _init_worker(cube, tensor, out_dir, version):
+    _shared.update(cube=cube, tensor=tensor, out_dir=out_dir, version=version)
+
+
+def _slug(country):
+    return re.sub(r"[^a-z0-9]+", "-", country.lower()).strip("-")
+
+
+def _table(title, frame):
+    return f"<div><h3>{html.escape(title)}</h3>{frame.to_html(border=0)}</div>"
+
+
+def write_briefing(country):
+    """Render one country's briefing; runs inside a worker process."""
+    briefing = country_briefing(_shared["cube"], _shared["tensor"], country)
+    slug = _slug(country)
+    briefing["figure"].savefig(
+        os.path.join(_shared["out_dir"], f"{slug}.png"), dpi=110
+    )
+    tables = [
+        _table("Summary", briefing["summary"].to_frame("")),
+        _table("Victims", briefing["victims"]),
+        _table("Top means of attack", briefing["means"].to_frame()),
+        _table("Top actor types", briefing["actors"].to_frame()),
+    ]
+    with open(
+        os.path.join(_shared["out_dir"], f"{slug}.html"), "w", encoding="utf-8"
+    ) as f:
+        f.write(
+            PAGE_TEMPLATE.format(
+                country=html.escape(country),
+                image=f"{slug}.png",
+                tables="\n".join(tables),
+                version=_shared["version"],
+            )
+        )
+    return country, f"{slug}.html", briefing["summary"]
+
+
+def generate(out_dir, countries=None, workers=None, data_path=DATA_PATH):
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    # 与其他加载路径一样不解析长文本列，按块读取
+    cube = stream_cube(data_path)
+    tensor = VictimTensor.from_frame(cube)
+    version = file_fingerprint(data_path)
+    ranked = (
+        cube.groupby("Country")["Incidents"].sum().sort_values(ascending=False)
+    ).index.tolist()
+    if countries is None:
+        countries = ranked
+    unknown = sorted(set(countries) - set(ranked))
+    if unknown:
+        raise SystemExit(f"Unknown countries: {', '.join(unknown)}")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(cube, tensor, out_dir, version),
+    ) as pool:
+        results = list(pool.map(write_briefing, countries))
+
+    # 索引页：按事件数排序的国家列表
+    rows = "\n".join(
+        f'<li><a href="{page}">{html.escape(country)}</a> — '
+        f"{summary['Incidents']} incidents</li>"
+        for country, page, summary in results
+    )
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html>\n<html lang=\"en\">\n<head><meta charset=\"utf-8\">"
+            "<title>Country Security Briefings</title></head>\n<body>\n"
+            f"<h1>Country Security Briefings</h1>\n<ul>\n{rows}\n</ul>\n"
+            "</body>\n</html>\n"
+        )
+    pd.DataFrame([summary for _, _, summary in results]).to_csv(
+        os.path.join(out_dir, "summary.csv"), index_label="Country"
+    )
+
+    print(
+        f"Wrote {len(results)} briefings to {out_dir}/ "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render per-country briefings.")
+    parser.add_argument("--out", default="briefings", help="output directory")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: CPUs)"
+    )
+    parser.add_argument("--countries", nargs="+", help="only these countries")
+    args = parser.parse_args()
+    generate(args.out, args.countries, args.workers)
@@ -0,0 +1,166 @@
+# data_quality.py
+# 数据质量校验：每条规则都是对整列的向量化布尔运算，不做逐行循环
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+HARM_TYPES = ["killed", "wounded", "kidnapped"]
+GENDER_COLUMNS = ["Gender Male", "Gender Female", "Gender Unknown"]
+COUNT_COLUMNS = (
+    [f"Nationals {h}" for h in HARM_TYPES]
+    + ["Total nationals"]
+    + [f"Internationals {h}" for h in HARM_TYPES]
+    + ["Total internationals"]
+    + [f"Total {h}" for h in HARM_TYPES]
+    + ["Total affected"]
+    + GENDER_COLUMNS
+)
+
+# 国家坐标包络：中位数 ± max(K × IQR, 最小半径)，单位为度
+COUNTRY_IQR_FACTOR = 4.0
+COUNTRY_MIN_RADIUS = 10.0
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """Content hash of a data file, used as the data version key."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _counts(df, columns):
+    return df[columns].fillna(0).to_numpy(dtype=np.int64)
+
+
+def _sum_mismatch(df, parts, total):
+    return _counts(df, parts).sum(axis=1) != df[total].fillna(0).to_numpy(np.int64)
+
+
+def _negative_counts(df):
+    return (_counts(df, COUNT_COLUMNS) < 0).any(axis=1)
+
+
+def _coordinates_missing(df):
+    return (df["Latitude"].isna() | df["Longitude"].isna()).to_numpy()
+
+
+def _coordinates_out_of_range(df):
+    lat, lon = df["Latitude"], df["Longitude"]
+    return ((lat.abs() > 90) | (lon.abs() > 180)).to_numpy()
+
+
+def _coordinates_outside_country(df):
+    # 没有边界数据时，用该国全部事件坐标的稳健包络近似国家范围
+    flags = np.zeros(len(df), dtype=bool)
+    for axis in ["Latitude", "Longitude"]:
+        quantiles = df.groupby("Country")[axis].quantile([0.25, 0.5, 0.75]).unstack()
+        radius = np.maximum(
+            COUNTRY_IQR_FACTOR * (quantiles[0.75] - quantiles[0.25]),
+            COUNTRY_MIN_RADIUS,
+        )
+        median = df["Country"].map(quantiles[0.5])
+        flags |= ((df[axis] - median).abs() > df["Country"].map(radius)).to_numpy()
+    return flags
+
+
+def _country_code_conflict(df):
+    codes_per_country = df.groupby("Country")["Country Code"].transform("nunique")
+    return (codes_per_country > 1).to_numpy()
+
+
+def _invalid_date(df):
+    month, day = df["Month"], df["Day"]
+    return (
+        ~df["Year"].between(1990, 2100)
+        | (month.notna() & ~month.between(1, 12))
+        | (day.notna() & ~day.between(1, 31))
+    ).to_numpy()
+
+
+def _duplicate_id(df):
+    return df["Incident ID"].duplicated(keep=False).to_numpy()
+
+
+RULES = [
+    (
+        f"{harm}_staff_sum",
+        f"Nationals {harm} + Internationals {harm} ≠ Total {harm}",
+        lambda df, harm=harm: _sum_mismatch(
+            df, [f"Nationals {harm}", f"Internationals {harm}"], f"Total {harm}"
+        ),
+    )
+    for harm in HARM_TYPES
+] + [
+    (
+        "nationals_sum",
+        "Nationals killed + wounded + kidnapped ≠ Total nationals",
+        lambda df: _sum_mismatch(
+            df, [f"Nationals {h}" for h in HARM_TYPES], "Total nationals"
+        ),
+    ),
+    (
+        "internationals_sum",
+        "Internationals killed + wounded + kidnapped ≠ Total internationals",
+        lambda df: _sum_mismatch(
+            df, [f"Internationals {h}" for h in HARM_TYPES], "Total internationals"
+        ),
+    ),
+    (
+        "affected_by_staff",
+        "Total nationals + Total internationals ≠ Total affected",
+        lambda df: _sum_mismatch(
+            df, ["Total nationals", "Total internationals"], "Total affected"
+        ),
+    ),
+    (
+        "affected_by_harm",
+        "Total killed + wounded + kidnapped ≠ Total affected",
+        lambda df: _sum_mismatch(
+            df, [f"Total {h}" for h in HARM_TYPES], "Total affected"
+        ),
+    ),
+    (
+        "affected_by_gender",
+        "Gender Male + Female + Unknown ≠ Total affected",
+        lambda df: _sum_mismatch(df, GENDER_COLUMNS, "Total affected"),
+    ),
+    ("negative_counts", "Negative victim count", _negative_counts),
+    ("coordinates_missing", "Latitude or Longitude missing", _coordinates_missing),
+    (
+        "coordinates_out_of_range",
+        "Latitude outside ±90 or Longitude outside ±180",
+        _coordinates_out_of_range,
+    ),
+    (
+        "coordinates_outside_country",
+        "Coordinates far outside the stated Country's incident footprint",
+        _coordinates_outside_country,
+    ),
+    (
+        "country_code_conflict",
+        "Country mapped to more than one Country Code",
+        _country_code_conflict,
+    ),
+    ("invalid_date", "Year, Month or Day out of range", _invalid_date),
+    ("duplicate_incident_id", "Incident ID appears more than once", _duplicate_id),
+]
+
+
+def validate(df):
+    """Run every rule and return one report row per rule with offending Incident IDs."""
+    ids = df["Incident ID"].to_numpy()
+    rows = []
+    for rule, description, check in RULES:
+        mask = np.asarray(check(df), dtype=bool)
+        rows.append(
+            {
+                "Rule": rule,
+                "Description": description,
+                "Violations": int(mask.sum()),
+                "Incident IDs": ids[mask].tolist(),
+            }
+        )
+    return pd.DataFrame(rows)
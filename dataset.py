@@ -0,0 +1,296 @@
+# dataset.py
+# 一个数据版本派生出的全部对象：分析用数据框、各章节的聚合立方体、受害人张量、时间索引、
+# 地理汇总树、风险曲面、相似事件索引、模式位集、疑似重复、校验报告与章节图表预热。
+# 整体构建、整体替换，各会话在一次重跑中只看到同一个版本。
+# 立方体及其派生对象、地理汇总树与风险曲面各有两份：包含与排除疑似重复事件，图表可在两者之间切换；
+# 相似事件索引覆盖全部事件，排除疑似重复时由页面过滤检索结果。
+# 配置了共享缓存时，以上各项（受害人张量由立方体直接得到，除外）按代码版本与数据指纹从共享层读取或写入，
+# 每个版本在所有副本中只解析、构建一次。文本存储除外：每个副本在本地磁盘构建并内存映射，
+# 放进共享缓存会把整个压缩数据反序列化到每个副本的内存里。
+import hashlib
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from aggregates import (
+    CHUNK_SIZE,
+    TEXT_COLUMNS,
+    build_cubes,
+    fetch_rows,
+    stream_cubes,
+    stream_validate,
+)
+from data_quality import file_fingerprint, validate
+from dedup import CONFIRM_COLUMNS, load_duplicates, remove_index
+from figures import (
+    attack_types,
+    geographic_patterns,
+    perpetrator_analysis,
+    time_cross_analysis,
+    victim_profiles,
+    yearly_trends,
+)
+from geography import GeoRollup
+from patterns import PATTERN_COLUMNS, ItemBitsets
+from risk import build_surfaces, stream_surfaces
+from sharedcache import FRAME, PICKLE
+from similarity import CATEGORICAL_COLUMNS, load_index, remove_indexes
+from snapshots import ID_COLUMN
+from textstore import build_store, remove_store
+from timeindex import build_time_indexes
+from victims import VictimTensor
+from warmup import WarmupScheduler
+
+# 各章节的聚合与图表构建函数
+SECTION_BUILDERS = {
+    "📅 Yearly Trends": yearly_trends,
+    "🌍 Geographic Patterns": geographic_patterns,
+    "⚔️ Attack Types": attack_types,
+    "🧍‍♂️ Victim Profiles": victim_profiles,
+    "🧨 Perpetrator Analysis": perpetrator_analysis,
+    "📅 Time & Cross Analysis": time_cross_analysis,
+}
+OPTION_COLUMNS = CATEGORICAL_COLUMNS + ["Country"]
+# 共享缓存里的对象由这些模块构建；键中带上它们的源码与序列化相关库的版本，
+# 升级后的副本不会读到旧代码按旧结构写入的结果
+CACHED_MODULES = [
+    "aggregates",
+    "data_quality",
+    "dataset",
+    "dedup",
+    "figures",
+    "geography",
+    "organizations",
+    "patterns",
+    "risk",
+    "sharedcache",
+    "similarity",
+    "textstore",
+    "timeindex",
+    "victims",
+]
+# 模式位集按 64 行一个字打包，流式扫描的分块大小取 64 的倍数
+FILTER_CHUNK_SIZE = CHUNK_SIZE // 64 * 64
+
+
+def scan_filters(chunks, duplicates):
+    """Filter options, pattern bitsets and per-row pattern keys (Country,
+    Year, Duplicate) from chunks of ``OPTION_COLUMNS + PATTERN_COLUMNS``."""
+    options = {c: set() for c in OPTION_COLUMNS}
+    keys = []
+
+    def encoded():
+        for chunk in chunks:
+            for c in OPTION_COLUMNS:
+                options[c].update(chunk[c].dropna().unique())
+            keys.append(
+                pd.DataFrame(
+                    {
+                        "Country": chunk["Country"].astype("category"),
+                        "Year": chunk["Year"].astype("int16"),
+                        "Duplicate": duplicates.is_duplicate(chunk[ID_COLUMN]),
+                    }
+                )
+            )
+            yield chunk
+
+    bitsets = ItemBitsets.from_chunks(encoded())
+    keys = pd.concat(keys, ignore_index=True)
+    keys["Country"] = keys["Country"].astype("category")
+    return {c: sorted(v) for c, v in options.items()}, bitsets, keys
+
+
+def code_version():
+    """Short hash of the cached-object builders' source and library versions."""
+    digest = hashlib.sha256(f"{np.__version__}/{pd.__version__}".encode())
+    for name in CACHED_MODULES:
+        with open(sys.modules[name].__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+CODE_VERSION = code_version()
+
+
+def remove_version_files(version):
+    """Delete the on-disk text store and indexes of a retired data version."""
+    remove_store(version)
+    remove_indexes(version)
+    remove_index(version)
+
+
+def _unshared(name, compute, codec):
+    return compute()
+
+
+class CubeView:
+    """The section cubes and everything built from them, plus the geographic
+    rollup and risk surfaces, for one set of incidents."""
+
+    def __init__(self, cubes, geo_rollup, risk_surfaces, workers=2, shared=None):
+        self.cubes = cubes
+        self.geo_rollup = geo_rollup
+        self.risk_surfaces = risk_surfaces
+        self.victim_tensor = VictimTensor.from_frame(cubes["victims"])
+        # 机构类型章节的张量与机构立方体逐行对齐
+        self.org_tensor = VictimTensor.from_frame(
+            cubes["organizations"], ["Year", "Country"]
+        )
+        if shared is None:
+            shared = _unshared
+        self.time_indexes = shared(
+            "time_indexes", partial(build_time_indexes, cubes), PICKLE
+        )
+        # 后台预热：构建后立即在线程池中生成所有章节的图表
+        tasks = {
+            name: partial(build, cubes) for name, build in SECTION_BUILDERS.items()
+        }
+        tasks["🧍‍♂️ Victim Profiles"] = partial(
+            victim_profiles, cubes, self.victim_tensor
+        )
+        tasks = {
+            name: partial(shared, f"figures/{name}", task, PICKLE)
+            for name, task in tasks.items()
+        }
+        self.warmup = WarmupScheduler(tasks, workers)
+
+    @property
+    def years(self):
+        years = self.cubes["yearly"]["Year"]
+        return int(years.min()), int(years.max())
+
+
+class Dataset:
+    """Everything derived from one version of the CSV, built in one go.
+
+    In streaming mode ``df`` is None and every structure is built from the
+    file chunk by chunk; what stays in memory per incident is the packed
+    pattern bitsets and a three-column key frame for the pattern filters.
+    ``version`` is the file's fingerprint, if the caller already has it.
+    """
+
+    def __init__(self, path, streaming=False, cache=None, version=None):
+        started = time.perf_counter()
+        self.path = path
+        self.streaming = streaming
+        self.cache = cache
+        # 调用方（如数据刷新）已算好指纹时直接使用，不再读一遍文件
+        self.version = file_fingerprint(path) if version is None else version
+        shared = self._shared
+        self.text_store = build_store(path, self.version)
+        if streaming:
+            self.df = None
+            rows = partial(fetch_rows, path, columns=CONFIRM_COLUMNS)
+        else:
+            # 长文本列不进入分析用数据框，按需从文本存储读取
+            self.df = shared(
+                "frame",
+                partial(pd.read_csv, path, usecols=lambda c: c not in TEXT_COLUMNS),
+                FRAME,
+            )
+            frame = self.df
+
+            def rows(ids):
+                return frame.loc[frame[ID_COLUMN].isin(ids), CONFIRM_COLUMNS]
+
+        self.duplicates = shared(
+            "duplicates", partial(load_duplicates, self.version, self.text_store, rows)
+        )
+        excluded = self.duplicates.duplicate_ids if len(self.duplicates) else None
+        # 共享缓存命中时以下各项都不再读取 CSV
+        if streaming:
+            full, deduplicated = shared(
+                "cubes", partial(stream_cubes, path, exclude=excluded)
+            )
+            self.validation_report = shared(
+                "validation", partial(stream_validate, path)
+            )
+            geo_rollup = partial(GeoRollup.from_csv, path)
+            risk_surfaces = partial(stream_surfaces, path)
+            columns = sorted(
+                set(OPTION_COLUMNS + PATTERN_COLUMNS + [ID_COLUMN, "Year"])
+            )
+
+            def chunks():
+                return pd.read_csv(path, usecols=columns, chunksize=FILTER_CHUNK_SIZE)
+
+            self.similarity_index = shared(
+                "similarity",
+                partial(load_index, self.version, self.text_store, path=path),
+            )
+        else:
+            unique = ~self.duplicates.is_duplicate(frame[ID_COLUMN])
+            full, deduplicated = shared(
+                "cubes",
+                lambda: (
+                    build_cubes(frame),
+                    build_cubes(frame[unique]) if excluded is not None else None,
+                ),
+            )
+            self.validation_report = shared("validation", partial(validate, frame))
+
+            def subset(exclude):
+                return frame if exclude is None else frame[unique]
+
+            def geo_rollup(exclude):
+                return GeoRollup.from_frame(subset(exclude))
+
+            def risk_surfaces(exclude):
+                return build_surfaces(subset(exclude))
+
+            def chunks():
+                return [frame]
+
+            self.similarity_index = shared(
+                "similarity",
+                partial(load_index, self.version, self.text_store, frame),
+            )
+
+        def view(name, cubes, exclude, workers):
+            view_shared = self._view_shared(name)
+            return CubeView(
+                cubes,
+                view_shared("geo_rollup", partial(geo_rollup, exclude), PICKLE),
+                view_shared("risk_surfaces", partial(risk_surfaces, exclude), PICKLE),
+                workers,
+                view_shared,
+            )
+
+        self.views = {False: view("all", full, None, 2)}
+        # 没有疑似重复时两种口径共用同一份
+        self.views[True] = (
+            view("deduplicated", deduplicated, excluded, 1)
+            if deduplicated is not None
+            else self.views[False]
+        )
+        self.category_options, self.item_bitsets, self.pattern_keys = shared(
+            "filters", lambda: scan_filters(chunks(), self.duplicates)
+        )
+        self.build_seconds = time.perf_counter() - started
+
+    def _shared(self, name, compute, codec=PICKLE):
+        """Compute a value, or read it from the shared cache if one is
+        configured (keyed by code version and data fingerprint, computed once
+        across replicas)."""
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(
+            f"{CODE_VERSION}/{self.version}/{name}", compute, codec
+        )
+
+    def _view_shared(self, view):
+        return lambda name, compute, codec: self._shared(
+            f"{view}/{name}", compute, codec
+        )
+
+    def view(self, exclude_duplicates=False):
+        return self.views[bool(exclude_duplicates)]
+
+    def wait_warm(self):
+        """Block until every section's figures are built, in both views."""
+        for view in self.views.values():
+            for section in SECTION_BUILDERS:
+                view.warmup.result(section)
@@ -0,0 +1,324 @@
+# dedup.py
+# 疑似重复事件检测：同一事件可能由不同来源以略有不同的措辞、日期或坐标重复记录。
+# Details 文本切分为词级 shingle，计算 MinHash 签名，再用 LSH 分桶只比较同桶的候选对（不做两两比较）；
+# 候选对还需通过国家、日期与坐标的邻近性确认。签名随数据版本保存到磁盘，新版本只为文本变化的事件重新计算。
+#
+# 用法: python dedup.py [csv_path]   # 为当前 CSV 计算（或增量更新）签名并列出疑似重复
+import logging
+import os
+import sys
+import zlib
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from aggregates import fetch_rows
+from data_quality import file_fingerprint
+from snapshots import ID_COLUMN
+
+INDEX_DIR = "indexes"
+SHINGLE_SIZE = 3  # 每个 shingle 的词数
+NUM_PERMUTATIONS = 128
+# BANDS × ROWS = NUM_PERMUTATIONS；相似度约 0.42 以上的文本大概率落入同一桶
+BANDS, ROWS = 32, 4
+# 超过此大小的桶（模板化文本）不展开成候选对，桶内事件不会被判为重复，跳过时记录日志
+MAX_BUCKET = 200
+MIN_SIMILARITY = 0.6  # 估计的 Jaccard 相似度下限
+MAX_DAYS_APART = 7
+MAX_KM_APART = 25.0
+# 签名的计算方式改变时递增；文件名带上它，旧方式算出的签名不会被加载或增量复用
+SIGNATURE_FORMAT = 2
+CONFIRM_COLUMNS = [
+    ID_COLUMN,
+    "Year",
+    "Month",
+    "Day",
+    "Country",
+    "Latitude",
+    "Longitude",
+]
+
+logger = logging.getLogger(__name__)
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20250101)
+_A = _rng.integers(1, _PRIME, NUM_PERMUTATIONS, dtype=np.int64)
+_B = _rng.integers(0, _PRIME, NUM_PERMUTATIONS, dtype=np.int64)
+_EMPTY = np.iinfo(np.int64).max
+
+
+def shingles(text):
+    """Hashed word n-grams of a text (lower-cased, punctuation stripped);
+    empty for a missing text."""
+    if pd.isna(text):
+        return set()
+    words = "".join(c if c.isalnum() else " " for c in str(text).lower()).split()
+    grams = [
+        " ".join(words[i : i + SHINGLE_SIZE])
+        for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+    ]
+    return {zlib.crc32(g.encode("utf-8")) % _PRIME for g in grams if g}
+
+
+def signatures(texts):
+    """(n, NUM_PERMUTATIONS) MinHash signatures; empty texts get an all-max row."""
+    sets = [np.fromiter(shingles(t), dtype=np.int64) for t in texts]
+    sizes = np.array([len(s) for s in sets])
+    result = np.full((len(sets), NUM_PERMUTATIONS), _EMPTY, dtype=np.int64)
+    nonempty = sizes > 0
+    if not nonempty.any():
+        return result
+    values = np.concatenate([s for s in sets if len(s)])
+    starts = np.cumsum(sizes[nonempty]) - sizes[nonempty]
+    # 按排列分块计算，避免 (排列数 × shingle 总数) 的大数组
+    for lo in range(0, NUM_PERMUTATIONS, 16):
+        hashed = (_A[lo : lo + 16, None] * values + _B[lo : lo + 16, None]) % _PRIME
+        result[nonempty, lo : lo + 16] = np.minimum.reduceat(hashed, starts, axis=1).T
+    return result
+
+
+def text_hashes(texts):
+    return pd.util.hash_pandas_object(
+        pd.Series(texts, dtype="object").fillna(""), index=False
+    ).to_numpy()
+
+
+def candidate_pairs(sigs):
+    """Row-position pairs (i < j) sharing at least one LSH band."""
+    pairs = set()
+    skipped = set()  # 落在超大桶中的事件
+    valid = np.flatnonzero(sigs[:, 0] != _EMPTY)
+    for band in range(BANDS):
+        block = np.ascontiguousarray(sigs[valid, band * ROWS : (band + 1) * ROWS])
+        _, bucket = np.unique(block, axis=0, return_inverse=True)
+        order = np.argsort(bucket, kind="stable")
+        bounds = np.flatnonzero(np.diff(bucket[order])) + 1
+        for members in np.split(valid[order], bounds):
+            if len(members) > MAX_BUCKET:
+                skipped.update(members.tolist())
+            elif len(members) > 1:
+                members = np.sort(members)
+                for k, i in enumerate(members[:-1]):
+                    pairs.update((i, j) for j in members[k + 1 :])
+    if skipped:
+        logger.warning(
+            "%d incidents fell in LSH buckets larger than MAX_BUCKET=%d; "
+            "pairs within those buckets were not compared",
+            len(skipped),
+            MAX_BUCKET,
+        )
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.array(sorted(pairs), dtype=np.int64)
+
+
+def _days(frame):
+    """Day number per incident; NaN when the month is unknown (a missing day
+    counts as mid-month)."""
+    dates = pd.to_datetime(
+        pd.DataFrame(
+            {
+                "year": frame["Year"],
+                "month": frame["Month"],
+                "day": frame["Day"].fillna(15),
+            }
+        ),
+        errors="coerce",
+    )
+    return (dates - pd.Timestamp("1970-01-01")).dt.days.to_numpy(dtype=float)
+
+
+def _km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    h = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 6371.0 * np.arcsin(np.sqrt(h))
+
+
+class DuplicateIndex:
+    """MinHash signatures for one data version, keyed by Incident ID."""
+
+    def __init__(self, ids, hashes, sigs, version):
+        self.ids = np.asarray(ids)
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.sigs = sigs
+        self.version = version
+
+    @classmethod
+    def build(cls, ids, texts, version):
+        return cls(ids, text_hashes(texts), signatures(texts), version)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def update(self, ids, texts, version):
+        """Signatures for a newer version, recomputing only changed texts."""
+        ids, hashes = np.asarray(ids), text_hashes(texts)
+        previous = pd.Series(np.arange(len(self.ids)), index=self.ids)
+        position = previous.reindex(ids).to_numpy()
+        known = ~np.isnan(position)
+        known[known] = self.hashes[position[known].astype(np.int64)] == hashes[known]
+        sigs = np.empty((len(ids), NUM_PERMUTATIONS), dtype=np.int64)
+        sigs[known] = self.sigs[position[known].astype(np.int64)]
+        changed = np.flatnonzero(~known)
+        if len(changed):
+            sigs[changed] = signatures([texts[i] for i in changed])
+        return DuplicateIndex(ids, hashes, sigs, version)
+
+    def save(self, index_dir=INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        path = index_path(self.version, index_dir)
+        np.savez(path, ids=self.ids, hashes=self.hashes, sigs=self.sigs)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        version = os.path.basename(path).split("_")[1]
+        return cls(data["ids"], data["hashes"], data["sigs"], version)
+
+    def find(self, rows):
+        """Confirmed duplicate pairs.
+
+        ``rows(incident_ids)`` returns the ``CONFIRM_COLUMNS`` of the given
+        incidents; it is only called for incidents in a candidate pair.
+        Returns a frame with one row per pair: both Incident IDs, the
+        estimated text similarity, days and kilometres apart.
+        """
+        pairs = candidate_pairs(self.sigs)
+        similarity = (self.sigs[pairs[:, 0]] == self.sigs[pairs[:, 1]]).mean(axis=1)
+        keep = similarity >= MIN_SIMILARITY
+        pairs, similarity = pairs[keep], similarity[keep]
+
+        candidates = self.ids[np.unique(pairs)]
+        info = (
+            rows(candidates)
+            .drop_duplicates(ID_COLUMN)
+            .set_index(ID_COLUMN)
+            .reindex(self.ids[pairs.ravel()])
+        )
+        a, b = info.iloc[0::2], info.iloc[1::2]
+        days = _days(info)
+        days_apart = np.abs(days[0::2] - days[1::2])
+        km_apart = _km(
+            a["Latitude"].to_numpy(dtype=float),
+            a["Longitude"].to_numpy(dtype=float),
+            b["Latitude"].to_numpy(dtype=float),
+            b["Longitude"].to_numpy(dtype=float),
+        )
+        # 日期未知的对无法确认；坐标缺失时只看国家与日期
+        confirmed = (
+            (a["Country"].to_numpy() == b["Country"].to_numpy())
+            & (days_apart <= MAX_DAYS_APART)
+            & ~(km_apart > MAX_KM_APART)
+        )
+        first, second = self.ids[pairs[confirmed, 0]], self.ids[pairs[confirmed, 1]]
+        return pd.DataFrame(
+            {
+                "Incident ID A": np.minimum(first, second),
+                "Incident ID B": np.maximum(first, second),
+                "Similarity": similarity[confirmed],
+                "Days apart": days_apart[confirmed],
+                "Km apart": km_apart[confirmed],
+            }
+        )
+
+
+def duplicate_clusters(pairs):
+    """Group pairs into clusters; the lowest Incident ID in each cluster is
+    kept as the original, the others are suspected duplicates.
+
+    Returns a Series mapping every clustered Incident ID to its original.
+    """
+    ids = pd.Index(
+        np.unique(pairs[["Incident ID A", "Incident ID B"]].to_numpy().ravel())
+    )
+    if ids.empty:
+        return pd.Series(dtype="int64", name="Original")
+    a = ids.get_indexer(pairs["Incident ID A"])
+    b = ids.get_indexer(pairs["Incident ID B"])
+    graph = coo_matrix((np.ones(len(a)), (a, b)), shape=(len(ids), len(ids)))
+    _, labels = connected_components(graph, directed=False)
+    original = pd.Series(ids, index=ids).groupby(labels).transform("min")
+    return pd.Series(original.to_numpy(), index=ids, name="Original")
+
+
+class DuplicateReport:
+    """Suspected duplicates of one data version."""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.clusters = duplicate_clusters(pairs)
+        self.duplicate_ids = self.clusters.index[
+            self.clusters.index != self.clusters.to_numpy()
+        ]
+
+    def __len__(self):
+        return len(self.duplicate_ids)
+
+    def is_duplicate(self, incident_ids):
+        return pd.Index(incident_ids).isin(self.duplicate_ids)
+
+
+def index_path(version, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, f"minhash_{version}_v{SIGNATURE_FORMAT}.npz")
+
+
+def saved_indexes(index_dir=INDEX_DIR):
+    """Saved signature paths in the current format, most recently written first."""
+    if not os.path.isdir(index_dir):
+        return []
+    paths = [
+        os.path.join(index_dir, f)
+        for f in os.listdir(index_dir)
+        if f.startswith("minhash_") and f.endswith(f"_v{SIGNATURE_FORMAT}.npz")
+    ]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def remove_index(version, index_dir=INDEX_DIR):
+    """Delete the saved signatures of a retired data version (any format)."""
+    if not os.path.isdir(index_dir):
+        return
+    for f in os.listdir(index_dir):
+        if f.startswith(f"minhash_{version}") and f.endswith(".npz"):
+            os.remove(os.path.join(index_dir, f))
+
+
+def load_duplicates(version, store, rows, index_dir=INDEX_DIR):
+    """Duplicate report for a data version. Signatures are loaded from disk if
+    saved, otherwise updated incrementally from the latest saved version,
+    otherwise computed from scratch.
+
+    Incidents and their Details come from the text store; ``rows`` is as in
+    ``DuplicateIndex.find``.
+    """
+    target = index_path(version, index_dir)
+    if os.path.exists(target):
+        index = DuplicateIndex.load(target)
+    else:
+        ids = store.ids
+        texts = store.get(ids)["Details"].tolist()
+        previous = saved_indexes(index_dir)
+        if previous:
+            index = DuplicateIndex.load(previous[0]).update(ids, texts, version)
+        else:
+            index = DuplicateIndex.build(ids, texts, version)
+        index.save(index_dir)
+    return DuplicateReport(index.find(rows))
+
+
+if __name__ == "__main__":
+    from textstore import build_store
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "security_incidents.csv"
+    version = file_fingerprint(csv_path)
+    rows = partial(fetch_rows, csv_path, columns=CONFIRM_COLUMNS)
+    report = load_duplicates(version, build_store(csv_path, version), rows)
+    print(f"{len(report)} suspected duplicates in {len(report.pairs)} pairs")
+    print(report.pairs.sort_values("Similarity", ascending=False).head(20))
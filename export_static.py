@@ -0,0 +1,313 @@
+# export_static.py
+# 将所有故事章节导出为静态 HTML（可直接放在 CDN 或共享文件夹上，无需 Python 服务器）
+#
+# 用法: python export_static.py [--out site]
+import argparse
+import hashlib
+import html
+import os
+import re
+from unittest import mock
+
+import markdown
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+# 只导出故事章节（显式列出）：新加的交互式、诊断类页面不会被自动带进静态站点
+STORY_SECTIONS = [
+    "🏁 Introduction",
+    "📅 Yearly Trends",
+    "🌍 Geographic Patterns",
+    "⚔️ Attack Types",
+    "🧍‍♂️ Victim Profiles",
+    "🧨 Perpetrator Analysis",
+    "📅 Time & Cross Analysis",
+    "✅ Conclusion & Recommendations",
+]
+HEADINGS = {"title": "h1", "header": "h2", "subheader": "h3"}
+# 静态页面无法交互：输入控件显示为其当前取值
+CONTROLS = {"slider", "select_slider", "selectbox", "multiselect"}
+NOTICES = {"caption", "info", "success", "warning", "error"}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title} · Aid Worker Security Dashboard</title>
+<link rel="stylesheet" href="assets/style.css">
+<script src="assets/plotly.min.js"></script>
+</head>
+<body>
+<nav>
+<h1>📌 Navigation</h1>
+<ul>
+{nav}
+</ul>
+</nav>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+STYLESHEET = """body { margin: 0; display: flex; font-family: "Source Sans Pro", sans-serif; color: #31333f; }
+nav { width: 260px; min-height: 100vh; padding: 1rem; background: #f0f2f6; box-sizing: border-box; }
+nav ul { list-style: none; padding: 0; }
+nav li { margin: 0.5rem 0; }
+nav a { color: #31333f; text-decoration: none; }
+nav a.active { font-weight: bold; }
+main { flex: 1; max-width: 1200px; padding: 2rem 3rem; }
+.columns { display: flex; gap: 1rem; }
+.columns > div { flex: 1; }
+img { max-width: 100%; }
+table { border-collapse: collapse; }
+td, th { border: 1px solid #ddd; padding: 0.25rem 0.5rem; }
+.control { color: #555; }
+.metric .label { font-size: 0.9rem; color: #555; }
+.metric .value { font-size: 2rem; }
+.notice { padding: 0.75rem 1rem; border-radius: 0.5rem; background: #f0f2f6; }
+.notice.caption { padding: 0; background: none; color: #777; font-size: 0.9rem; }
+.notice.warning { background: #fffce7; }
+.notice.error { background: #ffecec; }
+.notice.info { background: #e8f2fc; }
+.notice.success { background: #e8f9ee; }
+details { margin: 0.5rem 0; border-left: 3px solid #ddd; padding-left: 1rem; }
+summary { cursor: pointer; font-weight: bold; }
+"""
+
+
+def slugify(label):
+    slug = re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")
+    return slug or "index"
+
+
+class RecordingMediaStorage(MemoryMediaFileStorage):
+    """AppTest discards its media store after each run; keep the bytes around."""
+
+    files = {}
+
+    def load_and_get_id(self, path_or_data, mimetype, kind, filename=None):
+        file_id = super().load_and_get_id(path_or_data, mimetype, kind, filename)
+        RecordingMediaStorage.files[file_id] = self.get_file(file_id).content
+        return file_id
+
+
+def _media_bytes(url):
+    # 元素里只有媒体 URL，文件名即 file_id
+    return RecordingMediaStorage.files[os.path.splitext(os.path.basename(url))[0]]
+
+
+def _format_value(value):
+    if isinstance(value, (list, tuple)):
+        return " – ".join(str(v) for v in value) if value else "All"
+    return str(value)
+
+
+def radio_scope(block, radio):
+    """The elements a radio button controls: those after it in the same
+    block, up to the next heading. Returns (block, start, stop) or None."""
+    children = list(block.children.values())
+    for i, el in enumerate(children):
+        if el is radio:
+            stop = next(
+                (
+                    j
+                    for j in range(i + 1, len(children))
+                    if getattr(children[j], "type", None) in HEADINGS
+                ),
+                len(children),
+            )
+            return children, i + 1, stop
+        if hasattr(el, "children") and el.children:
+            found = radio_scope(el, radio)
+            if found is not None:
+                return found
+    return None
+
+
+class SectionRenderer:
+    """Turns the element tree of one AppTest run into static HTML.
+
+    Every element type is either rendered or rejected: a section that uses
+    an element the exporter does not know fails the export instead of
+    silently losing content. Radio buttons are rendered with the content
+    of every option (see ``write_section``).
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.figure_count = 0
+        self.radio_panels = []  # 当前章节每个单选按钮的 [(选项, HTML)]
+
+    def write_asset(self, data, extension):
+        name = hashlib.sha1(data).hexdigest()[:16] + extension
+        path = os.path.join(self.out_dir, "assets", "img", name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        return f"assets/img/{name}"
+
+    def render(self, block):
+        return self.render_elements(list(block.children.values()))
+
+    def render_elements(self, elements):
+        parts = []
+        skip = 0
+        for el in elements:
+            if skip:  # 单选按钮控制的内容已按选项分别输出
+                skip -= 1
+                continue
+            kind = getattr(el, "type", None)
+            if kind in HEADINGS:
+                tag = HEADINGS[kind]
+                parts.append(f"<{tag}>{html.escape(el.value)}</{tag}>")
+            elif kind == "markdown":
+                parts.append(markdown.markdown(el.value))
+            elif kind in NOTICES:
+                parts.append(
+                    f'<div class="notice {kind}">{markdown.markdown(el.value)}</div>'
+                )
+            elif kind == "plotly_chart":
+                self.figure_count += 1
+                fig = pio.from_json(el.proto.spec, skip_invalid=True)
+                parts.append(
+                    pio.to_html(
+                        fig,
+                        include_plotlyjs=False,
+                        full_html=False,
+                        div_id=f"fig-{self.figure_count}",
+                        default_width="100%",
+                    )
+                )
+            elif kind == "image":
+                for img in el.proto.imgs:
+                    src = self.write_asset(_media_bytes(img.url), ".png")
+                    alt = html.escape(img.caption)
+                    parts.append(f'<img src="{src}" alt="{alt}">')
+            elif kind == "metric":
+                delta = (
+                    f'<div class="delta">{html.escape(el.delta)}</div>'
+                    if el.delta
+                    else ""
+                )
+                parts.append(
+                    f'<div class="metric"><div class="label">{html.escape(el.label)}</div>'
+                    f'<div class="value">{html.escape(el.value)}</div>{delta}</div>'
+                )
+            elif kind == "dataframe":
+                parts.append(el.value.to_html(border=0))
+            elif kind in CONTROLS:
+                parts.append(
+                    f'<p class="control"><strong>{html.escape(el.label)}</strong> '
+                    f"{html.escape(_format_value(el.value))}</p>"
+                )
+            elif kind == "radio":
+                options, skip = self.radio_panels.pop(0)
+                panels = "".join(
+                    f"<details{' open' if i == 0 else ''}>"
+                    f"<summary>{html.escape(option)}</summary>{body}</details>"
+                    for i, (option, body) in enumerate(options)
+                )
+                parts.append(
+                    f'<div class="radio"><p class="control"><strong>'
+                    f"{html.escape(el.label)}</strong></p>{panels}</div>"
+                )
+            elif (
+                kind == "flex_container"
+                and el.children
+                and all(
+                    getattr(c, "type", None) == "column" for c in el.children.values()
+                )
+            ):
+                columns = "".join(
+                    f"<div>{self.render(col)}</div>" for col in el.children.values()
+                )
+                parts.append(f'<div class="columns">{columns}</div>')
+            elif hasattr(el, "children"):
+                parts.append(self.render(el))
+            else:
+                raise ValueError(f"Cannot export a {kind!r} element to static HTML")
+        return "\n".join(parts)
+
+
+def _run(at, section):
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{section} failed: {at.exception[0].message}")
+
+
+def write_section(at, section, pages, renderer, out_dir):
+    at.sidebar.radio[0].set_value(section)
+    _run(at, section)
+
+    # 单选按钮切换其后直到下一个标题的内容：逐个选项重跑，静态页面里全部展示
+    renderer.radio_panels = []
+    for i in range(len(at.main.radio)):
+        default = at.main.radio[i].value
+        options = []
+        for option in at.main.radio[i].options:
+            at.main.radio[i].set_value(option)
+            _run(at, section)
+            elements, start, stop = radio_scope(at.main, at.main.radio[i])
+            options.append((option, renderer.render_elements(elements[start:stop])))
+        at.main.radio[i].set_value(default)
+        _run(at, section)
+        _, start, stop = radio_scope(at.main, at.main.radio[i])
+        renderer.radio_panels.append((options, stop - start))
+
+    nav = "\n".join(
+        '<li><a href="{}"{}>{}</a></li>'.format(
+            page, ' class="active"' if s == section else "", html.escape(s)
+        )
+        for s, page in pages.items()
+    )
+    with open(os.path.join(out_dir, pages[section]), "w", encoding="utf-8") as f:
+        f.write(
+            PAGE_TEMPLATE.format(
+                title=html.escape(section), nav=nav, body=renderer.render(at.main)
+            )
+        )
+    print(f"✅ {section} → {pages[section]}")
+
+
+def export(out_dir):
+    os.makedirs(os.path.join(out_dir, "assets", "img"), exist_ok=True)
+
+    # Plotly 与样式表只写一次，所有页面共享
+    with open(os.path.join(out_dir, "assets", "plotly.min.js"), "w") as f:
+        f.write(get_plotlyjs())
+    with open(os.path.join(out_dir, "assets", "style.css"), "w") as f:
+        f.write(STYLESHEET)
+
+    with mock.patch(
+        "streamlit.testing.v1.app_test.MemoryMediaFileStorage", RecordingMediaStorage
+    ):
+        at = AppTest.from_file(APP_PATH, default_timeout=300)
+        at.run()
+        missing = set(STORY_SECTIONS) - set(at.sidebar.radio[0].options)
+        if missing:
+            raise RuntimeError(f"Story sections not found in the app: {missing}")
+        sections = STORY_SECTIONS
+        pages = {
+            s: "index.html" if i == 0 else f"{slugify(s)}.html"
+            for i, s in enumerate(sections)
+        }
+        renderer = SectionRenderer(out_dir)
+        for section in sections:
+            write_section(at, section, pages, renderer, out_dir)
+
+    print(
+        f"Exported {len(sections)} sections and "
+        f"{renderer.figure_count} figures to {out_dir}/"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the dashboard as static HTML.")
+    parser.add_argument("--out", default="site", help="output directory")
+    export(parser.parse_args().out)
@@ -0,0 +1,830 @@
+# figures.py
+# 各章节的聚合与图表构建（不依赖 Streamlit），输入为各章节的聚合立方体（aggregates.SECTION_CUBES），输出图表字典。
+# 仪表盘、后台预热等都复用这里的函数。
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+
+import organizations
+from geography import GEO_LEVELS
+from organizations import BITSET_COLUMN, ORG_TYPES
+from victims import GENDER_LABELS, HARM_LABELS, STAFF_TYPES, VictimTensor
+
+HARM_COLUMNS = ["Total killed", "Total wounded", "Total kidnapped"]
+GENDER_COLORS = {"Male": "#457b9d", "Female": "#e76f51", "Unknown": "#bdbdbd"}
+
+
+# ---------------------------
+# 📅 YEARLY TRENDS
+# ---------------------------
+def yearly_trends(cubes):
+    cube = cubes["yearly"]
+    # ① 事件数量趋势图（交互折线图）
+    yearly_counts = cube.groupby("Year")["Incidents"].sum()
+
+    fig1 = go.Figure()
+    fig1.add_trace(
+        go.Scatter(
+            x=yearly_counts.index,
+            y=yearly_counts.values,
+            mode="lines+markers",
+            line=dict(color="#2a9d8f"),
+            marker=dict(size=6),
+            hovertemplate="Year: %{x}<br>Incidents: %{y}<extra></extra>",
+        )
+    )
+    fig1.update_layout(
+        title="Number of Incidents per Year (1997–2025)",
+        xaxis_title="Year",
+        yaxis_title="Number of Incidents",
+        height=400,
+        template="simple_white",
+    )
+
+    # ② 严重性：死亡 / 受伤 / 绑架趋势
+    severity_year = cube.groupby("Year")[HARM_COLUMNS].sum().reset_index()
+
+    fig2 = px.bar(
+        severity_year,
+        x="Year",
+        y=HARM_COLUMNS,
+        title="Severity of Incidents by Year",
+        labels={"value": "People", "variable": "Outcome"},
+        color_discrete_sequence=["#e63946", "#f4a261", "#457b9d"],
+    )
+    fig2.update_layout(
+        barmode="stack", height=450, xaxis_title="Year", yaxis_title="Total Victims"
+    )
+
+    # ③ 每年总受害人趋势（合计线图）
+    severity_year["Total victims"] = severity_year[HARM_COLUMNS].sum(axis=1)
+
+    fig3 = go.Figure()
+    fig3.add_trace(
+        go.Scatter(
+            x=severity_year["Year"],
+            y=severity_year["Total victims"],
+            mode="lines+markers",
+            line=dict(color="#1d3557"),
+            hovertemplate="Year: %{x}<br>Total Victims: %{y}<extra></extra>",
+        )
+    )
+    fig3.update_layout(
+        title="Combined Human Impact per Year",
+        xaxis_title="Year",
+        yaxis_title="Total Victims",
+        height=400,
+        template="simple_white",
+    )
+
+    return {"incidents": fig1, "severity": fig2, "victims": fig3}
+
+
+# ---------------------------
+# 🌍 GEOGRAPHIC PATTERNS
+# ---------------------------
+def geographic_patterns(cubes):
+    cube = cubes["countries"]
+    country_incidents = (
+        cube.groupby("Country")["Incidents"].sum().sort_values(ascending=False)
+    )
+
+    # 📊 Top 10 Static Bar Chart（面向对象的 matplotlib，可在后台线程中构建）
+    top10_countries = country_incidents.head(10).sort_values()
+    fig_static = Figure(figsize=(8, 4.5))
+    ax = fig_static.subplots()
+    top10_countries.plot(kind="barh", ax=ax, color="#e76f51")
+    ax.set_title(
+        "Top 10 Most Affected Countries", fontsize=14, fontweight="bold", pad=10
+    )
+    ax.set_xlabel("Number of Incidents")
+    ax.set_ylabel("Country")
+    ax.grid(True, linestyle="--", alpha=0.4)
+    fig_static.patch.set_facecolor("white")
+    ax.set_facecolor("#f9f9f9")
+    for i, v in enumerate(top10_countries):
+        ax.text(v + 1, i, str(v), va="center", fontsize=9)
+    fig_static.tight_layout()
+
+    # 📈 Incident Trends by Country Over Time
+    top_countries = country_incidents.head(6).index.tolist()
+    df_top = cube[cube["Country"].isin(top_countries)]
+    country_year = df_top.groupby(["Year", "Country"])["Incidents"].sum().reset_index()
+
+    fig_trend = px.line(
+        country_year,
+        x="Year",
+        y="Incidents",
+        color="Country",
+        markers=True,
+        title="Incident Trends Over Time in Most Affected Countries",
+    )
+    fig_trend.update_layout(height=450, template="simple_white")
+
+    # 🌐 Regional Distribution
+    region_counts = (
+        cubes["regions"]
+        .groupby("Region")["Incidents"]
+        .sum()
+        .sort_values(ascending=False)
+        .reset_index()
+    )
+    region_counts.columns = ["Region", "Incidents"]
+
+    fig_region = px.bar(
+        region_counts.sort_values("Incidents", ascending=True),
+        x="Incidents",
+        y="Region",
+        orientation="h",
+        color="Incidents",
+        color_continuous_scale="Blues",
+        title="Total Incidents by Region",
+    )
+    fig_region.update_layout(height=450)
+
+    # 🗺️ Interactive World Map
+    country_counts = country_incidents.reset_index()
+    country_counts.columns = ["Country", "Incident Count"]
+
+    fig_map = px.choropleth(
+        country_counts,
+        locations="Country",
+        locationmode="country names",
+        color="Incident Count",
+        hover_name="Country",
+        color_continuous_scale="Reds",
+        title="Total Incidents by Country (1997–2025)",
+    )
+    fig_map.update_layout(
+        margin=dict(l=40, r=40, t=50, b=40),
+        geo=dict(showframe=False, showcoastlines=True),
+        height=500,
+    )
+
+    return {
+        "top10": fig_static,
+        "trend": fig_trend,
+        "region": fig_region,
+        "map": fig_map,
+    }
+
+
+def geo_drilldown(tree, path=(), limit=40):
+    """Treemap of one node of the geographic rollup tree and its children only;
+    smaller children beyond ``limit`` are grouped into one tile."""
+    path = tuple(path)
+    children = tree.children(path)
+    if len(children) > limit:
+        rest = children.iloc[limit:]
+        children = children.iloc[:limit].copy()
+        children.loc[f"Other ({len(rest)})"] = rest.sum()
+    node = tree.node(path)
+    root = " › ".join(path) if path else "All countries"
+    severity = children["Total killed"] / children["Incidents"]
+
+    fig = go.Figure(
+        go.Treemap(
+            ids=[root] + [f"{root}/{label}" for label in children.index],
+            labels=[path[-1] if path else root] + list(children.index),
+            parents=[""] + [root] * len(children),
+            values=[node["Incidents"]] + list(children["Incidents"]),
+            branchvalues="total",
+            marker=dict(
+                colors=[node["Total killed"] / max(node["Incidents"], 1)]
+                + list(severity),
+                colorscale="Reds",
+                colorbar=dict(title="Killed per<br>incident"),
+            ),
+            customdata=[node[HARM_COLUMNS].tolist()]
+            + children[HARM_COLUMNS].values.tolist(),
+            hovertemplate=(
+                "<b>%{label}</b><br>Incidents: %{value}"
+                "<br>Killed: %{customdata[0]}<br>Wounded: %{customdata[1]}"
+                "<br>Kidnapped: %{customdata[2]}<extra></extra>"
+            ),
+        )
+    )
+    level = GEO_LEVELS[len(path)] if len(path) < len(GEO_LEVELS) else ""
+    fig.update_layout(
+        title=f"Incidents by {level} — {root}",
+        height=500,
+        margin=dict(t=40, l=0, r=0, b=10),
+    )
+    return fig
+
+
+def risk_map(surface, min_score=0.5):
+    """Risk-surface cells drawn as a layer on a world map."""
+    cells = surface.frame(min_score)
+    fig = go.Figure(
+        go.Scattergeo(
+            lat=cells["Latitude"],
+            lon=cells["Longitude"],
+            mode="markers",
+            marker=dict(
+                symbol="square",
+                size=max(3, 8 * surface.resolution),
+                color=cells["Risk score"],
+                colorscale="YlOrRd",
+                cmin=0,
+                cmax=100,
+                colorbar=dict(title="Risk score"),
+                opacity=0.8,
+            ),
+            hovertemplate=(
+                "Lat %{lat:.2f}, Lon %{lon:.2f}<br>Risk score: %{marker.color:.1f}"
+                "<extra></extra>"
+            ),
+        )
+    )
+    fig.update_geos(projection_type="natural earth", showcountries=True)
+    fig.update_layout(
+        title=f"Time-Decayed Risk Surface ({surface.resolution:g}° grid)",
+        height=550,
+        margin=dict(t=40, l=0, r=0, b=10),
+    )
+    return fig
+
+
+# ---------------------------
+# ⚔️ ATTACK TYPES
+# ---------------------------
+def attack_types(cubes):
+    cube = cubes["attacks"]
+    # 📊 Top 10 Attack Methods
+    means_incidents = (
+        cube.groupby("Means of attack")["Incidents"].sum().sort_values(ascending=False)
+    )
+    means_counts = means_incidents.head(10).reset_index()
+    means_counts.columns = ["Means of Attack", "Count"]
+
+    fig1 = px.bar(
+        means_counts.sort_values("Count", ascending=True),
+        x="Count",
+        y="Means of Attack",
+        orientation="h",
+        color="Count",
+        color_continuous_scale="Oranges",
+        title="Top 10 Attack Methods",
+    )
+
+    # 📌 Grouped Bar: Attack × Location
+    top_means = means_incidents.head(6).index.tolist()
+    df_filtered = cube[cube["Means of attack"].isin(top_means)]
+    grouped = (
+        df_filtered.groupby(["Means of attack", "Location"])["Incidents"]
+        .sum()
+        .reset_index(name="Count")
+    )
+
+    fig2 = px.bar(
+        grouped,
+        x="Means of attack",
+        y="Count",
+        color="Location",
+        barmode="group",
+        title="Top Attack Methods Across Locations",
+        height=450,
+        color_discrete_sequence=px.colors.qualitative.Set2,
+    )
+    fig2.update_layout(
+        xaxis_title="Means of Attack",
+        yaxis_title="Number of Incidents",
+        legend_title="Location Type",
+    )
+
+    # 🧱 Treemap View: Attack Method × Location
+    fig_tree = px.treemap(
+        grouped,
+        path=["Means of attack", "Location"],
+        values="Count",
+        color="Means of attack",
+        color_discrete_sequence=px.colors.qualitative.Set2,
+        title="Attack Methods and Locations (Treemap)",
+    )
+    fig_tree.update_layout(height=500, margin=dict(t=40, l=0, r=0, b=10))
+
+    # 📈 Attack Methods Over Time
+    year_attack = (
+        cube.groupby(["Year", "Means of attack"])["Incidents"]
+        .sum()
+        .reset_index(name="Count")
+    )
+    year_attack_filtered = year_attack[year_attack["Means of attack"].isin(top_means)]
+
+    fig4 = px.area(
+        year_attack_filtered,
+        x="Year",
+        y="Count",
+        color="Means of attack",
+        title="Trends of Attack Methods Over Time",
+        groupnorm="fraction",
+        height=450,
+    )
+
+    return {"top10": fig1, "by_location": fig2, "treemap": fig_tree, "over_time": fig4}
+
+
+# ---------------------------
+# 🧍‍♂️ VICTIM PROFILES
+# ---------------------------
+def victim_profiles(cubes, tensor=None, mask=None):
+    # 统计汇总：一次归约得到 staff × harm 总数
+    tensor = VictimTensor.from_frame(cubes["victims"]) if tensor is None else tensor
+    staff_harm = tensor.totals(mask)
+    national, international = (int(v) for v in staff_harm.sum(axis=1))
+    killed, wounded, kidnapped = (int(v) for v in staff_harm.sum(axis=0))
+
+    # 1️⃣ National vs International
+    staff_df = pd.DataFrame(
+        {
+            "Type": ["National Staff", "International Staff"],
+            "Count": [national, international],
+        }
+    )
+
+    fig_donut = px.pie(
+        staff_df,
+        names="Type",
+        values="Count",
+        hole=0.4,
+        color_discrete_sequence=["#66c2a5", "#fc8d62"],
+    )
+    fig_donut.update_traces(
+        textinfo="percent+label",
+        pull=[0.03, 0],
+        marker=dict(line=dict(color="white", width=2)),
+    )
+    fig_donut.update_layout(
+        title=dict(text="Victim Composition by Staff Type", x=0.5, font=dict(size=18)),
+        showlegend=False,
+        height=400,
+    )
+
+    # 2️⃣ Victim Type Breakdown：总数视图
+    fig_bar = px.bar(
+        x=["Killed", "Wounded", "Kidnapped"],
+        y=[killed, wounded, kidnapped],
+        color=["Killed", "Wounded", "Kidnapped"],
+        text=[killed, wounded, kidnapped],
+        color_discrete_sequence=["#d62728", "#1f77b4", "#2ca02c"],
+    )
+    fig_bar.update_traces(textposition="outside", marker_line_color="white")
+    fig_bar.update_layout(
+        title=dict(text="Total Number of Victims by Type", x=0.5, font=dict(size=20)),
+        yaxis_title="Number of Victims",
+        xaxis_title="Victim Type",
+        showlegend=False,
+        height=450,
+    )
+
+    # 2️⃣ Victim Type Breakdown：比例视图
+    df_stacked = pd.DataFrame(
+        {
+            "Harm Type": [h for h in HARM_LABELS for _ in STAFF_TYPES],
+            "Staff Type": STAFF_TYPES * len(HARM_LABELS),
+            "Count": staff_harm.T.ravel(),
+        }
+    )
+    df_stacked["Percentage"] = df_stacked.groupby("Harm Type")["Count"].transform(
+        lambda x: x / x.sum() * 100
+    )
+
+    fig_pct = px.bar(
+        df_stacked,
+        x="Harm Type",
+        y="Percentage",
+        color="Staff Type",
+        barmode="stack",
+        text=df_stacked["Percentage"].round(1).astype(str) + "%",
+        color_discrete_sequence=["#66c2a5", "#fc8d62"],
+    )
+    fig_pct.update_layout(
+        title=dict(
+            text="Relative Victim Composition by Staff Type",
+            x=0.5,
+            font=dict(size=20),
+        ),
+        yaxis_title="Percentage (%)",
+        xaxis_title="Harm Type",
+        legend=dict(orientation="h", x=0.5, xanchor="center", y=1.05),
+        height=450,
+    )
+    fig_pct.update_traces(textposition="inside")
+
+    # 3️⃣ Trends Over Time
+    yearly = pd.DataFrame(
+        tensor.breakdown("Year", mask).sum(axis=1),
+        index=pd.Index(tensor.labels["Year"], name="Year"),
+        columns=HARM_COLUMNS,
+    ).reset_index()
+
+    fig_line = px.line(
+        yearly,
+        x="Year",
+        y=HARM_COLUMNS,
+        markers=True,
+        line_shape="spline",
+        color_discrete_map={
+            "Total killed": "#d62728",
+            "Total wounded": "#1f77b4",
+            "Total kidnapped": "#2ca02c",
+        },
+        title="Victim Harm Types Over Time",
+    )
+    fig_line.update_layout(
+        yaxis_title="Number of Victims", legend_title="Harm Type", height=450
+    )
+
+    # 4️⃣ 国家分布：Top 5 countries
+    country_victims = pd.DataFrame(
+        tensor.breakdown("Country", mask).sum(axis=1),
+        index=pd.Index(tensor.labels["Country"], name="Country"),
+        columns=HARM_COLUMNS,
+    )
+    country_victims["Total"] = country_victims.sum(axis=1)
+    top_countries = (
+        country_victims.sort_values("Total", ascending=False).head(5).reset_index()
+    )
+    top_countries_melted = top_countries.melt(
+        id_vars="Country",
+        value_vars=HARM_COLUMNS,
+        var_name="Type",
+        value_name="Count",
+    )
+
+    fig_country = px.bar(
+        top_countries_melted,
+        x="Count",
+        y="Country",
+        color="Type",
+        orientation="h",
+        barmode="group",
+        title="Top 5 Countries: Victim Breakdown by Harm Type",
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+    )
+    fig_country.update_layout(
+        height=500,
+        xaxis_title="Number of Victims",
+        yaxis_title="Country",
+        legend_title="Type of Harm",
+    )
+
+    # 5️⃣ 性别分布
+    gender_totals = tensor.gender_totals(mask)
+    fig_gender = px.pie(
+        names=GENDER_LABELS,
+        values=gender_totals,
+        hole=0.4,
+        color=GENDER_LABELS,
+        color_discrete_map=GENDER_COLORS,
+    )
+    fig_gender.update_traces(
+        textinfo="percent+label", marker=dict(line=dict(color="white", width=2))
+    )
+    fig_gender.update_layout(
+        title=dict(text="Victims by Gender", x=0.5, font=dict(size=18)),
+        showlegend=False,
+        height=400,
+    )
+
+    gender_year = tensor.gender_frame("Year", mask)
+    fig_gender_year = px.bar(
+        gender_year,
+        x="Year",
+        y="Count",
+        color="Gender",
+        barmode="stack",
+        color_discrete_map=GENDER_COLORS,
+        title="Victims by Gender Over Time",
+    )
+    fig_gender_year.update_layout(
+        yaxis_title="Number of Victims", legend_title="Gender", height=450
+    )
+
+    return {
+        "national": national,
+        "international": international,
+        "gender_totals": dict(zip(GENDER_LABELS, (int(v) for v in gender_totals))),
+        "staff": fig_donut,
+        "totals": fig_bar,
+        "proportions": fig_pct,
+        "over_time": fig_line,
+        "top_countries": fig_country,
+        "gender": fig_gender,
+        "gender_over_time": fig_gender_year,
+    }
+
+
+# ---------------------------
+# 🧨 PERPETRATOR ANALYSIS
+# ---------------------------
+def perpetrator_analysis(cubes):
+    cube = cubes["actors"]
+    # 📊 Top Perpetrator Types
+    actor_incidents = (
+        cube.groupby("Actor type")["Incidents"].sum().sort_values(ascending=False)
+    )
+    actor_type_counts = actor_incidents.head(10).reset_index()
+    actor_type_counts.columns = ["Actor Type", "Count"]
+
+    fig1 = px.bar(
+        actor_type_counts,
+        x="Count",
+        y="Actor Type",
+        orientation="h",
+        color="Count",
+        color_continuous_scale="Inferno",
+        title="Top Perpetrator Types",
+    )
+
+    # 📌 Harm Caused by Actor Type
+    top_actors = actor_incidents.head(5).index.tolist()
+    df_top_actors = cube[cube["Actor type"].isin(top_actors)]
+    harm_grouped = df_top_actors.groupby("Actor type")[HARM_COLUMNS].sum().reset_index()
+    harm_melted = harm_grouped.melt(
+        id_vars="Actor type", var_name="Harm Type", value_name="Count"
+    )
+
+    fig2 = px.bar(
+        harm_melted,
+        x="Count",
+        y="Actor type",
+        color="Harm Type",
+        barmode="stack",
+        orientation="h",
+        title="Top Perpetrators: Harm Type Distribution",
+        color_discrete_sequence=px.colors.qualitative.Set2,
+    )
+
+    # 🌍 Perpetrator Geography Bubble Chart
+    country_actor = (
+        cube.groupby(["Country", "Actor type"])["Incidents"].sum().reset_index()
+    )
+
+    fig3 = px.scatter(
+        country_actor,
+        x="Country",
+        y="Actor type",
+        size="Incidents",
+        color="Actor type",
+        title="Perpetrator Incidents by Country",
+        height=500,
+    )
+    fig3.update_layout(
+        xaxis_title="Country",
+        yaxis_title="Actor Type",
+        legend_title="Actor Type",
+    )
+
+    return {"types": fig1, "harm": fig2, "geography": fig3}
+
+
+# ---------------------------
+# 📅 TIME & CROSS ANALYSIS
+# ---------------------------
+def time_cross_analysis(cubes):
+    # 📅 Monthly and Quarterly Trends
+    df_time = cubes["monthly"].dropna(subset=["Year", "Month"]).copy()
+    df_time["Year"] = df_time["Year"].astype(int)
+    df_time["Month"] = df_time["Month"].astype(int)
+    df_time["Date"] = pd.to_datetime(df_time[["Year", "Month"]].assign(DAY=1))
+    df_time["Quarter"] = df_time["Date"].dt.to_period("Q").astype(str)
+
+    monthly_counts = df_time.groupby("Date")["Incidents"].sum().reset_index()
+    fig_month = px.line(
+        monthly_counts,
+        x="Date",
+        y="Incidents",
+        title="Monthly Incident Trends",
+        markers=True,
+        line_shape="spline",
+        height=400,
+    )
+
+    quarterly_counts = df_time.groupby("Quarter")["Incidents"].sum().reset_index()
+    fig_quarter = px.bar(
+        quarterly_counts,
+        x="Quarter",
+        y="Incidents",
+        title="Quarterly Incident Distribution",
+        color="Incidents",
+        color_continuous_scale="Blues",
+        height=400,
+    )
+
+    # 🔁 Country × Attack × Severity
+    df_cross = (
+        cubes["cross"]
+        .groupby(["Country", "Means of attack"])[HARM_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    df_cross_melted = df_cross.melt(
+        id_vars=["Country", "Means of attack"],
+        value_vars=HARM_COLUMNS,
+        var_name="Severity",
+        value_name="Count",
+    )
+
+    fig_heatmap = px.density_heatmap(
+        df_cross_melted,
+        x="Means of attack",
+        y="Country",
+        z="Count",
+        facet_col="Severity",
+        color_continuous_scale="OrRd",
+        title="Heatmap: Country × Attack Type × Severity",
+        height=600,
+    )
+
+    return {"monthly": fig_month, "quarterly": fig_quarter, "heatmap": fig_heatmap}
+
+
+# ---------------------------
+# 🏢 ORGANIZATION TYPES
+# ---------------------------
+def organization_types(cubes, tensor, orgs, match="any"):
+    """``tensor`` is built from ``cubes["organizations"]`` (same row order)."""
+    cube = cubes["organizations"]
+    bits = cube[BITSET_COLUMN].to_numpy(dtype=np.uint8)
+    incidents = cube["Incidents"].to_numpy()
+    selected = organizations.select(bits, orgs, match)
+
+    # 📈 每种机构类型的年度趋势（位运算 + bincount）
+    years = tensor.labels["Year"]
+    per_year = organizations.per_type(bits, tensor.codes["Year"], len(years), incidents)
+    trend = (
+        pd.DataFrame(per_year, index=pd.Index(years, name="Year"), columns=ORG_TYPES)
+        .reset_index()
+        .melt(id_vars="Year", var_name="Organization Type", value_name="Incidents")
+    )
+    fig_trend = px.line(
+        trend,
+        x="Year",
+        y="Incidents",
+        color="Organization Type",
+        markers=True,
+        title="Incidents Affecting Each Organization Type per Year",
+    )
+    fig_trend.update_layout(height=450, template="simple_white")
+
+    # 🗺️ 所选机构类型的地理分布
+    countries = tensor.labels["Country"]
+    codes = tensor.codes["Country"]
+    hit = selected & (codes >= 0)
+    by_country = pd.DataFrame(
+        {
+            "Country": countries,
+            "Incidents": np.bincount(
+                codes[hit], weights=incidents[hit], minlength=len(countries)
+            ).astype(int),
+        }
+    )
+    fig_map = px.choropleth(
+        by_country[by_country["Incidents"] > 0],
+        locations="Country",
+        locationmode="country names",
+        color="Incidents",
+        hover_name="Country",
+        color_continuous_scale="Purples",
+        title=f"Incidents Affecting {' / '.join(orgs)} by Country",
+    )
+    fig_map.update_layout(
+        margin=dict(l=40, r=40, t=50, b=40),
+        geo=dict(showframe=False, showcoastlines=True),
+        height=500,
+    )
+
+    # 🧍 所选事件中的受害人构成（受害人张量上的一次归约）
+    staff_harm = tensor.totals(selected)
+    victims = pd.DataFrame(
+        {
+            "Harm Type": [h for h in HARM_LABELS for _ in STAFF_TYPES],
+            "Staff Type": STAFF_TYPES * len(HARM_LABELS),
+            "Count": staff_harm.T.ravel(),
+        }
+    )
+    fig_victims = px.bar(
+        victims,
+        x="Harm Type",
+        y="Count",
+        color="Staff Type",
+        barmode="group",
+        text="Count",
+        color_discrete_sequence=["#66c2a5", "#fc8d62"],
+        title="Victims in Selected Incidents by Harm and Staff Type",
+    )
+    fig_victims.update_layout(height=450, yaxis_title="Number of Victims")
+
+    # 👥 各机构类型受影响的工作人员总数
+    staff = cube[ORG_TYPES].sum().sort_values().reset_index()
+    staff.columns = ["Organization Type", "Staff Affected"]
+    fig_staff = px.bar(
+        staff,
+        x="Staff Affected",
+        y="Organization Type",
+        orientation="h",
+        color="Staff Affected",
+        color_continuous_scale="Purples",
+        title="Aid Workers Affected by Organization Type",
+    )
+    fig_staff.update_layout(height=400)
+
+    return {
+        "incidents": int(incidents[selected].sum()),
+        "victims": int(staff_harm.sum()),
+        "share": incidents[selected].sum() / incidents.sum(),
+        "staff": fig_staff,
+        "trend": fig_trend,
+        "map": fig_map,
+        "victim_breakdown": fig_victims,
+    }
+
+
+# ---------------------------
+# 📄 COUNTRY BRIEFING
+# ---------------------------
+def country_briefing(cube, tensor, country):
+    """One-page static briefing for a country: a matplotlib figure with the
+    trend, attack methods, locations, actor types and victim profile, plus
+    summary tables. ``cube`` and ``tensor`` are the shared, unfiltered ones."""
+    mask = tensor.mask(Country=country)
+    local = cube[mask]
+    harm = tensor.totals(mask)
+
+    # 年份轴覆盖整个数据集，各国简报可直接对比
+    years = range(int(cube["Year"].min()), int(cube["Year"].max()) + 1)
+    yearly = local.groupby("Year")["Incidents"].sum().reindex(years, fill_value=0)
+    means = local.groupby("Means of attack")["Incidents"].sum().nlargest(8)
+    locations = local.groupby("Location")["Incidents"].sum().nlargest(8)
+    actors = local.groupby("Actor type")["Incidents"].sum().nlargest(8)
+
+    fig = Figure(figsize=(11.7, 8.3))  # A4 横向
+    fig.suptitle(f"{country}: Attacks on Aid Workers", fontsize=16, fontweight="bold")
+    axes = fig.subplots(2, 3)
+
+    ax = axes[0, 0]
+    ax.plot(yearly.index, yearly.values, marker="o", color="#2a9d8f")
+    ax.set_title("Incidents per Year")
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.grid(True, linestyle="--", alpha=0.4)
+
+    for ax, counts, title, color in [
+        (axes[0, 1], means, "Means of Attack", "#e76f51"),
+        (axes[0, 2], locations, "Locations", "#457b9d"),
+        (axes[1, 0], actors, "Actor Types", "#6d597a"),
+    ]:
+        counts.sort_values().plot(kind="barh", ax=ax, color=color)
+        ax.set_title(title)
+        ax.set_ylabel("")
+        ax.set_xlabel("Incidents")
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+
+    ax = axes[1, 1]
+    x = np.arange(len(HARM_LABELS))
+    for i, (staff, color) in enumerate(zip(STAFF_TYPES, ["#264653", "#f4a261"])):
+        ax.bar(x + (i - 0.5) * 0.4, harm[i], width=0.4, label=staff, color=color)
+    ax.set_xticks(x, HARM_LABELS, fontsize=9)
+    ax.set_title("Victims by Staff Type")
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.legend(fontsize=8)
+
+    ax = axes[1, 2]
+    gender = pd.Series(tensor.gender_totals(mask), index=GENDER_LABELS)
+    gender = gender[gender > 0]
+    if len(gender):
+        ax.pie(
+            gender,
+            labels=gender.index,
+            colors=[GENDER_COLORS[g] for g in gender.index],
+            autopct="%1.0f%%",
+        )
+    ax.set_title("Victims by Gender")
+
+    fig.tight_layout(rect=(0, 0, 1, 0.95))
+
+    summary = pd.Series(
+        {
+            "Incidents": int(local["Incidents"].sum()),
+            "Years with incidents": int((yearly > 0).sum()),
+            "Most recent year": int(yearly[yearly > 0].index.max()),
+            "Killed": int(harm[:, 0].sum()),
+            "Wounded": int(harm[:, 1].sum()),
+            "Kidnapped": int(harm[:, 2].sum()),
+            "National victims": int(harm[0].sum()),
+            "International victims": int(harm[1].sum()),
+        },
+        name=country,
+    )
+    victims = pd.DataFrame(harm, index=STAFF_TYPES, columns=HARM_LABELS)
+    return {
+        "figure": fig,
+        "summary": summary,
+        "victims": victims,
+        "means": means,
+        "actors": actors,
+    }
@@ -0,0 +1,94 @@
+# geography.py
+# 地理层级汇总树：Country → Region → District → City 每一层的事件数与伤亡之和，
+# 每个数据版本构建一次；下钻时只取被展开节点的子节点，不把整棵树发到浏览器。
+import pandas as pd
+
+from aggregates import CHUNK_SIZE
+
+GEO_LEVELS = ["Country", "Region", "District", "City"]
+ROLLUP_MEASURES = [
+    "Incidents",
+    "Total killed",
+    "Total wounded",
+    "Total kidnapped",
+    "Total affected",
+]
+UNSPECIFIED = "Unspecified"
+
+
+def leaf_counts(df):
+    """Sums per full Country/Region/District/City path; partial results from
+    chunks are mergeable by adding matching paths."""
+    leaves = df[GEO_LEVELS].fillna(UNSPECIFIED)
+    leaves[ROLLUP_MEASURES[1:]] = df[ROLLUP_MEASURES[1:]].fillna(0).astype("int64")
+    leaves["Incidents"] = 1
+    return leaves.groupby(GEO_LEVELS)[ROLLUP_MEASURES].sum()
+
+
+def merge_leaves(parts):
+    return pd.concat(parts).groupby(level=GEO_LEVELS).sum()
+
+
+class GeoRollup:
+    """Rollup tree: one sorted table per level of the hierarchy.
+
+    Paths are tuples of labels from the country down, ``()`` is the root.
+    """
+
+    def __init__(self, leaves):
+        # 上层由叶子汇总得到，原始行只扫描一次
+        self.levels = [
+            leaves.groupby(level=GEO_LEVELS[:depth]).sum()
+            for depth in range(1, len(GEO_LEVELS) + 1)
+        ]
+        self.total = leaves.sum()
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(leaf_counts(df))
+
+    @classmethod
+    def from_csv(cls, path, exclude=None, chunksize=CHUNK_SIZE):
+        """Chunked build; ``exclude`` is Incident IDs to leave out."""
+        chunks = pd.read_csv(
+            path,
+            usecols=["Incident ID"] + GEO_LEVELS + ROLLUP_MEASURES[1:],
+            chunksize=chunksize,
+        )
+        # 每个分块的结果随即并入累计的叶子表，内存以路径数为上限
+        leaves = None
+        for chunk in chunks:
+            if exclude is not None:
+                chunk = chunk[~chunk["Incident ID"].isin(exclude)]
+            part = leaf_counts(chunk)
+            leaves = part if leaves is None else merge_leaves([leaves, part])
+        return cls(leaves)
+
+    def children(self, path=()):
+        """Children of a node with their measures, largest first."""
+        path = tuple(path)
+        if not self.has_children(path):
+            return pd.DataFrame(columns=ROLLUP_MEASURES).rename_axis("Label")
+        level = self.levels[len(path)]
+        if path:
+            # 有序 MultiIndex 上按前缀切片，只取该节点的子节点
+            try:
+                level = level.loc[path]
+            except KeyError:
+                level = level.iloc[:0].droplevel(list(range(len(path))))
+        return level.rename_axis("Label").sort_values(
+            "Incidents", ascending=False, kind="stable"
+        )
+
+    def node(self, path=()):
+        """Measures of a single node."""
+        path = tuple(path)
+        if not path:
+            return self.total
+        return self.levels[len(path) - 1].loc[path if len(path) > 1 else path[0]]
+
+    def has_children(self, path):
+        return len(path) < len(GEO_LEVELS)
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels)
@@ -0,0 +1,256 @@
+# loadtest.py
+# 并发会话压测：在一个进程内用 Streamlit 的 AppTest 模拟多个同时在线的用户，
+# 按真实浏览习惯在各故事章节间切换，统计每个章节重跑延迟的 p50/p95/p99、吞吐量、CPU 与峰值内存，
+# 并可与基线结果对比。各会话共享同一进程的缓存，与单个 Streamlit 服务实例一致。
+#
+# 用法: python loadtest.py [--sessions 8] [--duration 60] [--think 1.0]
+#                          [--out results.json] [--baseline baseline.json]
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from export_static import APP_PATH, STORY_SECTIONS
+
+PERCENTILES = [50, 95, 99]
+# 浏览模式：多数用户按故事顺序往下读，部分跳转，少量停留在当前章节操作控件（触发重跑）
+NEXT_PROBABILITY = 0.6
+JUMP_PROBABILITY = 0.3
+
+
+def next_section(sections, current, rng):
+    draw = rng.random()
+    position = sections.index(current)
+    if draw < NEXT_PROBABILITY:
+        return sections[(position + 1) % len(sections)]
+    if draw < NEXT_PROBABILITY + JUMP_PROBABILITY:
+        return rng.choice(sections)
+    return current
+
+
+class Session(threading.Thread):
+    """One simulated user clicking through the sidebar until the deadline.
+
+    An exception that ends the session (rather than one the app shows) is
+    kept in ``error`` instead of dying with the thread.
+    """
+
+    def __init__(self, number, deadline, think, seed, record):
+        super().__init__(name=f"session-{number}", daemon=True)
+        self.deadline = deadline
+        self.think = think
+        self.rng = random.Random(seed + number)
+        self.record = record
+        self.error = None
+
+    def run(self):
+        try:
+            self._browse()
+        except Exception:
+            self.error = traceback.format_exc()
+
+    def _browse(self):
+        at = AppTest.from_file(APP_PATH, default_timeout=300)
+        start = time.perf_counter()
+        at.run()
+        self.record("(initial load)", time.perf_counter() - start, at.exception)
+        sections = STORY_SECTIONS
+        section = sections[0]
+        while time.perf_counter() < self.deadline:
+            # 思考时间服从指数分布
+            if self.think:
+                time.sleep(self.rng.expovariate(1 / self.think))
+            section = next_section(sections, section, self.rng)
+            start = time.perf_counter()
+            at.sidebar.radio[0].set_value(section).run()
+            self.record(section, time.perf_counter() - start, at.exception)
+
+
+def _usage():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss / 1024  # Linux 上单位为 KB
+
+
+def run(sessions, duration, think, seed=0):
+    """Drive concurrent sessions and return a JSON-serialisable report."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def record(section, seconds, exception):
+        with lock:
+            latencies[section].append(seconds)
+            if exception:
+                errors[section] += 1
+
+    cpu_before, _ = _usage()
+    started = time.perf_counter()
+    threads = [
+        Session(i, started + duration, think, seed, record) for i in range(sessions)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    cpu_after, peak_rss = _usage()
+    session_errors = [f"{t.name}: {t.error}" for t in threads if t.error]
+
+    per_section = {
+        section: {
+            "reruns": len(values),
+            "errors": errors[section],
+            **{f"p{p}": float(np.percentile(values, p)) * 1000 for p in PERCENTILES},
+        }
+        for section, values in latencies.items()
+    }
+    reruns = sum(len(v) for k, v in latencies.items() if k != "(initial load)")
+    everything = [x for k, v in latencies.items() if k != "(initial load)" for x in v]
+    return {
+        "sessions": sessions,
+        "duration_s": wall,
+        "think_s": think,
+        "reruns": reruns,
+        "throughput_per_s": reruns / wall,
+        "cpu_cores": (cpu_after - cpu_before) / wall,
+        "peak_rss_mb": peak_rss,
+        # 页面抛出的异常按章节计数；会话线程本身崩溃的记录完整堆栈
+        "errors": sum(errors.values()),
+        "session_errors": session_errors,
+        "overall": {
+            f"p{p}": float(np.percentile(everything, p)) * 1000 if everything else None
+            for p in PERCENTILES
+        },
+        "sections": per_section,
+    }
+
+
+def section_table(report):
+    columns = ["reruns", "errors"] + [f"p{p}" for p in PERCENTILES]
+    table = pd.DataFrame(report["sections"], index=columns).T
+    table.index.name = "Section"
+    return table[columns]
+
+
+def failed(report):
+    """True if any rerun raised in the app or any session thread crashed."""
+    return bool(report["errors"] or report["session_errors"])
+
+
+def _ms(value):
+    return "n/a" if value is None else f"{value:.0f}"
+
+
+def _cpu_per_rerun(report):
+    return report["cpu_cores"] * report["duration_s"] / max(report["reruns"], 1)
+
+
+def compare(report, baseline, tolerance):
+    """Changes against a baseline, as fractions, and the regressions beyond
+    ``tolerance``: sections whose percentiles got slower, and totals where
+    throughput dropped or CPU time per rerun or peak RSS grew."""
+    current, before = section_table(report), section_table(baseline)
+    common = current.index.intersection(before.index)
+    columns = [f"p{p}" for p in PERCENTILES]
+    change = current.loc[common, columns] / before.loc[common, columns] - 1
+    totals = pd.Series(
+        {
+            "throughput_per_s": report["throughput_per_s"]
+            / baseline["throughput_per_s"]
+            - 1,
+            "cpu_s_per_rerun": _cpu_per_rerun(report) / _cpu_per_rerun(baseline) - 1,
+            "peak_rss_mb": report["peak_rss_mb"] / baseline["peak_rss_mb"] - 1,
+        }
+    )
+    # 吞吐量越高越好，CPU 与内存越低越好
+    worse = totals * pd.Series(
+        {"throughput_per_s": -1, "cpu_s_per_rerun": 1, "peak_rss_mb": 1}
+    )
+    regressions = change[(change > tolerance).any(axis=1)]
+    return change, totals, regressions, totals[worse > tolerance]
+
+
+def print_report(report):
+    print(
+        f"{report['sessions']} sessions, {report['duration_s']:.0f}s, "
+        f"{report['reruns']} reruns → {report['throughput_per_s']:.2f} reruns/s, "
+        f"CPU {report['cpu_cores']:.2f} cores, peak RSS {report['peak_rss_mb']:.0f} MB"
+    )
+    overall = report["overall"]
+    print(
+        "Overall latency (ms): "
+        + ", ".join(f"p{p} {_ms(overall[f'p{p}'])}" for p in PERCENTILES)
+    )
+    print(section_table(report).round(1).to_string())
+    if report["errors"]:
+        print(f"\n❌ {report['errors']} reruns raised an exception in the app")
+    for error in report["session_errors"]:
+        print(f"\n❌ Session crashed — {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load-test the dashboard with concurrent simulated sessions."
+    )
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument(
+        "--think", type=float, default=1.0, help="mean think time between clicks (s)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the report as JSON")
+    parser.add_argument("--baseline", help="compare against a previous JSON report")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed regression vs. baseline before failing (fraction), for "
+        "latency percentiles, throughput, CPU time per rerun and peak RSS",
+    )
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.duration, args.think, args.seed)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    # 出错的运行延迟数字没有意义，不与基线比较
+    if failed(report):
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline["sessions"], baseline["think_s"]) != (args.sessions, args.think):
+            print(
+                f"⚠️ Baseline used {baseline['sessions']} sessions and "
+                f"{baseline['think_s']}s think time; numbers are not comparable"
+            )
+        change, totals, regressions, total_regressions = compare(
+            report, baseline, args.tolerance
+        )
+        print("\nChange vs. baseline:")
+        print((100 * change).round(1).astype(str).add(" %").to_string())
+        print((100 * totals).round(1).astype(str).add(" %").to_string())
+        if not regressions.empty:
+            print(
+                f"\n❌ {len(regressions)} sections slower than baseline by more "
+                f"than {args.tolerance:.0%}"
+            )
+        for name, value in total_regressions.items():
+            print(f"❌ {name} regressed by {abs(value):.0%} vs. baseline")
+        if not regressions.empty or not total_regressions.empty:
+            sys.exit(1)
+        print("\n✅ No regressions beyond tolerance")
@@ -0,0 +1,41 @@
+# organizations.py
+# 机构类型维度：UN / INGO / ICRC / NRCS and IFRC / NNGO / Other 编码为每个事件一个位集，
+# “受影响机构包含 INGO 或 ICRC” 等筛选与按机构类型的聚合都变成整数数组上的位运算
+import numpy as np
+
+ORG_TYPES = ["UN", "INGO", "ICRC", "NRCS and IFRC", "NNGO", "Other"]
+ORG_BITS = {org: 1 << i for i, org in enumerate(ORG_TYPES)}
+BITSET_COLUMN = "Organizations"
+
+
+def encode(frame):
+    """One uint8 per row; bit i is set when staff of ORG_TYPES[i] were affected."""
+    present = frame[ORG_TYPES].fillna(0).to_numpy() > 0
+    weights = np.array([ORG_BITS[org] for org in ORG_TYPES], dtype=np.uint8)
+    return (present * weights).sum(axis=1).astype(np.uint8)
+
+
+def bitmask(orgs):
+    mask = 0
+    for org in orgs:
+        mask |= ORG_BITS[org]
+    return np.uint8(mask)
+
+
+def select(bits, orgs, match="any"):
+    """Rows affecting any (or all) of the given organization types."""
+    mask = bitmask(orgs)
+    if match == "all":
+        return (bits & mask) == mask
+    return (bits & mask) != 0
+
+
+def per_type(bits, codes, k, weights):
+    """(k, len(ORG_TYPES)) weighted sums for each value of a coded dimension and
+    each organization type; an incident counts once for every type it affected."""
+    valid = codes >= 0
+    out = np.empty((k, len(ORG_TYPES)))
+    for j, org in enumerate(ORG_TYPES):
+        hit = valid & ((bits & ORG_BITS[org]) != 0)
+        out[:, j] = np.bincount(codes[hit], weights=weights[hit], minlength=k)
+    return out
@@ -0,0 +1,202 @@
+# patterns.py
+# 事件属性的共现模式与关联规则挖掘。
+# 每个属性取值（如 "Location=Road"）编码为一列位集（垂直布局，每个 uint64 覆盖 64 个事件），
+# 项集支持度 = 位与之后的 popcount；按支持度从小到大深度优先扩展前缀（FP-growth 式的模式增长），
+# 只沿频繁前缀向下搜索，不对所有属性组合做分组统计。
+import numpy as np
+import pandas as pd
+
+from organizations import ORG_TYPES
+
+PATTERN_ATTRIBUTES = [
+    "Means of attack",
+    "Attack context",
+    "Location",
+    "Actor type",
+    "Motive",
+]
+# 结果项：受害人类型与伤害类型，作为规则右侧最常用
+OUTCOMES = {
+    "Victims=National": "Total nationals",
+    "Victims=International": "Total internationals",
+    "Outcome=Killed": "Total killed",
+    "Outcome=Wounded": "Total wounded",
+    "Outcome=Kidnapped": "Total kidnapped",
+}
+PATTERN_COLUMNS = PATTERN_ATTRIBUTES + ORG_TYPES + list(OUTCOMES.values())
+# 取值为 Unknown 的项不参与挖掘，否则规则会被 "未知" 主导
+SKIPPED_VALUES = {"Unknown"}
+
+
+def attribute(item):
+    return item.split("=", 1)[0]
+
+
+def exclusive(item):
+    """True for items of a single-valued attribute (one value per incident);
+    Organization, Victims and Outcome items can co-occur with each other."""
+    return attribute(item) in PATTERN_ATTRIBUTES
+
+
+def _pack(mask):
+    """Boolean row mask -> little-endian uint64 bitset."""
+    padded = np.zeros(-(-len(mask) // 64) * 64, dtype=bool)
+    padded[: len(mask)] = mask
+    return np.packbits(padded, bitorder="little").view(np.uint64)
+
+
+class ItemBitsets:
+    """Vertical encoding of a frame: one bitset per item, built once per data version."""
+
+    def __init__(self, frame):
+        self.n = len(frame)
+        items = {}
+        for column in PATTERN_ATTRIBUTES:
+            values = frame[column]
+            for value in values.dropna().unique():
+                if value not in SKIPPED_VALUES:
+                    items[f"{column}={value}"] = _pack((values == value).to_numpy())
+        for org in ORG_TYPES:
+            items[f"Organization={org}"] = _pack(frame[org].fillna(0).to_numpy() > 0)
+        for item, column in OUTCOMES.items():
+            items[item] = _pack(frame[column].fillna(0).to_numpy() > 0)
+        self.items = items
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Same as ``ItemBitsets(frame)`` for the concatenated chunks. Every
+        chunk but the last must hold a multiple of 64 rows, so the packed
+        words of consecutive chunks line up."""
+        bitsets = object.__new__(cls)
+        bitsets.n, words, parts = 0, 0, {}
+        for chunk in chunks:
+            if bitsets.n % 64:
+                raise ValueError("only the last chunk may be a partial word")
+            encoded = cls(chunk)
+            size = -(-encoded.n // 64)
+            # 之前的分块中没有出现过的项先补零，本分块中没有出现的项补零
+            for item in parts.keys() | encoded.items.keys():
+                parts.setdefault(item, [np.zeros(words, dtype=np.uint64)])
+                parts[item].append(
+                    encoded.items.get(item, np.zeros(size, dtype=np.uint64))
+                )
+            words += size
+            bitsets.n += encoded.n
+        bitsets.items = {item: np.concatenate(p) for item, p in parts.items()}
+        return bitsets
+
+    def restrict(self, mask):
+        """Bitsets restricted to the rows of a boolean mask (e.g. a filter)."""
+        restricted = object.__new__(ItemBitsets)
+        restricted.n = int(mask.sum())
+        packed = _pack(mask)
+        restricted.items = {item: bits & packed for item, bits in self.items.items()}
+        return restricted
+
+
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+
+    def support(bits):
+        return int(np.bitwise_count(bits).sum())
+
+else:
+    # 旧版 numpy 没有 bitwise_count：按字节查表计数
+    _BYTE_COUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(
+        axis=1
+    )
+
+    def support(bits):
+        return int(_BYTE_COUNTS[bits.view(np.uint8)].sum())
+
+
+def frequent_itemsets(bitsets, min_support=0.02, max_length=4):
+    """All itemsets with support >= ``min_support`` (fraction of rows).
+
+    Returns a Series of absolute counts indexed by item tuples. Two values of
+    the same single-valued attribute (e.g. two Locations) are never combined
+    since they cannot co-occur; multi-label items such as several
+    Organization, Victims or Outcome items are.
+    """
+    min_count = max(1, int(np.ceil(min_support * bitsets.n)))
+    singles = [
+        (item, bits, count)
+        for item, bits in bitsets.items.items()
+        if (count := support(bits)) >= min_count
+    ]
+    # 与 FP-growth 一样按支持度排序，稀有项先扩展，条件位集更快变空
+    singles.sort(key=lambda s: (s[2], s[0]))
+    found = {}
+
+    def grow(prefix, candidates):
+        for i, (item, bits, count) in enumerate(candidates):
+            itemset = prefix + (item,)
+            found[itemset] = count
+            if len(itemset) == max_length:
+                continue
+            used = {attribute(x) for x in itemset if exclusive(x)}
+            extensions = []
+            for other, other_bits, _ in candidates[i + 1 :]:
+                if exclusive(other) and attribute(other) in used:
+                    continue
+                joint = bits & other_bits
+                joint_count = support(joint)
+                if joint_count >= min_count:
+                    extensions.append((other, joint, joint_count))
+            if extensions:
+                grow(itemset, extensions)
+
+    grow((), singles)
+    # 统一按项名排序，便于规则查找子集
+    return pd.Series(
+        list(found.values()),
+        index=pd.Index([tuple(sorted(i)) for i in found], tupleize_cols=False),
+        dtype="int64",
+    )
+
+
+def association_rules(itemsets, n):
+    """Rules ``antecedent → consequent`` with a single-item consequent.
+
+    Every subset of a frequent itemset is frequent, so support, confidence
+    and lift are dictionary lookups.
+    """
+    counts = itemsets.to_dict()
+    rows = []
+    for itemset, count in counts.items():
+        if len(itemset) < 2:
+            continue
+        for consequent in itemset:
+            antecedent = tuple(i for i in itemset if i != consequent)
+            confidence = count / counts[antecedent]
+            rows.append(
+                {
+                    "Antecedent": " + ".join(antecedent),
+                    "Consequent": consequent,
+                    "Incidents": count,
+                    "Support": count / n,
+                    "Confidence": confidence,
+                    "Lift": confidence / (counts[(consequent,)] / n),
+                    "Length": len(antecedent),
+                }
+            )
+    rules = pd.DataFrame(
+        rows,
+        columns=[
+            "Antecedent",
+            "Consequent",
+            "Incidents",
+            "Support",
+            "Confidence",
+            "Lift",
+            "Length",
+        ],
+    )
+    return rules.sort_values("Lift", ascending=False, ignore_index=True)
+
+
+def itemset_frame(itemsets, n):
+    frame = itemsets.rename("Incidents").rename_axis("Items").reset_index()
+    frame["Items"] = frame["Items"].map(" + ".join)
+    frame["Length"] = itemsets.index.map(len)
+    frame["Support"] = frame["Incidents"] / n
+    return frame.sort_values("Incidents", ascending=False, ignore_index=True)
@@ -0,0 +1,156 @@
+# refresh.py
+# 双缓冲数据刷新：当前版本继续服务所有会话，CSV 变化后在后台线程构建新版本
+# （聚合、索引与章节图表全部就绪），再原子地替换当前版本。
+# 旧版本不主动销毁：仍在重跑中的会话持有它的引用，最后一个引用释放后由垃圾回收退役。
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+from data_quality import file_fingerprint
+
+POLL_INTERVAL = 30  # 检查数据文件变化的最小间隔（秒）
+SETTLE_SECONDS = 2  # 文件大小与修改时间保持不变这么久才开始构建，避免读到写了一半的文件
+
+logger = logging.getLogger(__name__)
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DataRefresher:
+    """Holds the current version of the data and swaps in a rebuilt one when
+    the source file changes.
+
+    ``build(path, version=...)`` returns an object with that ``version``
+    attribute (and, optionally, ``wait_warm()``); ``version`` is
+    ``fingerprint(path)``, computed once here so the build does not hash the
+    file again. The first version is built
+    synchronously; later ones in a background thread while ``current`` keeps
+    serving. ``retire(version)``, if given, runs once the last reference to
+    an older version is gone (e.g. to delete its files).
+    """
+
+    def __init__(
+        self,
+        path,
+        build,
+        fingerprint=file_fingerprint,
+        retire=None,
+        poll_interval=POLL_INTERVAL,
+    ):
+        self.path = path
+        self._build = build
+        self._fingerprint = fingerprint
+        self._retire_hook = retire
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._polled = time.monotonic()
+        self._stat = _stat(path)
+        self._versions = weakref.WeakValueDictionary()  # 仍被引用的各个版本
+        self.history = deque(maxlen=20)
+        self.error = None
+        started = time.perf_counter()
+        self.current = self._adopt(build(path, version=self._fingerprint(path)))
+        self._record("initial", time.perf_counter() - started)
+
+    def _adopt(self, data):
+        self._versions[data.version] = data
+        weakref.finalize(data, self._retire, data.version)
+        return data
+
+    def _retire(self, version):
+        # 同一版本可能在退役前被重新构建并采用（文件改回旧内容），此时保留其文件
+        if version in self._versions:
+            return
+        logger.info("Retired data version %s", version)
+        if self._retire_hook is not None:
+            try:
+                self._retire_hook(version)
+            except Exception:
+                logger.exception("Cleaning up data version %s failed", version)
+
+    def _record(self, kind, seconds):
+        self.refreshed_at = time.time()
+        self.refresh_seconds = seconds
+        self.history.append(
+            {
+                "Version": self.current.version,
+                "Kind": kind,
+                "Seconds": seconds,
+                "Finished": self.refreshed_at,
+            }
+        )
+
+    @property
+    def refreshing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def check(self, force=False):
+        """Start a background refresh if the file changed since the current
+        version was built. Costs one ``stat`` at most every ``poll_interval``
+        seconds; returns True if a refresh is running."""
+        now = time.monotonic()
+        with self._lock:
+            if self.refreshing:
+                return True
+            if not force and now - self._polled < self.poll_interval:
+                return False
+            self._polled = now
+            if not force and _stat(self.path) == self._stat:
+                return False
+            self._thread = threading.Thread(
+                target=self._refresh, name="data-refresh", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def _settled_stat(self):
+        stat = _stat(self.path)
+        while True:
+            time.sleep(SETTLE_SECONDS)
+            latest = _stat(self.path)
+            if latest == stat:
+                return stat
+            stat = latest
+
+    def _refresh(self):
+        started = time.perf_counter()
+        try:
+            stat = self._settled_stat()
+            # 先算内容指纹：只有修改时间变了（如 touch 或原样重新上传）时不必构建；
+            # 指纹传给构建函数，大文件不必再读一遍
+            version = self._fingerprint(self.path)
+            if version == self.current.version:
+                self.error = None
+                self._stat = stat
+                return
+            data = self._build(self.path, version=version)
+            # 构建期间文件又被改写：放弃这次结果，下一次检查会重新构建
+            if _stat(self.path) != stat:
+                return
+            if data.version != self.current.version and hasattr(data, "wait_warm"):
+                data.wait_warm()
+        except Exception as e:  # 构建失败时继续使用当前版本
+            logger.exception("Data refresh failed")
+            self.error = e
+            return
+        self.error = None
+        self._stat = stat
+        if data.version == self.current.version:  # 构建期间文件被改回当前内容
+            return
+        # 单次属性赋值即原子替换；正在重跑的会话仍持有旧版本直到重跑结束
+        self.current = self._adopt(data)
+        self._record("refresh", time.perf_counter() - started)
+        logger.info(
+            "Swapped in data version %s (%.1fs)", data.version, self.refresh_seconds
+        )
+
+    def live_versions(self):
+        """Older versions that sessions still hold a reference to."""
+        return [v for v in list(self._versions.keys()) if v != self.current.version]
@@ -0,0 +1,204 @@
+# risk.py
+# 风险曲面：按严重程度加权、按事件时间衰减的核密度估计，落在固定的全球网格上。
+# 卷积用 FFT 完成（经度方向天然环绕），每个数据版本按多个分辨率各算一次，
+# 之后任意坐标的风险值都是一次数组下标查找，可批量给成千上万个地点和路线打分。
+import numpy as np
+import pandas as pd
+
+from aggregates import CHUNK_SIZE
+
+RESOLUTIONS = [2.0, 1.0, 0.5, 0.25]  # 网格边长（度）
+BANDWIDTH = 1.0  # 高斯核标准差（度）
+KERNEL_RADIUS = 3.0  # 核截断半径（以标准差计）
+HALF_LIFE_YEARS = 3.0
+SEVERITY_WEIGHTS = {"Total killed": 3.0, "Total kidnapped": 2.0, "Total wounded": 1.0}
+EPOCH = 1997.0
+RISK_COLUMNS = ["Latitude", "Longitude", "Year", "Month"] + list(SEVERITY_WEIGHTS)
+
+
+def incident_weights(frame):
+    """Severity × time-growth weight per incident, and the latest incident time.
+
+    Weights grow as 2^((t - EPOCH) / half-life) instead of decaying from the
+    latest date, so chunk histograms can be summed before the latest date is
+    known; ``RiskSurface`` rescales once at the end.
+    """
+    severity = 1.0
+    for column, weight in SEVERITY_WEIGHTS.items():
+        severity = severity + weight * frame[column].fillna(0)
+    # 缺失月份按年中处理
+    t = frame["Year"] + (frame["Month"].fillna(6.5) - 1) / 12
+    growth = np.exp2((t - EPOCH) / HALF_LIFE_YEARS)
+    return (severity * growth).to_numpy(dtype=float), float(t.max())
+
+
+def grid_shape(resolution):
+    return int(round(180 / resolution)), int(round(360 / resolution))
+
+
+def grid_cells(lat, lon, resolution):
+    """Row/column of the grid cell containing each coordinate."""
+    n_lat, n_lon = grid_shape(resolution)
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    rows = np.clip(np.floor((lat + 90) / resolution).astype(np.int64), 0, n_lat - 1)
+    # 向下取整再取模，越过 ±180° 的经度（如路线插值点）回绕到对侧
+    cols = np.floor((lon + 180) / resolution).astype(np.int64) % n_lon
+    return rows, cols
+
+
+def histogram(frame, resolution):
+    """Weighted incident counts per grid cell (mergeable across chunks) and
+    the latest incident time, None when no incident has coordinates."""
+    located = frame.dropna(subset=["Latitude", "Longitude"])
+    n_lat, n_lon = grid_shape(resolution)
+    if located.empty:
+        return np.zeros((n_lat, n_lon)), None
+    weights, latest = incident_weights(located)
+    rows, cols = grid_cells(located["Latitude"], located["Longitude"], resolution)
+    flat = np.bincount(rows * n_lon + cols, weights=weights, minlength=n_lat * n_lon)
+    return flat.reshape(n_lat, n_lon), latest
+
+
+def _kernel(shape, resolution, pad):
+    """Gaussian kernel laid out for circular convolution on the padded grid."""
+    height, width = shape
+    dy = np.minimum(np.arange(height), height - np.arange(height)) * resolution
+    dx = np.minimum(np.arange(width), width - np.arange(width)) * resolution
+    distance2 = dy[:, None] ** 2 + dx[None, :] ** 2
+    kernel = np.exp(-distance2 / (2 * BANDWIDTH**2))
+    # 按半径截断成圆盘（纬度与经度方向相同）；半径不超过 pad 行，纬度方向不会在两极之间环绕
+    kernel[distance2 > (pad * resolution) ** 2] = 0
+    return kernel / kernel.sum()
+
+
+def smooth(hist, resolution):
+    """Kernel density via FFT: wraps around in longitude, zero-padded in latitude."""
+    pad = int(np.ceil(KERNEL_RADIUS * BANDWIDTH / resolution))
+    padded = np.pad(hist, ((pad, pad), (0, 0)))
+    kernel = _kernel(padded.shape, resolution, pad)
+    density = np.fft.irfft2(np.fft.rfft2(padded) * np.fft.rfft2(kernel), s=padded.shape)
+    density = density[pad : pad + hist.shape[0]]
+    # 去掉 FFT 舍入误差留下的极小值与负值
+    density[density < density.max() * 1e-12] = 0
+    return density
+
+
+class RiskSurface:
+    """Risk density on one grid, scored 0–100 relative to the riskiest cell.
+
+    With ``latest`` None (no located incidents) the surface is ``empty``
+    and every score is 0.
+    """
+
+    def __init__(self, hist, resolution, latest):
+        self.resolution = resolution
+        self.latest = latest
+        if latest is None:
+            self.density = np.zeros(grid_shape(resolution))
+            self.score_grid = np.zeros(grid_shape(resolution))
+            return
+        # 统一换算成以最新事件为基准的衰减权重
+        density = smooth(hist, resolution) * np.exp2(
+            -(latest - EPOCH) / HALF_LIFE_YEARS
+        )
+        self.density = density
+        self.score_grid = 100 * density / max(density.max(), np.finfo(float).tiny)
+
+    @property
+    def empty(self):
+        return self.latest is None
+
+    def score(self, lat, lon):
+        """Risk score for each coordinate; one array lookup per point."""
+        rows, cols = grid_cells(lat, lon, self.resolution)
+        return self.score_grid[rows, cols]
+
+    def score_sites(self, sites):
+        """Copy of a frame with Latitude/Longitude columns plus a Risk score."""
+        scored = sites.copy()
+        scored["Risk score"] = self.score(sites["Latitude"], sites["Longitude"])
+        return scored
+
+    def score_routes(self, waypoints, route_column="Route"):
+        """Mean and peak risk along each route.
+
+        ``waypoints`` lists points in travel order with a route identifier;
+        each leg is sampled about once per grid cell and takes the shorter
+        way round in longitude (a leg from 179° to -179° crosses the
+        antimeridian instead of spanning the globe).
+        """
+        lat = waypoints["Latitude"].to_numpy(dtype=float)
+        lon = waypoints["Longitude"].to_numpy(dtype=float)
+        route = waypoints[route_column].to_numpy()
+        # 同一路线内相邻两点构成一段
+        leg = np.flatnonzero(route[1:] == route[:-1])
+        dlat = lat[leg + 1] - lat[leg]
+        dlon = (lon[leg + 1] - lon[leg] + 180) % 360 - 180
+        steps = np.maximum(
+            np.ceil(np.hypot(dlat, dlon) / self.resolution).astype(np.int64), 1
+        )
+        owner = np.repeat(np.arange(len(leg)), steps)
+        frac = np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+        frac = frac / np.repeat(steps, steps)
+        start = leg[owner]
+        samples = pd.DataFrame(
+            {
+                route_column: np.concatenate([route[start], route]),
+                "Risk score": np.concatenate(
+                    [
+                        self.score(
+                            lat[start] + frac * dlat[owner],
+                            lon[start] + frac * dlon[owner],
+                        ),
+                        self.score(lat, lon),
+                    ]
+                ),
+            }
+        )
+        return (
+            samples.groupby(route_column, sort=False)["Risk score"]
+            .agg(["mean", "max"])
+            .rename(columns={"mean": "Mean risk", "max": "Peak risk"})
+            .reset_index()
+        )
+
+    def frame(self, min_score=0.5):
+        """Cells above a score threshold, for plotting."""
+        rows, cols = np.nonzero(self.score_grid >= min_score)
+        return pd.DataFrame(
+            {
+                "Latitude": -90 + (rows + 0.5) * self.resolution,
+                "Longitude": -180 + (cols + 0.5) * self.resolution,
+                "Risk score": self.score_grid[rows, cols],
+            }
+        )
+
+
+def build_surfaces(frame, resolutions=RESOLUTIONS):
+    """One risk surface per resolution, keyed by grid size in degrees."""
+    surfaces = {}
+    for resolution in resolutions:
+        hist, latest = histogram(frame, resolution)
+        surfaces[resolution] = RiskSurface(hist, resolution, latest)
+    return surfaces
+
+
+def stream_surfaces(path, exclude=None, resolutions=RESOLUTIONS, chunksize=CHUNK_SIZE):
+    """Same as ``build_surfaces`` but accumulating histograms chunk by chunk;
+    ``exclude`` is Incident IDs to leave out."""
+    hists = {resolution: 0 for resolution in resolutions}
+    latest = None
+    columns = ["Incident ID"] + RISK_COLUMNS
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+        if exclude is not None:
+            chunk = chunk[~chunk["Incident ID"].isin(exclude)]
+        for resolution in resolutions:
+            hist, chunk_latest = histogram(chunk, resolution)
+            hists[resolution] = hists[resolution] + hist
+        if chunk_latest is not None:
+            latest = chunk_latest if latest is None else max(latest, chunk_latest)
+    return {
+        resolution: RiskSurface(hists[resolution], resolution, latest)
+        for resolution in resolutions
+    }
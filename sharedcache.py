@@ -0,0 +1,371 @@
+# sharedcache.py
+# 多副本共享缓存层：负载均衡后面的多个看板副本共用一份按数据指纹寻址的计算结果
+# （列式数据框、聚合立方体、校验报告、疑似重复与各章节的序列化图表），
+# 任一副本算出的结果其他副本直接读取；同一个键只有拿到计算锁的副本去算，其余副本等待结果（single-flight）。
+# 计算期间持锁副本定期续期，计算时间超过锁的过期时间也不会被其他副本当作崩溃接手。
+#
+# 后端可插拔：
+#   file:///shared/cache 或普通路径  共享目录（本地磁盘或网络挂载），读取走内存映射
+#   redis://host:6379/0              网络键值存储（需要 pip install redis）
+#   memory://                        进程内键值存储，接口与网络后端相同，用于测试与单机调试
+#
+# 信任边界：除数据框外的对象以 pickle 存储，反序列化会执行写入者构造的代码，
+# 所以能写缓存的一方等同于能在每个副本上执行代码。配置了密钥（DASHBOARD_CACHE_SECRET）时
+# 每个值都带 HMAC-SHA256 签名，读取时先校验，签名不符的值当作未命中重新计算并覆盖；
+# 网络后端（redis://）必须配置密钥，共享目录只应对看板副本可写。
+import contextlib
+import fcntl
+import hashlib
+import hmac
+import io
+import logging
+import mmap
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import quote, urlparse
+
+import pandas as pd
+
+CACHE_DIR = "cache"
+LOCK_TTL = 300  # 计算锁的过期时间（秒），持锁副本崩溃后其他副本可以接手
+RENEW_FRACTION = 1 / 3  # 计算期间每隔这么多个过期时间续期一次
+POLL_SECONDS = 0.2  # 等待其他副本计算结果时的轮询间隔
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps_frame(frame):
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer)
+    return buffer.getvalue()
+
+
+def _loads_frame(data):
+    return pd.read_parquet(io.BytesIO(data))
+
+
+# 编解码器：(序列化, 反序列化)；数据框用 Parquet 列式存储，其余对象用 pickle
+FRAME = (_dumps_frame, _loads_frame)
+PICKLE = (lambda value: pickle.dumps(value, pickle.HIGHEST_PROTOCOL), pickle.loads)
+
+
+class FileBackend:
+    """Values as files in a shared directory, written atomically and read
+    through a memory map; locks are exclusive-create lock files, renewed by
+    touching them."""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, quote(key, safe=""))
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, value):
+        path = self._path(key)
+        partial = f"{path}.{uuid.uuid4().hex}.partial"
+        with open(partial, "wb") as f:
+            f.write(value)
+        os.replace(partial, path)
+
+    @contextlib.contextmanager
+    def _guard(self, path):
+        """Serialize stale-lock removal and release of one lock file.
+
+        Without it, a stale lock could be replaced by a fresh one between
+        the staleness check and the removal, and the fresh one deleted. The
+        guard is an advisory flock, so the kernel drops it if its holder dies.
+        The guard file is deleted on the way out; a waiter that then holds the
+        flock of a deleted file sees that the path no longer names it and
+        opens the path again.
+        """
+        guard_path = f"{path}.guard"
+        while True:
+            guard = open(guard_path, "a")
+            fcntl.flock(guard, fcntl.LOCK_EX)
+            try:
+                current = os.path.samestat(
+                    os.fstat(guard.fileno()), os.stat(guard_path)
+                )
+            except FileNotFoundError:
+                current = False
+            if current:
+                break
+            guard.close()
+        try:
+            yield
+        finally:
+            try:
+                os.remove(guard_path)
+            except FileNotFoundError:
+                pass
+            fcntl.flock(guard, fcntl.LOCK_UN)
+            guard.close()
+
+    def acquire(self, key, ttl=LOCK_TTL):
+        path = self._path(key)
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # 过期的锁视为持有者已崩溃，删除后下一轮重新争抢；
+            # 持有保护锁时重新检查，确保删掉的仍是那个过期的锁
+            with self._guard(path):
+                try:
+                    if time.time() - os.path.getmtime(path) > ttl:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+            return None
+        with os.fdopen(fd, "w") as f:
+            f.write(token)
+        return token
+
+    def _holds(self, path, token):
+        try:
+            with open(path) as f:
+                return f.read() == token
+        except FileNotFoundError:
+            return False
+
+    def renew(self, key, token, ttl=LOCK_TTL):
+        path = self._path(key)
+        with self._guard(path):
+            if not self._holds(path, token):
+                return False
+            os.utime(path)
+            return True
+
+    def release(self, key, token):
+        path = self._path(key)
+        with self._guard(path):
+            if self._holds(path, token):
+                os.remove(path)
+
+
+# 比较并删除 / 比较并续期：只有锁的值仍是自己的令牌时才操作，在服务端原子执行
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class KeyValueBackend:
+    """A networked key-value store. ``client`` needs ``get(key)``,
+    ``set(key, value, nx=False, ex=None)`` and ``eval(script, numkeys,
+    *keys_and_args)`` for ``RELEASE_SCRIPT`` and ``RENEW_SCRIPT``, the
+    subset of the redis-py API used here."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def put(self, key, value):
+        self.client.set(key, value)
+
+    def acquire(self, key, ttl=LOCK_TTL):
+        token = uuid.uuid4().hex.encode()
+        return token if self.client.set(key, token, nx=True, ex=ttl) else None
+
+    def renew(self, key, token, ttl=LOCK_TTL):
+        # redis 的 expire 只接受整数秒
+        return bool(self.client.eval(RENEW_SCRIPT, 1, key, token, max(1, round(ttl))))
+
+    def release(self, key, token):
+        # 只删除自己的锁；锁若已过期被别人取得则保留。
+        # 先读再删不是原子的：两步之间锁可能过期并被别人取得，随后被误删
+        self.client.eval(RELEASE_SCRIPT, 1, key, token)
+
+
+class MemoryKV:
+    """In-process stand-in for a networked key-value client."""
+
+    def __init__(self):
+        self._values = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _expire(self, key):
+        if key in self._expires and self._expires[key] <= time.monotonic():
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+
+    def get(self, key):
+        with self._lock:
+            self._expire(key)
+            return self._values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        with self._lock:
+            self._expire(key)
+            if nx and key in self._values:
+                return False
+            self._values[key] = bytes(value)
+            self._expires.pop(key, None)
+            if ex is not None:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._expires.pop(key, None)
+            return int(self._values.pop(key, None) is not None)
+
+    def eval(self, script, numkeys, *keys_and_args):
+        """Runs ``RELEASE_SCRIPT`` and ``RENEW_SCRIPT`` only, atomically under
+        the store lock."""
+        if script not in (RELEASE_SCRIPT, RENEW_SCRIPT) or numkeys != 1:
+            raise NotImplementedError(
+                "MemoryKV only runs RELEASE_SCRIPT and RENEW_SCRIPT"
+            )
+        key, token, *args = keys_and_args
+        with self._lock:
+            self._expire(key)
+            if self._values.get(key) != bytes(token):
+                return 0
+            if script == RENEW_SCRIPT:
+                self._expires[key] = time.monotonic() + float(args[0])
+                return 1
+            self._expires.pop(key, None)
+            del self._values[key]
+            return 1
+
+
+class SharedCache:
+    """Get-or-compute on top of a backend, with one computation per key
+    across all replicas. The compute lock is renewed while a value is being
+    computed, so a computation longer than ``lock_ttl`` is not taken over.
+
+    With a ``secret`` every value is stored behind an HMAC-SHA256 of the key
+    and payload, and values whose signature does not verify are never
+    deserialized (they are recomputed and overwritten instead).
+    """
+
+    def __init__(self, backend, lock_ttl=LOCK_TTL, secret=None):
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()  # 同一进程的多个线程共用一个缓存对象
+
+    def _signature(self, key, payload):
+        mac = hmac.new(self.secret, key.encode(), hashlib.sha256)
+        mac.update(payload)
+        return mac.digest()
+
+    def _seal(self, key, payload):
+        if self.secret is None:
+            return payload
+        return self._signature(key, payload) + payload
+
+    def _open(self, key, data):
+        """Payload of a stored value; None if its signature does not verify."""
+        if data is None or self.secret is None:
+            return data
+        view = memoryview(data)
+        payload = view[SIGNATURE_SIZE:]
+        if len(view) >= SIGNATURE_SIZE and hmac.compare_digest(
+            self._signature(key, payload), view[:SIGNATURE_SIZE]
+        ):
+            return payload
+        logger.warning("Ignoring shared cache value with a bad signature: %s", key)
+        self._count("rejected")
+        return None
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    @contextlib.contextmanager
+    def _renewing(self, key, token):
+        """Renew the lock every ``RENEW_FRACTION`` of its ttl until the block exits."""
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(self.lock_ttl * RENEW_FRACTION):
+                if not self.backend.renew(key, token, self.lock_ttl):
+                    logger.warning("Lost the shared cache lock %s while computing", key)
+                    return
+
+        thread = threading.Thread(target=renew, name=f"renew {key}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def get_or_compute(self, key, compute, codec=PICKLE):
+        dumps, loads = codec
+        while True:
+            data = self._open(key, self.backend.get(key))
+            if data is not None:
+                self._count("hits")
+                return loads(data)
+            lock = f"{key}.lock"
+            token = self.backend.acquire(lock, self.lock_ttl)
+            if token is not None:
+                try:
+                    # 拿到锁后再查一次：结果可能刚由另一个副本写入
+                    data = self._open(key, self.backend.get(key))
+                    if data is not None:
+                        self._count("hits")
+                        return loads(data)
+                    with self._renewing(lock, token):
+                        value = compute()
+                    self.backend.put(key, self._seal(key, dumps(value)))
+                    self._count("computed")
+                    return value
+                finally:
+                    self.backend.release(lock, token)
+            # 另一个副本正在计算同一个键：等它写入结果
+            self._count("waits")
+            time.sleep(POLL_SECONDS)
+
+
+def open_cache(url, secret=None):
+    """Shared cache for a URL (see the header); None when ``url`` is empty.
+    ``secret`` signs every value and is required for networked backends."""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return SharedCache(KeyValueBackend(MemoryKV()), secret=secret)
+    if parsed.scheme in ("redis", "rediss"):
+        if not secret:
+            raise ValueError(
+                "A signing secret is required for a networked cache: "
+                "values are unpickled on every replica"
+            )
+        import redis  # 可选依赖，只有使用网络后端时才需要
+
+        return SharedCache(KeyValueBackend(redis.Redis.from_url(url)), secret=secret)
+    if parsed.scheme in ("", "file"):
+        return SharedCache(
+            FileBackend(parsed.path if parsed.scheme else url), secret=secret
+        )
+    raise ValueError(f"Unsupported cache URL: {url}")
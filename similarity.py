@@ -0,0 +1,253 @@
+# similarity.py
+# 相似事件检索：由 Details 文本、类别字段与地理位置生成稀疏向量，放入 scikit-learn 最近邻索引。
+# 向量化是无状态的（特征哈希），新增或修改的事件只需单独编码后并入索引；索引按数据版本与向量化参数保存到磁盘。
+#
+# 用法: python similarity.py [csv_path]   # 为当前 CSV 构建（或增量更新）索引
+import hashlib
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import normalize
+
+from aggregates import CHUNK_SIZE
+from data_quality import file_fingerprint
+from snapshots import ID_COLUMN, row_hashes
+
+INDEX_DIR = "indexes"
+CATEGORICAL_COLUMNS = [
+    "Means of attack",
+    "Attack context",
+    "Location",
+    "Actor type",
+    "Motive",
+]
+GEO_COLUMNS = ["Country", "Region"]
+GEO_CELL = 1.0  # 地理网格边长（度）
+# 各部分的权重；每部分先单位化，余弦相似度即各部分相似度的加权和
+BLOCK_WEIGHTS = {"text": 0.6, "categorical": 0.25, "geo": 0.15}
+
+_text = HashingVectorizer(
+    n_features=2**18,
+    ngram_range=(1, 2),
+    stop_words="english",
+    alternate_sign=False,
+    norm="l2",
+)
+_tokens = FeatureHasher(n_features=2**12, input_type="string", alternate_sign=False)
+# 向量只用到这些列；Details 来自文本存储，其余列从 CSV 读取
+STRUCTURED_COLUMNS = (
+    [ID_COLUMN] + CATEGORICAL_COLUMNS + GEO_COLUMNS + ["Latitude", "Longitude"]
+)
+INDEX_COLUMNS = STRUCTURED_COLUMNS + ["Details"]
+
+
+def embedding_key():
+    """Short hash of everything that shapes a vector. Saved indexes are
+    keyed by it, so changing a weight or vectorizer parameter never reuses
+    (or incrementally updates) vectors built the old way."""
+    params = (
+        BLOCK_WEIGHTS,
+        GEO_CELL,
+        INDEX_COLUMNS,
+        sorted(_text.get_params().items()),
+        sorted(_tokens.get_params().items()),
+    )
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:8]
+
+
+EMBEDDING_KEY = embedding_key()
+
+
+def _geo_tokens(frame):
+    cell_lat, cell_lon = (
+        np.floor(pd.to_numeric(frame[c]) / GEO_CELL).astype("Int64").astype("string")
+        for c in ["Latitude", "Longitude"]
+    )
+    cells = "cell=" + cell_lat + "," + cell_lon
+    columns = [
+        (f"{c}=" + frame[c].astype("string")).fillna("") for c in GEO_COLUMNS
+    ] + [cells.fillna("")]
+    return [[t for t in row if t] for row in zip(*columns)]
+
+
+def embed(frame):
+    """Sparse unit vectors, one per row of ``frame``."""
+    if frame.empty:  # FeatureHasher 不接受空输入
+        return sp.csr_matrix((0, _text.n_features + 2 * _tokens.n_features))
+    text = _text.transform(frame["Details"].fillna(""))
+    categorical = _tokens.transform(
+        [
+            [f"{c}={v}" for c, v in zip(CATEGORICAL_COLUMNS, row) if pd.notna(v)]
+            for row in frame[CATEGORICAL_COLUMNS].itertuples(index=False)
+        ]
+    )
+    geo = _tokens.transform(_geo_tokens(frame))
+    blocks = {"text": text, "categorical": categorical, "geo": geo}
+    return sp.hstack(
+        [np.sqrt(w) * normalize(blocks[name]) for name, w in BLOCK_WEIGHTS.items()],
+        format="csr",
+    )
+
+
+class SimilarityIndex:
+    """Cosine nearest-neighbour index over incident vectors."""
+
+    def __init__(self, ids, vectors, hashes, version):
+        self.ids = np.asarray(ids)
+        self.vectors = vectors
+        self.hashes = hashes  # Incident ID -> 行内容哈希，用于增量更新
+        self.version = version
+        self._position = pd.Index(self.ids)
+        # 稀疏向量上的暴力余弦检索：一次稀疏矩阵乘法，几千行只需几毫秒
+        self._nn = NearestNeighbors(metric="cosine", algorithm="brute").fit(vectors)
+
+    @classmethod
+    def build(cls, frame, version):
+        frame = frame[INDEX_COLUMNS]
+        return cls(frame[ID_COLUMN], embed(frame), row_hashes(frame), version)
+
+    @classmethod
+    def from_csv(cls, path, version, store, chunksize=CHUNK_SIZE):
+        """Build chunk by chunk; embedding needs no global state. Only the
+        structured columns are read from the CSV, Details from ``store``."""
+        ids, vectors, hashes = [], [], []
+        chunks = pd.read_csv(path, usecols=STRUCTURED_COLUMNS, chunksize=chunksize)
+        for chunk in chunks:
+            chunk = store.join(chunk)[INDEX_COLUMNS]
+            ids.append(chunk[ID_COLUMN].to_numpy())
+            vectors.append(embed(chunk))
+            hashes.append(row_hashes(chunk))
+        return cls(
+            np.concatenate(ids),
+            sp.vstack(vectors, format="csr"),
+            pd.concat(hashes),
+            version,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __reduce__(self):
+        # 近邻模型不序列化，读取时重新拟合（暴力检索只保存向量）
+        return SimilarityIndex, (self.ids, self.vectors, self.hashes, self.version)
+
+    def update(self, frame, version):
+        """New index for a newer version of the data, re-embedding only the
+        incidents that were added or changed."""
+        frame = frame[INDEX_COLUMNS]
+        hashes = row_hashes(frame)
+        known = hashes.index.intersection(self.hashes.index)
+        unchanged = known[self.hashes[known].to_numpy() == hashes[known].to_numpy()]
+        fresh = frame[~frame[ID_COLUMN].isin(unchanged)]
+        ids = np.concatenate([unchanged.to_numpy(), fresh[ID_COLUMN].to_numpy()])
+        vectors = sp.vstack(
+            [self.vectors[self._position.get_indexer(unchanged)], embed(fresh)],
+            format="csr",
+        )
+        return SimilarityIndex(ids, vectors, hashes, version)
+
+    def query(self, frame, k=10):
+        """Top-k most similar indexed incidents for each row of ``frame``.
+
+        Returns a long frame: Query (row position), Incident ID, Similarity.
+        """
+        distances, positions = self._nn.kneighbors(
+            embed(frame), n_neighbors=min(k, len(self))
+        )
+        return pd.DataFrame(
+            {
+                "Query": np.repeat(np.arange(len(frame)), positions.shape[1]),
+                ID_COLUMN: self.ids[positions.ravel()],
+                "Similarity": 1 - distances.ravel(),
+            }
+        )
+
+    def similar_to(self, incident_id, k=10):
+        """Top-k incidents most similar to an indexed one (excluding itself)."""
+        row = self.vectors[self._position.get_loc(incident_id)]
+        distances, positions = self._nn.kneighbors(
+            row, n_neighbors=min(k + 1, len(self))
+        )
+        result = pd.DataFrame(
+            {
+                ID_COLUMN: self.ids[positions[0]],
+                "Similarity": 1 - distances[0],
+            }
+        )
+        return result[result[ID_COLUMN] != incident_id].head(k)
+
+    def save(self, index_dir=INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+        path = index_path(self.version, index_dir)
+        joblib.dump((self.ids, self.vectors, self.hashes, self.version), path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        return cls(*joblib.load(path))
+
+
+def index_path(version, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, f"similarity_{version}_{EMBEDDING_KEY}.joblib")
+
+
+def saved_indexes(index_dir=INDEX_DIR):
+    """Saved index paths with the current embedding, most recently written first."""
+    if not os.path.isdir(index_dir):
+        return []
+    paths = [
+        os.path.join(index_dir, f)
+        for f in os.listdir(index_dir)
+        if f.startswith("similarity_") and f.endswith(f"_{EMBEDDING_KEY}.joblib")
+    ]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def remove_indexes(version, index_dir=INDEX_DIR):
+    """Delete the saved indexes of a retired data version (any embedding)."""
+    if not os.path.isdir(index_dir):
+        return
+    for f in os.listdir(index_dir):
+        if f.startswith(f"similarity_{version}_") and f.endswith(".joblib"):
+            os.remove(os.path.join(index_dir, f))
+
+
+def load_index(version, store, frame=None, path=None, index_dir=INDEX_DIR):
+    """Index for a data version: loaded from disk if saved, otherwise updated
+    incrementally from the latest saved index, otherwise built from scratch.
+
+    Pass either the frame or (in streaming mode) the CSV path; Details come
+    from the text store either way.
+    """
+    target = index_path(version, index_dir)
+    if os.path.exists(target):
+        return SimilarityIndex.load(target)
+    previous = saved_indexes(index_dir)
+    if frame is None and not previous:
+        index = SimilarityIndex.from_csv(path, version, store)
+    else:
+        if frame is None:
+            frame = pd.read_csv(path, usecols=STRUCTURED_COLUMNS)
+        frame = store.join(frame[STRUCTURED_COLUMNS])
+        if previous:
+            index = SimilarityIndex.load(previous[0]).update(frame, version)
+        else:
+            index = SimilarityIndex.build(frame, version)
+    index.save(index_dir)
+    return index
+
+
+if __name__ == "__main__":
+    from textstore import build_store
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "security_incidents.csv"
+    version = file_fingerprint(csv_path)
+    index = load_index(version, build_store(csv_path, version), path=csv_path)
+    print(f"{len(index)} incidents indexed (version {index.version})")
@@ -0,0 +1,194 @@
+# snapshots.py
+# 数据集版本快照与差异比较：按 Incident ID 对齐，用逐行内容哈希找出变化的行
+#
+# 用法: python snapshots.py [csv_path]   # 把当前 CSV 保存为一个新快照
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from data_quality import file_fingerprint
+
+SNAPSHOT_DIR = "snapshots"
+ID_COLUMN = "Incident ID"
+# 保存的行哈希列名带哈希方案版本；方案变化后旧文件不再使用，重新计算
+HASH_COLUMN = "hash_v2"
+
+
+def save_snapshot(csv_path, snapshot_dir=SNAPSHOT_DIR):
+    """Store a CSV as a Parquet snapshot named <UTC date>_<content hash>."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    version = file_fingerprint(csv_path)
+    for name in list_snapshots(snapshot_dir):
+        if name.endswith(version):
+            return name
+    name = f"{datetime.now(timezone.utc):%Y%m%d%H%M%S}_{version}"
+    df = pd.read_csv(csv_path)
+    df.to_parquet(os.path.join(snapshot_dir, f"{name}.parquet"))
+    # 行哈希随快照一起保存，比较时无需重新哈希长文本列
+    row_hashes(df).rename(HASH_COLUMN).to_frame().to_parquet(
+        os.path.join(snapshot_dir, f"{name}.hashes.parquet")
+    )
+    return name
+
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot names, oldest first."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(
+        f[: -len(".parquet")]
+        for f in os.listdir(snapshot_dir)
+        if f.endswith(".parquet") and not f.endswith(".hashes.parquet")
+    )
+
+
+def load_snapshot(name, snapshot_dir=SNAPSHOT_DIR):
+    return pd.read_parquet(os.path.join(snapshot_dir, f"{name}.parquet"))
+
+
+def load_row_hashes(name, snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, f"{name}.hashes.parquet")
+    if os.path.exists(path):
+        saved = pd.read_parquet(path)
+        if HASH_COLUMN in saved.columns:
+            return saved[HASH_COLUMN]
+    return row_hashes(load_snapshot(name, snapshot_dir))
+
+
+def _normalized(df):
+    """Non-ID columns in name order, numbers as float64 and everything else
+    as Python objects (missing values as None), so the same values hash the
+    same whatever dtypes a CSV or Parquet round trip produced."""
+    columns = {}
+    for column in sorted(c for c in df.columns if c != ID_COLUMN):
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            columns[column] = values.astype("float64")
+        else:
+            columns[column] = values.astype(object).where(values.notna(), None)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def row_hashes(df):
+    """One 64-bit content hash per row, indexed by Incident ID. Hashes do not
+    depend on dtypes (an int column read back as float hashes the same) or
+    on column order."""
+    hashes = pd.util.hash_pandas_object(_normalized(df), index=False)
+    return pd.Series(hashes.to_numpy(), index=df[ID_COLUMN].to_numpy())
+
+
+def headline_aggregates(df):
+    """The headline numbers each dashboard section is built around."""
+    totals = df[
+        [
+            "Total killed",
+            "Total wounded",
+            "Total kidnapped",
+            "Total nationals",
+            "Total internationals",
+        ]
+    ].sum()
+    means = df["Means of attack"].value_counts()
+    actors = df["Actor type"].value_counts()
+    rows = [
+        ("📅 Yearly Trends", "Incidents", len(df)),
+        ("📅 Yearly Trends", "Years covered", df["Year"].nunique()),
+        ("📅 Yearly Trends", "Total victims", totals.iloc[:3].sum()),
+        ("🌍 Geographic Patterns", "Countries", df["Country"].nunique()),
+        ("🌍 Geographic Patterns", "Regions", df["Region"].nunique()),
+        (
+            "🌍 Geographic Patterns",
+            "Incidents in top country",
+            df["Country"].value_counts().max(),
+        ),
+        ("⚔️ Attack Types", "Means of attack", len(means)),
+        ("⚔️ Attack Types", "Incidents of top means of attack", means.iloc[0]),
+        ("🧍‍♂️ Victim Profiles", "Killed", totals["Total killed"]),
+        ("🧍‍♂️ Victim Profiles", "Wounded", totals["Total wounded"]),
+        ("🧍‍♂️ Victim Profiles", "Kidnapped", totals["Total kidnapped"]),
+        ("🧍‍♂️ Victim Profiles", "National staff", totals["Total nationals"]),
+        (
+            "🧍‍♂️ Victim Profiles",
+            "International staff",
+            totals["Total internationals"],
+        ),
+        ("🧨 Perpetrator Analysis", "Actor types", len(actors)),
+        (
+            "🧨 Perpetrator Analysis",
+            "Unknown actor incidents",
+            actors.get("Unknown", 0),
+        ),
+        (
+            "📅 Time & Cross Analysis",
+            "Incidents with known month",
+            df["Month"].notna().sum(),
+        ),
+    ]
+    return pd.Series(
+        [int(v) for _, _, v in rows],
+        index=pd.MultiIndex.from_tuples(
+            [(s, m) for s, m, _ in rows], names=["Section", "Metric"]
+        ),
+    )
+
+
+def diff_snapshots(old, new, old_hash=None, new_hash=None):
+    """Compare two snapshots joined on Incident ID.
+
+    Returns a dict with the added and removed rows, a long-form table of
+    column-level changes, the effect on every section's headline numbers and
+    the Incident IDs that appear more than once in either snapshot (only
+    their first row takes part in the comparison). Precomputed row hashes
+    can be passed in to skip rehashing.
+    """
+    old_hash = row_hashes(old) if old_hash is None else old_hash
+    new_hash = row_hashes(new) if new_hash is None else new_hash
+    # 重复的 Incident ID 无法一一对齐：每个 ID 只比较第一行，并把这些 ID 报告出来
+    duplicate_ids = old_hash.index[old_hash.index.duplicated()].union(
+        new_hash.index[new_hash.index.duplicated()]
+    )
+    if len(duplicate_ids):
+        old_hash = old_hash[~old_hash.index.duplicated()]
+        new_hash = new_hash[~new_hash.index.duplicated()]
+        old = old.drop_duplicates(ID_COLUMN)
+        new = new.drop_duplicates(ID_COLUMN)
+    added_ids = new_hash.index.difference(old_hash.index)
+    removed_ids = old_hash.index.difference(new_hash.index)
+    common = new_hash.index.intersection(old_hash.index)
+    changed_ids = common[old_hash[common].to_numpy() != new_hash[common].to_numpy()]
+
+    # 只对哈希不同的行逐列比较；NaN 与 NaN 视为相等
+    columns = [c for c in new.columns if c in old.columns and c != ID_COLUMN]
+    before = old.set_index(ID_COLUMN).loc[changed_ids, columns]
+    after = new.set_index(ID_COLUMN).loc[changed_ids, columns]
+    differs = (before != after) & ~(before.isna() & after.isna())
+    rows, cols = np.nonzero(differs.to_numpy())
+    changes = pd.DataFrame(
+        {
+            ID_COLUMN: changed_ids[rows],
+            "Column": np.asarray(columns, dtype=object)[cols],
+            "Old": before.to_numpy()[rows, cols],
+            "New": after.to_numpy()[rows, cols],
+        }
+    )
+
+    old_headlines, new_headlines = headline_aggregates(old), headline_aggregates(new)
+    headlines = pd.DataFrame(
+        {"Old": old_headlines, "New": new_headlines.reindex(old_headlines.index)}
+    )
+    headlines["Change"] = headlines["New"] - headlines["Old"]
+
+    return {
+        "added": new[new[ID_COLUMN].isin(added_ids)],
+        "removed": old[old[ID_COLUMN].isin(removed_ids)],
+        "changes": changes,
+        "headlines": headlines.reset_index(),
+        "duplicate_ids": duplicate_ids,
+    }
+
+
+if __name__ == "__main__":
+    print(save_snapshot(sys.argv[1] if len(sys.argv) > 1 else "security_incidents.csv"))
@@ -1,10 +1,30 @@
 # streamlit_app.py
+import os
+from functools import partial
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
 import plotly.express as px
 
+from aggregates import fetch_rows
+from dataset import Dataset, remove_version_files
+from dedup import MAX_DAYS_APART, MAX_KM_APART
+from figures import geo_drilldown, organization_types, risk_map
+from geography import GEO_LEVELS
+from organizations import ORG_TYPES
+from patterns import association_rules, frequent_itemsets, itemset_frame
+from refresh import DataRefresher
+from risk import HALF_LIFE_YEARS, RESOLUTIONS
+from sharedcache import open_cache
+from similarity import CATEGORICAL_COLUMNS
+from snapshots import diff_snapshots, list_snapshots, load_row_hashes, load_snapshot
+from timeindex import TIME_DIMENSIONS, TIME_MEASURES, compare_periods
+from victims import HARM_LABELS
+
+DATA_PATH = "security_incidents.csv"
+
+# 流式模式：不把整个 CSV 读入内存，各章节只读取分块构建的聚合立方体
+STREAMING = os.environ.get("DASHBOARD_STREAMING") == "1"
 
 # 设置网页样式
 st.set_page_config(
@@ -12,13 +32,82 @@ st.set_page_config(
 )
 
 
-# 加载数据（自动缓存）
+# 多副本部署时的共享缓存层（如 DASHBOARD_CACHE=redis://cache:6379/0），未配置则各自计算
+SHARED_CACHE_URL = os.environ.get("DASHBOARD_CACHE")
+# 共享缓存值的签名密钥（各副本相同），网络后端必须配置，见 sharedcache.py 中的信任边界说明
+SHARED_CACHE_SECRET = os.environ.get("DASHBOARD_CACHE_SECRET")
+
+
+# 数据版本：当前版本服务所有会话，CSV 变化后在后台构建新版本并原子替换；
+# 旧版本退役后删除其文本存储与索引文件
+@st.cache_resource
+def start_refresher():
+    cache = open_cache(SHARED_CACHE_URL, SHARED_CACHE_SECRET)
+    return DataRefresher(
+        DATA_PATH,
+        partial(Dataset, streaming=STREAMING, cache=cache),
+        retire=remove_version_files,
+    )
+
+
+# 模式挖掘：垂直位集随数据版本构建，挖掘结果按数据版本与筛选条件缓存
+@st.cache_data
+def mine_patterns(
+    data_version,
+    countries,
+    years,
+    min_support,
+    max_length,
+    exclude_duplicates,
+    _bitsets,
+    _keys,
+):
+    mask = _keys["Year"].between(*years).to_numpy()
+    if exclude_duplicates:
+        mask = mask & ~_keys["Duplicate"].to_numpy()
+    if countries:
+        mask = mask & _keys["Country"].isin(countries).to_numpy()
+    bitsets = _bitsets.restrict(mask)
+    itemsets = frequent_itemsets(bitsets, min_support, max_length)
+    return (
+        itemset_frame(itemsets, bitsets.n),
+        association_rules(itemsets, bitsets.n),
+        bitsets.n,
+    )
+
+
+# 明细行按需读取（仅用于下钻）
+@st.cache_data
+def fetch_incidents(data_version, incident_ids):
+    return fetch_rows(DATA_PATH, incident_ids)
+
+
+# 两个数据版本的差异（快照名或当前数据），按版本对缓存
 @st.cache_data
-def load_data():
-    return pd.read_csv("security_incidents.csv")
+def compare_versions(old_name, new_name, data_version, _df, _store):
+    def resolve(name):
+        if name == data_version:
+            return _store.join(_df), None
+        return load_snapshot(name), load_row_hashes(name)
+
+    old, old_hash = resolve(old_name)
+    new, new_hash = resolve(new_name)
+    return diff_snapshots(old, new, old_hash, new_hash)
+
+
+refresher = start_refresher()
+refresher.check()
+# 本次重跑只读取这一个版本；后台替换不会影响正在进行的重跑
+dataset = refresher.current
+df = dataset.df
+data_version = dataset.version
+text_store = dataset.text_store
+validation_report = dataset.validation_report
+
 
+def section_figures(section):
+    return warmup.result(section)
 
-df = load_data()
 
 # 侧边导航栏
 st.sidebar.title("📌 Navigation")
@@ -28,13 +117,58 @@ section = st.sidebar.radio(
         "🏁 Introduction",
         "📅 Yearly Trends",
         "🌍 Geographic Patterns",
+        "🔥 Risk Surface",
         "⚔️ Attack Types",
+        "🧩 Incident Patterns",
         "🧍‍♂️ Victim Profiles",
         "🧨 Perpetrator Analysis",
         "📅 Time & Cross Analysis",
-        "✅ Conclusion & Recommendations"
+        "🏢 Organization Types",
+        "✅ Conclusion & Recommendations",
+        "🔀 Snapshot Comparison",
+        "🔎 Similar Incidents",
+        "🩺 Data Diagnostics",
     ],
 )
+# 图表口径：包含或排除疑似重复事件（每组重复只保留 Incident ID 最小的一条）
+exclude_duplicates = st.sidebar.toggle(
+    f"Exclude {len(dataset.duplicates)} suspected duplicates",
+    help="Incidents whose Details text, date, country and coordinates nearly "
+    "match an earlier record. See Data Diagnostics for the pairs.",
+)
+view = dataset.view(exclude_duplicates)
+cubes = view.cubes
+victim_tensor = view.victim_tensor
+time_indexes = view.time_indexes
+warmup = view.warmup
+warmup.prioritize(section)
+warmed, total = warmup.progress()
+st.sidebar.progress(warmed / total, text=f"Warm-up: {warmed}/{total} sections ready")
+st.sidebar.caption(
+    f"Data version `{data_version}` · "
+    f"{validation_report['Violations'].gt(0).sum()} data-quality rules flagged"
+)
+# 数据刷新状态：当前版本的构建耗时与时间、后台构建进度、仍被会话引用的旧版本
+refreshed_at = pd.Timestamp(refresher.refreshed_at, unit="s").strftime("%Y-%m-%d %H:%M")
+st.sidebar.caption(
+    f"Loaded {refreshed_at} UTC in {refresher.refresh_seconds:.1f}s"
+    + (
+        f" · {len(old_versions)} older version(s) still in use"
+        if (old_versions := refresher.live_versions())
+        else ""
+    )
+)
+if refresher.refreshing:
+    st.sidebar.caption("🔄 Building a new data version in the background…")
+elif refresher.error is not None:
+    st.sidebar.warning(f"⚠️ Last refresh failed: {refresher.error}")
+if st.sidebar.button("Check for new data"):
+    refresher.check(force=True)
+    st.rerun()
+# 本会话上次看到的版本已被替换时提示一次
+if st.session_state.get("data_version") not in (None, data_version):
+    st.toast(f"🔄 Data updated to version {data_version}")
+st.session_state["data_version"] = data_version
 
 # ---------------------------
 # 🏁 SECTION: INTRODUCTION
@@ -85,8 +219,7 @@ if section == "🏁 Introduction":
 # 📅 SECTION: YEARLY TRENDS (增强 & 丰富版)
 # ---------------------------
 elif section == "📅 Yearly Trends":
-    import plotly.graph_objects as go
-    import plotly.express as px
+    figs = section_figures(section)
 
     st.header("📅 How Have Security Incidents Evolved Over Time?")
     st.markdown(
@@ -100,27 +233,7 @@ elif section == "📅 Yearly Trends":
 
     # ① 事件数量趋势图（交互折线图）
     st.subheader("🧮 Total Incidents per Year")
-    yearly_counts = df["Year"].value_counts().sort_index()
-
-    fig1 = go.Figure()
-    fig1.add_trace(
-        go.Scatter(
-            x=yearly_counts.index,
-            y=yearly_counts.values,
-            mode="lines+markers",
-            line=dict(color="#2a9d8f"),
-            marker=dict(size=6),
-            hovertemplate="Year: %{x}<br>Incidents: %{y}<extra></extra>",
-        )
-    )
-    fig1.update_layout(
-        title="Number of Incidents per Year (1997–2025)",
-        xaxis_title="Year",
-        yaxis_title="Number of Incidents",
-        height=400,
-        template="simple_white",
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    st.plotly_chart(figs["incidents"], use_container_width=True)
 
     st.markdown(
         """
@@ -132,24 +245,7 @@ elif section == "📅 Yearly Trends":
 
     # ② 严重性：死亡 / 受伤 / 绑架趋势
     st.subheader("☠️ Deaths, Wounds, and Kidnappings per Year")
-    severity_year = (
-        df.groupby("Year")[["Total killed", "Total wounded", "Total kidnapped"]]
-        .sum()
-        .reset_index()
-    )
-
-    fig2 = px.bar(
-        severity_year,
-        x="Year",
-        y=["Total killed", "Total wounded", "Total kidnapped"],
-        title="Severity of Incidents by Year",
-        labels={"value": "People", "variable": "Outcome"},
-        color_discrete_sequence=["#e63946", "#f4a261", "#457b9d"],
-    )
-    fig2.update_layout(
-        barmode="stack", height=450, xaxis_title="Year", yaxis_title="Total Victims"
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    st.plotly_chart(figs["severity"], use_container_width=True)
 
     st.markdown(
         """
@@ -161,30 +257,7 @@ elif section == "📅 Yearly Trends":
 
     # ③ 每年总受害人趋势（合计线图）
     st.subheader("📊 Total Victims per Year (Killed + Wounded + Kidnapped)")
-    severity_year["Total victims"] = (
-        severity_year["Total killed"]
-        + severity_year["Total wounded"]
-        + severity_year["Total kidnapped"]
-    )
-
-    fig3 = go.Figure()
-    fig3.add_trace(
-        go.Scatter(
-            x=severity_year["Year"],
-            y=severity_year["Total victims"],
-            mode="lines+markers",
-            line=dict(color="#1d3557"),
-            hovertemplate="Year: %{x}<br>Total Victims: %{y}<extra></extra>",
-        )
-    )
-    fig3.update_layout(
-        title="Combined Human Impact per Year",
-        xaxis_title="Year",
-        yaxis_title="Total Victims",
-        height=400,
-        template="simple_white",
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    st.plotly_chart(figs["victims"], use_container_width=True)
 
     st.markdown(
         """
@@ -194,6 +267,66 @@ elif section == "📅 Yearly Trends":
         """
     )
 
+    # ④ 两个时期对比：前缀和索引，任意区间两次查找即可得到合计
+    st.subheader("⚖️ Compare Two Periods")
+    st.markdown(
+        """
+        Periods of different length are compared by their **yearly average**, so a short recent window can be set against a long historical one.
+        """
+    )
+    year_min, year_max = view.years
+    col1, col2, col3 = st.columns(3)
+    first = col1.slider("First period:", year_min, year_max, (2000, 2012))
+    second = col2.slider("Second period:", year_min, year_max, (2013, 2020))
+    breakdown = col3.selectbox("Break down by:", ["Overall"] + TIME_DIMENSIONS)
+    index = time_indexes[None if breakdown == "Overall" else breakdown]
+    periods = compare_periods(index, first, second)
+
+    overall = compare_periods(time_indexes[None], first, second)
+    # 时期超出数据覆盖范围（如当年只有前几个月的数据）时，按实际覆盖的月数折算
+    partial_periods = [
+        f"{start}–{end}: {months} of {(end - start + 1) * 12} months"
+        for (start, end), months in [
+            (first, overall["first_months"]),
+            (second, overall["second_months"]),
+        ]
+        if months < (end - start + 1) * 12
+    ]
+    if partial_periods:
+        st.caption(
+            "Yearly averages count only the months covered by the data ("
+            + "; ".join(partial_periods)
+            + ")."
+        )
+    columns = st.columns(len(TIME_MEASURES))
+    for col, measure in zip(columns, TIME_MEASURES):
+        before = overall["first_rate"].loc["All", measure]
+        after = overall["second_rate"].loc["All", measure]
+        col.metric(
+            f"{measure} per year",
+            f"{after:,.1f}",
+            f"{overall['change'].loc['All', measure]:+.0%}" if before else None,
+        )
+
+    if breakdown != "Overall":
+        measure = st.selectbox("Measure:", TIME_MEASURES)
+        table = pd.DataFrame(
+            {
+                f"{first[0]}–{first[1]} per year": periods["first_rate"][measure],
+                f"{second[0]}–{second[1]} per year": periods["second_rate"][measure],
+                "Change": periods["change"][measure],
+            }
+        )
+        table = table[table.iloc[:, :2].sum(axis=1) > 0]
+        table = table.sort_values(table.columns[1], ascending=False)
+        st.dataframe(
+            table.round(2),
+            use_container_width=True,
+            column_config={
+                "Change": st.column_config.NumberColumn(format="percent"),
+            },
+        )
+
 
 # ---------------------------
 # # 🌍 SECTION: GEOGRAPHIC PATTERNS
@@ -283,8 +416,7 @@ elif section == "📅 Yearly Trends":
 # 🌍 SECTION: GEOGRAPHIC PATTERNS (最终整合 + Data Storytelling)
 # ---------------------------
 elif section == "🌍 Geographic Patterns":
-    import plotly.express as px
-    import matplotlib.pyplot as plt
+    figs = section_figures(section)
 
     st.header("🌍 Which Countries and Regions Are Most Affected?")
     st.markdown(
@@ -300,23 +432,9 @@ elif section == "🌍 Geographic Patterns":
     # 📊 Top 10 Static Bar Chart
     # ======================
     st.subheader("📊 Top 10 Countries by Incident Count")
-    top10_countries = df["Country"].dropna().value_counts().head(10)
-
     left, center, right = st.columns([1, 4, 1])
     with center:
-        fig_static, ax = plt.subplots(figsize=(8, 4.5))
-        top10_countries.sort_values().plot(kind="barh", ax=ax, color="#e76f51")
-        ax.set_title(
-            "Top 10 Most Affected Countries", fontsize=14, fontweight="bold", pad=10
-        )
-        ax.set_xlabel("Number of Incidents")
-        ax.set_ylabel("Country")
-        ax.grid(True, linestyle="--", alpha=0.4)
-        fig_static.patch.set_facecolor("white")
-        ax.set_facecolor("#f9f9f9")
-        for i, v in enumerate(top10_countries.sort_values()):
-            ax.text(v + 1, i, str(v), va="center", fontsize=9)
-        st.pyplot(fig_static)
+        st.pyplot(figs["top10"])
 
     st.markdown(
         """
@@ -332,22 +450,7 @@ elif section == "🌍 Geographic Patterns":
     # 📈 Incident Trends by Country Over Time
     # ======================
     st.subheader("📈 Incident Trends in Top Countries Over Time")
-    top_countries = df["Country"].value_counts().head(6).index.tolist()
-    df_top = df[df["Country"].isin(top_countries)]
-    country_year = (
-        df_top.groupby(["Year", "Country"]).size().reset_index(name="Incidents")
-    )
-
-    fig_trend = px.line(
-        country_year,
-        x="Year",
-        y="Incidents",
-        color="Country",
-        markers=True,
-        title="Incident Trends Over Time in Most Affected Countries",
-    )
-    fig_trend.update_layout(height=450, template="simple_white")
-    st.plotly_chart(fig_trend, use_container_width=True)
+    st.plotly_chart(figs["trend"], use_container_width=True)
 
     st.markdown(
         """
@@ -365,21 +468,8 @@ elif section == "🌍 Geographic Patterns":
     # 🌐 Regional Distribution
     # ======================
     st.subheader("🌐 Regional Distribution of Incidents")
-    if "Region" in df.columns:
-        region_counts = df["Region"].dropna().value_counts().reset_index()
-        region_counts.columns = ["Region", "Incidents"]
-
-        fig_region = px.bar(
-            region_counts.sort_values("Incidents", ascending=True),
-            x="Incidents",
-            y="Region",
-            orientation="h",
-            color="Incidents",
-            color_continuous_scale="Blues",
-            title="Total Incidents by Region",
-        )
-        fig_region.update_layout(height=450)
-        st.plotly_chart(fig_region, use_container_width=True)
+    if figs["region"] is not None:
+        st.plotly_chart(figs["region"], use_container_width=True)
 
         st.markdown(
             """
@@ -396,29 +486,33 @@ elif section == "🌍 Geographic Patterns":
         )
 
     # ======================
-    # 🗺️ Interactive World Map
+    # 🧭 Drill-Down: Country → Region → District → City
     # ======================
-    st.subheader("🗺️ Interactive World Map of Incidents")
-
-    country_counts = df["Country"].dropna().value_counts().reset_index()
-    country_counts.columns = ["Country", "Incident Count"]
-
-    fig_map = px.choropleth(
-        country_counts,
-        locations="Country",
-        locationmode="country names",
-        color="Incident Count",
-        hover_name="Country",
-        color_continuous_scale="Reds",
-        title="Total Incidents by Country (1997–2025)",
+    st.subheader("🧭 Drill Down from Country to City")
+    st.markdown(
+        """
+        Hotspots rarely cover a whole country. Pick a country, then a region and a district, to see **where inside it** incidents concentrate.
+        Tiles are sized by the number of incidents and shaded by how deadly they were on average.
+        """
     )
 
-    fig_map.update_layout(
-        margin=dict(l=40, r=40, t=50, b=40),
-        geo=dict(showframe=False, showcoastlines=True),
-        height=500,
-    )
-    st.plotly_chart(fig_map, use_container_width=True)
+    geo_rollup = view.geo_rollup
+    path = []
+    columns = st.columns(len(GEO_LEVELS) - 1)
+    for level, col in zip(GEO_LEVELS, columns):
+        options = ["All"] + list(geo_rollup.children(path).index)
+        choice = col.selectbox(f"{level}:", options, key=f"geo_{level}")
+        if choice == "All":
+            break
+        path.append(choice)
+
+    st.plotly_chart(geo_drilldown(geo_rollup, path), use_container_width=True)
+
+    # ======================
+    # 🗺️ Interactive World Map
+    # ======================
+    st.subheader("🗺️ Interactive World Map of Incidents")
+    st.plotly_chart(figs["map"], use_container_width=True)
 
     st.markdown(
         """
@@ -431,10 +525,94 @@ elif section == "🌍 Geographic Patterns":
         Together, these visuals provide a compelling geographic story of where humanitarian work is most at risk — and why that matters.
         """
     )
+elif section == "🔥 Risk Surface":
+    st.header("🔥 Where Is It Riskiest Right Now?")
+    st.markdown(
+        f"""
+        Country totals hide how risk is distributed on the ground, and incidents from twenty years ago say little about today.
+        The **risk surface** spreads every incident over its surroundings, weighs it by **severity** (killed > kidnapped > wounded) and lets it **fade with age** — an incident counts half as much every {HALF_LIFE_YEARS:g} years.
+
+        Scores run from **0** to **100**, relative to the riskiest grid cell.
+        """
+    )
+
+    surfaces = view.risk_surfaces
+    resolution = st.select_slider(
+        "Grid size (degrees):",
+        options=RESOLUTIONS,
+        value=1.0,
+        format_func=lambda r: f"{r:g}°",
+    )
+    surface = surfaces[resolution]
+    if surface.empty:
+        st.info("ℹ️ No incidents with coordinates in this view, so every score is 0.")
+    else:
+        st.plotly_chart(risk_map(surface), use_container_width=True)
+
+    st.markdown(
+        """
+        - The surface highlights **current** hotspots: places where violence was intense years ago but has since subsided fade out, while recent escalations stand out.
+        - The **Gaza Strip** dominates the surface: the 2023–2024 escalation was both recent and exceptionally deadly for aid workers.
+        - Finer grids separate neighbouring hotspots (for example, individual provinces of Afghanistan or states of Sudan); coarser grids give a steadier regional picture.
+        """
+    )
+
+    # ======================
+    # 📍 Score Sites and Routes
+    # ======================
+    st.subheader("📍 Score Planned Sites and Routes")
+    st.markdown(
+        """
+        Upload a CSV with `Latitude` and `Longitude` columns to score planned sites.
+        Add a `Route` column (points listed in travel order) to get the **mean** and **peak** risk along each route instead.
+        """
+    )
+
+    col1, col2 = st.columns(2)
+    lat = col1.number_input("Latitude", -90.0, 90.0, 34.53, format="%.4f")
+    lon = col2.number_input("Longitude", -180.0, 180.0, 69.17, format="%.4f")
+    st.metric("Risk score at this location", f"{surface.score(lat, lon).item():.1f}")
+
+    upload = st.file_uploader("Sites or routes (CSV)", type="csv")
+    if upload is not None:
+        planned = pd.read_csv(upload)
+        if not {"Latitude", "Longitude"} <= set(planned.columns):
+            st.error("❌ The file needs `Latitude` and `Longitude` columns.")
+        else:
+            # 空坐标行直接跳过；有值却不是合法坐标（非数字、纬度越界）的行提示用户是哪几行
+            coordinates = planned[["Latitude", "Longitude"]].apply(
+                pd.to_numeric, errors="coerce"
+            )
+            valid = coordinates.notna().all(axis=1) & coordinates["Latitude"].between(
+                -90, 90
+            )
+            present = planned[["Latitude", "Longitude"]].notna().all(axis=1)
+            invalid = planned.index[present & ~valid]
+            if len(invalid):
+                lines = ", ".join(str(i + 2) for i in invalid[:10])
+                st.warning(
+                    f"⚠️ Skipped {len(invalid)} rows whose Latitude or Longitude "
+                    f"is not a valid coordinate (CSV lines {lines}"
+                    f"{', …' if len(invalid) > 10 else ''})."
+                )
+            planned = planned[valid].assign(**coordinates[valid])
+            if planned.empty:
+                st.error("❌ No rows with valid coordinates to score.")
+            else:
+                if "Route" in planned.columns:
+                    scored = surface.score_routes(planned)
+                else:
+                    scored = surface.score_sites(planned)
+                st.dataframe(scored, use_container_width=True, hide_index=True)
+                st.download_button(
+                    "⬇️ Download scores",
+                    scored.to_csv(index=False),
+                    file_name="risk_scores.csv",
+                    mime="text/csv",
+                )
+
 elif section == "⚔️ Attack Types":
-    import pandas as pd
-    import plotly.express as px
-    import plotly.graph_objects as go
+    figs = section_figures(section)
 
     st.header("\u2694\ufe0f What Types of Attacks Are Most Common?")
     st.markdown(
@@ -449,20 +627,7 @@ elif section == "⚔️ Attack Types":
     # 📊 Top 10 Attack Methods
     # ======================
     st.subheader("📊 Most Common Means of Attack")
-
-    means_counts = df["Means of attack"].dropna().value_counts().head(10).reset_index()
-    means_counts.columns = ["Means of Attack", "Count"]
-
-    fig1 = px.bar(
-        means_counts.sort_values("Count", ascending=True),
-        x="Count",
-        y="Means of Attack",
-        orientation="h",
-        color="Count",
-        color_continuous_scale="Oranges",
-        title="Top 10 Attack Methods",
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    st.plotly_chart(figs["top10"], use_container_width=True)
 
     st.markdown(
         """
@@ -484,32 +649,7 @@ Understanding these patterns helps humanitarian groups **tailor protection train
     # 📌 Grouped Bar: Attack × Location
     # ======================
     st.subheader("📌 Attack Methods by Location Type")
-
-    top_means = df["Means of attack"].value_counts().head(6).index.tolist()
-    df_filtered = df[df["Means of attack"].isin(top_means)]
-    grouped = (
-        df_filtered.groupby(["Means of attack", "Location"])
-        .size()
-        .reset_index(name="Count")
-    )
-
-    fig2 = px.bar(
-        grouped,
-        x="Means of attack",
-        y="Count",
-        color="Location",
-        barmode="group",
-        title="Top Attack Methods Across Locations",
-        height=450,
-        color_discrete_sequence=px.colors.qualitative.Set2,
-    )
-
-    fig2.update_layout(
-        xaxis_title="Means of Attack",
-        yaxis_title="Number of Incidents",
-        legend_title="Location Type",
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    st.plotly_chart(figs["by_location"], use_container_width=True)
 
     st.markdown(
         """
@@ -531,27 +671,7 @@ By pairing methods with location types, we uncover **attack profiles** that aid
     # 🧱 Treemap View: Attack Method × Location
     # ======================
     st.subheader("🧱 Treemap: Attack Methods and Locations")
-
-    df_tree = df[df["Means of attack"].isin(top_means)][
-        ["Means of attack", "Location"]
-    ].dropna()
-    tree_data = (
-        df_tree.groupby(["Means of attack", "Location"])
-        .size()
-        .reset_index(name="Count")
-    )
-
-    fig_tree = px.treemap(
-        tree_data,
-        path=["Means of attack", "Location"],
-        values="Count",
-        color="Means of attack",
-        color_discrete_sequence=px.colors.qualitative.Set2,
-        title="Attack Methods and Locations (Treemap)",
-    )
-
-    fig_tree.update_layout(height=500, margin=dict(t=40, l=0, r=0, b=10))
-    st.plotly_chart(fig_tree, use_container_width=True)
+    st.plotly_chart(figs["treemap"], use_container_width=True)
 
     st.markdown(
         """
@@ -571,22 +691,7 @@ Unlike a single bar or pie chart, this layout allows us to compare **both preval
     # 📈 Attack Methods Over Time
     # ======================
     st.subheader("📈 How Have Attack Methods Changed Over Time?")
-
-    year_attack = (
-        df.groupby(["Year", "Means of attack"]).size().reset_index(name="Count")
-    )
-    year_attack_filtered = year_attack[year_attack["Means of attack"].isin(top_means)]
-
-    fig4 = px.area(
-        year_attack_filtered,
-        x="Year",
-        y="Count",
-        color="Means of attack",
-        title="Trends of Attack Methods Over Time",
-        groupnorm="fraction",
-        height=450,
-    )
-    st.plotly_chart(fig4, use_container_width=True)
+    st.plotly_chart(figs["over_time"], use_container_width=True)
 
     st.markdown(
         """
@@ -601,73 +706,131 @@ This timeline shows how **attack methods have shifted** from 1997 to 2025. Early
 These trends offer more than historical insight — they support **predictive awareness**. Field teams can monitor which methods are rising in frequency and **adjust field protocols accordingly**, ensuring both preparation and adaptability.
         """
     )
-elif section == "🧍‍♂️ Victim Profiles":
-    import plotly.express as px
-    import pandas as pd
-
-    st.header("🧍 Who Are the Victims?")
+elif section == "🧩 Incident Patterns":
+    st.header("🧩 Which Circumstances Tend to Occur Together?")
     st.markdown(
         """
-        Understanding who is most vulnerable in humanitarian settings is critical for building effective protection strategies.  
-        This section explores **which aid workers are most at risk**, and how **different types of harm** have affected them **over time and across regions**.
+        Attack methods, settings, perpetrators, motives and the organizations targeted are not independent of each other.
+        This section mines the incident records for **combinations that occur frequently** and for **association rules** such as *"kidnappings on roads by non-state armed groups tend to involve international staff"*.
+
+        - **Support**: share of incidents that contain the whole combination.
+        - **Confidence**: among incidents matching the left-hand side, the share that also match the right-hand side.
+        - **Lift**: how much more likely the right-hand side becomes given the left-hand side (above 1 means they go together more often than chance).
+
+        Values recorded as *Unknown* are left out.
         """
     )
 
-    # 统计汇总
-    national = df["Total nationals"].fillna(0).astype(int).sum()
-    international = df["Total internationals"].fillna(0).astype(int).sum()
-    killed = df["Total killed"].fillna(0).astype(int).sum()
-    wounded = df["Total wounded"].fillna(0).astype(int).sum()
-    kidnapped = df["Total kidnapped"].fillna(0).astype(int).sum()
-
-    yearly = (
-        df.groupby("Year")[["Total killed", "Total wounded", "Total kidnapped"]]
-        .sum()
-        .reset_index()
+    year_min, year_max = view.years
+    col1, col2 = st.columns(2)
+    countries = col1.multiselect(
+        "Countries (all if empty):", dataset.category_options["Country"]
     )
+    years = col2.slider("Years:", year_min, year_max, (year_min, year_max))
+    col1, col2, col3 = st.columns(3)
+    min_support = col1.slider("Minimum support (%):", 0.5, 20.0, 1.0, 0.5) / 100
+    min_confidence = col2.slider("Minimum confidence (%):", 0, 100, 20, 5) / 100
+    max_length = col3.slider("Maximum items per pattern:", 2, 5, 4)
 
-    # Top 5 countries
-    country_victims = df.groupby("Country")[
-        ["Total killed", "Total wounded", "Total kidnapped"]
-    ].sum()
-    country_victims["Total"] = country_victims.sum(axis=1)
-    top_countries = (
-        country_victims.sort_values("Total", ascending=False).head(5).reset_index()
+    itemsets, rules, n = mine_patterns(
+        data_version,
+        tuple(countries),
+        years,
+        min_support,
+        max_length,
+        exclude_duplicates,
+        dataset.item_bitsets,
+        dataset.pattern_keys,
     )
-    top_countries_melted = top_countries.melt(
-        id_vars="Country",
-        value_vars=["Total killed", "Total wounded", "Total kidnapped"],
-        var_name="Type",
-        value_name="Count",
+
+    if n == 0:
+        st.info("ℹ️ No incidents match these filters.")
+    else:
+        # ======================
+        # 🔗 Association Rules
+        # ======================
+        st.subheader("🔗 Association Rules")
+        consequents = sorted(rules["Consequent"].unique())
+        col1, col2 = st.columns(2)
+        consequent = col1.selectbox(
+            "Right-hand side:",
+            ["Any"] + consequents,
+            index=(
+                consequents.index("Victims=International") + 1
+                if "Victims=International" in consequents
+                else 0
+            ),
+        )
+        contains = col2.multiselect(
+            "Left-hand side contains:",
+            sorted(itemsets.loc[itemsets["Length"] == 1, "Items"]),
+        )
+        shown = rules[rules["Confidence"] >= min_confidence]
+        if consequent != "Any":
+            shown = shown[shown["Consequent"] == consequent]
+        if contains:
+            wanted = set(contains)
+            shown = shown[
+                shown["Antecedent"]
+                .str.split(" + ", regex=False)
+                .map(lambda items: wanted <= set(items))
+                .astype(bool)
+            ]
+
+        st.caption(f"{len(shown):,} rules over {n:,} incidents")
+        st.dataframe(
+            shown.head(200),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Support": st.column_config.NumberColumn(format="%.1%%"),
+                "Confidence": st.column_config.ProgressColumn(
+                    min_value=0.0, max_value=1.0, format="%.2f"
+                ),
+                "Lift": st.column_config.NumberColumn(format="%.2f"),
+            },
+        )
+
+        # ======================
+        # 📦 Frequent Combinations
+        # ======================
+        st.subheader("📦 Most Frequent Combinations")
+        combos = itemsets[itemsets["Length"] >= 2].head(15)
+        fig = px.bar(
+            combos.sort_values("Incidents"),
+            x="Incidents",
+            y="Items",
+            orientation="h",
+            color="Length",
+            color_continuous_scale="Teal",
+            title="Most Frequent Multi-Attribute Combinations",
+        )
+        fig.update_layout(height=550, yaxis_title="")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown(
+            """
+            - **International victims** are strongly associated with **ICRC** and **INGO** incidents and with **politically motivated kidnappings** — international staff are more often targeted for leverage than for opportunistic gain.
+            - **National staff** appear in the vast majority of incidents, so rules pointing to national victims have high confidence but lift close to 1: they describe the baseline rather than a specific risk.
+            - Filter by country and period to check whether a pattern is **global** or driven by one context.
+            """
+        )
+
+elif section == "🧍‍♂️ Victim Profiles":
+    figs = section_figures(section)
+    national, international = figs["national"], figs["international"]
+
+    st.header("🧍 Who Are the Victims?")
+    st.markdown(
+        """
+        Understanding who is most vulnerable in humanitarian settings is critical for building effective protection strategies.  
+        This section explores **which aid workers are most at risk**, and how **different types of harm** have affected them **over time and across regions**.
+        """
     )
 
     # 1️⃣ National vs International
     st.subheader("👥 National vs International Staff")
-    staff_df = pd.DataFrame(
-        {
-            "Type": ["National Staff", "International Staff"],
-            "Count": [national, international],
-        }
-    )
-
-    fig_donut = px.pie(
-        staff_df,
-        names="Type",
-        values="Count",
-        hole=0.4,
-        color_discrete_sequence=["#66c2a5", "#fc8d62"],
-    )
-    fig_donut.update_traces(
-        textinfo="percent+label",
-        pull=[0.03, 0],
-        marker=dict(line=dict(color="white", width=2)),
-    )
-    fig_donut.update_layout(
-        title=dict(text="Victim Composition by Staff Type", x=0.5, font=dict(size=18)),
-        showlegend=False,
-        height=400,
-    )
-    st.plotly_chart(fig_donut, use_container_width=True)
+    st.plotly_chart(figs["staff"], use_container_width=True)
 
     st.markdown(
         f"""
@@ -685,24 +848,7 @@ elif section == "🧍‍♂️ Victim Profiles":
     )
 
     if view_option == "📊 Total Count View":
-        fig_bar = px.bar(
-            x=["Killed", "Wounded", "Kidnapped"],
-            y=[killed, wounded, kidnapped],
-            color=["Killed", "Wounded", "Kidnapped"],
-            text=[killed, wounded, kidnapped],
-            color_discrete_sequence=["#d62728", "#1f77b4", "#2ca02c"],
-        )
-        fig_bar.update_traces(textposition="outside", marker_line_color="white")
-        fig_bar.update_layout(
-            title=dict(
-                text="Total Number of Victims by Type", x=0.5, font=dict(size=20)
-            ),
-            yaxis_title="Number of Victims",
-            xaxis_title="Victim Type",
-            showlegend=False,
-            height=450,
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        st.plotly_chart(figs["totals"], use_container_width=True)
 
         st.markdown(
             """
@@ -712,48 +858,7 @@ elif section == "🧍‍♂️ Victim Profiles":
         )
 
     else:
-        # 构造比例图数据
-        harm_fields = {
-            "Killed": ["Nationals killed", "Internationals killed"],
-            "Wounded": ["Nationals wounded", "Internationals wounded"],
-            "Kidnapped": ["Nationals kidnapped", "Internationals kidnapped"],
-        }
-
-        data = {"Harm Type": [], "Staff Type": [], "Count": []}
-        for harm, (nat_col, int_col) in harm_fields.items():
-            nat_count = df[nat_col].fillna(0).astype(int).sum()
-            int_count = df[int_col].fillna(0).astype(int).sum()
-            data["Harm Type"] += [harm, harm]
-            data["Staff Type"] += ["National", "International"]
-            data["Count"] += [nat_count, int_count]
-
-        df_stacked = pd.DataFrame(data)
-        df_stacked["Percentage"] = df_stacked.groupby("Harm Type")["Count"].transform(
-            lambda x: x / x.sum() * 100
-        )
-
-        fig_pct = px.bar(
-            df_stacked,
-            x="Harm Type",
-            y="Percentage",
-            color="Staff Type",
-            barmode="stack",
-            text=df_stacked["Percentage"].round(1).astype(str) + "%",
-            color_discrete_sequence=["#66c2a5", "#fc8d62"],
-        )
-        fig_pct.update_layout(
-            title=dict(
-                text="Relative Victim Composition by Staff Type",
-                x=0.5,
-                font=dict(size=20),
-            ),
-            yaxis_title="Percentage (%)",
-            xaxis_title="Harm Type",
-            legend=dict(orientation="h", x=0.5, xanchor="center", y=1.05),
-            height=450,
-        )
-        fig_pct.update_traces(textposition="inside")
-        st.plotly_chart(fig_pct, use_container_width=True)
+        st.plotly_chart(figs["proportions"], use_container_width=True)
 
         st.markdown(
             """
@@ -765,24 +870,7 @@ elif section == "🧍‍♂️ Victim Profiles":
 
     # 3️⃣ Trends Over Time
     st.subheader("📈 Trends Over Time (by Harm Type)")
-
-    fig_line = px.line(
-        yearly,
-        x="Year",
-        y=["Total killed", "Total wounded", "Total kidnapped"],
-        markers=True,
-        line_shape="spline",
-        color_discrete_map={
-            "Total killed": "#d62728",
-            "Total wounded": "#1f77b4",
-            "Total kidnapped": "#2ca02c",
-        },
-        title="Victim Harm Types Over Time",
-    )
-    fig_line.update_layout(
-        yaxis_title="Number of Victims", legend_title="Harm Type", height=450
-    )
-    st.plotly_chart(fig_line, use_container_width=True)
+    st.plotly_chart(figs["over_time"], use_container_width=True)
 
     st.markdown(
         """
@@ -794,24 +882,7 @@ elif section == "🧍‍♂️ Victim Profiles":
 
     # 4️⃣ 国家分布
     st.subheader("🌍 Top 5 Countries by Harm Type")
-
-    fig_country = px.bar(
-        top_countries_melted,
-        x="Count",
-        y="Country",
-        color="Type",
-        orientation="h",
-        barmode="group",
-        title="Top 5 Countries: Victim Breakdown by Harm Type",
-        color_discrete_sequence=px.colors.qualitative.Pastel,
-    )
-    fig_country.update_layout(
-        height=500,
-        xaxis_title="Number of Victims",
-        yaxis_title="Country",
-        legend_title="Type of Harm",
-    )
-    st.plotly_chart(fig_country, use_container_width=True)
+    st.plotly_chart(figs["top_countries"], use_container_width=True)
 
     st.markdown(
         """
@@ -821,7 +892,53 @@ elif section == "🧍‍♂️ Victim Profiles":
         """
     )
 
+    # 5️⃣ 性别分布
+    st.subheader("⚧ Victims by Gender")
+    gender = figs["gender_totals"]
+    known = gender["Male"] + gender["Female"]
+
+    col1, col2 = st.columns([2, 3])
+    with col1:
+        st.plotly_chart(figs["gender"], use_container_width=True)
+    with col2:
+        st.plotly_chart(figs["gender_over_time"], use_container_width=True)
+
+    st.markdown(
+        f"""
+        - Where gender was recorded, **{round(gender["Male"] / known * 100, 1)}%** of victims were **men** and **{round(gender["Female"] / known * 100, 1)}%** were **women**.
+        - Gender is **unknown for {round(gender["Unknown"] / sum(gender.values()) * 100, 1)}%** of all victims, and the share of unrecorded cases rises again in recent years — gender-disaggregated reporting remains a gap.
+        - Women are under-represented among victims relative to their share of the humanitarian workforce, but **specific threats such as sexual violence** are not captured by the totals alone.
+        """
+    )
+
+    # 6️⃣ 自定义分解：任意维度 × 过滤条件，均为张量上的一次归约
+    st.subheader("🔎 Explore Victims by Year, Country or Perpetrator")
+    col1, col2 = st.columns(2)
+    dimension = col1.selectbox("Break down by:", ["Year", "Country", "Actor type"])
+    countries = col2.multiselect(
+        "Limit to countries:", victim_tensor.labels["Country"].tolist()
+    )
+    mask = victim_tensor.mask(Country=countries) if countries else None
+    breakdown = victim_tensor.breakdown_frame(dimension, mask)
+    if dimension != "Year":
+        totals = breakdown.groupby(dimension)["Count"].sum()
+        breakdown = breakdown[breakdown[dimension].isin(totals.nlargest(15).index)]
+    fig_explore = px.bar(
+        breakdown,
+        x=dimension,
+        y="Count",
+        color="Harm Type",
+        pattern_shape="Staff Type",
+        category_orders={"Harm Type": HARM_LABELS},
+        color_discrete_sequence=["#d62728", "#1f77b4", "#2ca02c"],
+        title=f"Victims by {dimension}, Harm Type and Staff Type",
+        height=500,
+    )
+    st.plotly_chart(fig_explore, use_container_width=True)
+
 elif section == "🧨 Perpetrator Analysis":
+    figs = section_figures(section)
+
     st.header("🧨 Who Are the Perpetrators?")
     st.markdown(
         """
@@ -834,19 +951,7 @@ elif section == "🧨 Perpetrator Analysis":
     # 📊 Top Perpetrator Types
     # ======================
     st.subheader("📊 Perpetrator Types")
-    actor_type_counts = df["Actor type"].dropna().value_counts().head(10).reset_index()
-    actor_type_counts.columns = ["Actor Type", "Count"]
-
-    fig1 = px.bar(
-        actor_type_counts,
-        x="Count",
-        y="Actor Type",
-        orientation="h",
-        color="Count",
-        color_continuous_scale="Inferno",
-        title="Top Perpetrator Types",
-    )
-    st.plotly_chart(fig1, use_container_width=True)
+    st.plotly_chart(figs["types"], use_container_width=True)
 
     st.markdown(
         """
@@ -860,30 +965,7 @@ elif section == "🧨 Perpetrator Analysis":
     # 📌 Harm Caused by Actor Type
     # ======================
     st.subheader("📌 Harm Caused by Top Perpetrator Types")
-    top_actors = df["Actor type"].value_counts().head(5).index.tolist()
-    df_top_actors = df[df["Actor type"].isin(top_actors)]
-    harm_grouped = (
-        df_top_actors.groupby("Actor type")[
-            ["Total killed", "Total wounded", "Total kidnapped"]
-        ]
-        .sum()
-        .reset_index()
-    )
-    harm_melted = harm_grouped.melt(
-        id_vars="Actor type", var_name="Harm Type", value_name="Count"
-    )
-
-    fig2 = px.bar(
-        harm_melted,
-        x="Count",
-        y="Actor type",
-        color="Harm Type",
-        barmode="stack",
-        orientation="h",
-        title="Top Perpetrators: Harm Type Distribution",
-        color_discrete_sequence=px.colors.qualitative.Set2,
-    )
-    st.plotly_chart(fig2, use_container_width=True)
+    st.plotly_chart(figs["harm"], use_container_width=True)
 
     st.markdown(
         """
@@ -898,26 +980,7 @@ elif section == "🧨 Perpetrator Analysis":
     # 🌍 Perpetrator Geography Bubble Chart
     # ======================
     st.subheader("🌍 Perpetrator Spread by Country")
-    df_geo = df.dropna(subset=["Country", "Actor type"])
-    country_actor = (
-        df_geo.groupby(["Country", "Actor type"]).size().reset_index(name="Incidents")
-    )
-
-    fig3 = px.scatter(
-        country_actor,
-        x="Country",
-        y="Actor type",
-        size="Incidents",
-        color="Actor type",
-        title="Perpetrator Incidents by Country",
-        height=500,
-    )
-    fig3.update_layout(
-        xaxis_title="Country",
-        yaxis_title="Actor Type",
-        legend_title="Actor Type",
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    st.plotly_chart(figs["geography"], use_container_width=True)
 
     st.markdown(
         """
@@ -929,6 +992,8 @@ elif section == "🧨 Perpetrator Analysis":
     )
 
 elif section == "📅 Time & Cross Analysis":
+    figs = section_figures(section)
+
     st.header("📅 Time Trends & 🔁 Cross-Dimensional Insights")
     st.markdown(
         """
@@ -943,39 +1008,8 @@ elif section == "📅 Time & Cross Analysis":
     # 📅 Monthly and Quarterly Trends
     # ======================
     st.subheader("📆 Monthly and Quarterly Incident Trends")
-
-    df_time = df.copy()
-    df_time = df_time.dropna(subset=["Year", "Month"])
-    df_time["Year"] = df_time["Year"].astype(int)
-    df_time["Month"] = df_time["Month"].astype(int)
-    df_time["Date"] = pd.to_datetime(df_time[["Year", "Month"]].assign(DAY=1))
-    df_time["Quarter"] = df_time["Date"].dt.to_period("Q").astype(str)
-
-    # Monthly Trend
-    monthly_counts = df_time.groupby("Date").size().reset_index(name="Incidents")
-    fig_month = px.line(
-        monthly_counts,
-        x="Date",
-        y="Incidents",
-        title="Monthly Incident Trends",
-        markers=True,
-        line_shape="spline",
-        height=400,
-    )
-    st.plotly_chart(fig_month, use_container_width=True)
-
-    # Quarterly Trend
-    quarterly_counts = df_time.groupby("Quarter").size().reset_index(name="Incidents")
-    fig_quarter = px.bar(
-        quarterly_counts,
-        x="Quarter",
-        y="Incidents",
-        title="Quarterly Incident Distribution",
-        color="Incidents",
-        color_continuous_scale="Blues",
-        height=400,
-    )
-    st.plotly_chart(fig_quarter, use_container_width=True)
+    st.plotly_chart(figs["monthly"], use_container_width=True)
+    st.plotly_chart(figs["quarterly"], use_container_width=True)
 
     st.markdown(
         """
@@ -989,38 +1023,7 @@ elif section == "📅 Time & Cross Analysis":
     # 🔁 Country × Attack × Severity
     # ======================
     st.subheader("🔁 Country × Attack Method × Severity")
-
-    df_cross = df.dropna(subset=["Country", "Means of attack"])
-    df_cross = (
-        df_cross.groupby(["Country", "Means of attack"])
-        .agg(
-            {
-                "Total killed": "sum",
-                "Total wounded": "sum",
-                "Total kidnapped": "sum",
-            }
-        )
-        .reset_index()
-    )
-
-    df_cross_melted = df_cross.melt(
-        id_vars=["Country", "Means of attack"],
-        value_vars=["Total killed", "Total wounded", "Total kidnapped"],
-        var_name="Severity",
-        value_name="Count",
-    )
-
-    fig_heatmap = px.density_heatmap(
-        df_cross_melted,
-        x="Means of attack",
-        y="Country",
-        z="Count",
-        facet_col="Severity",
-        color_continuous_scale="OrRd",
-        title="Heatmap: Country × Attack Type × Severity",
-        height=600,
-    )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
+    st.plotly_chart(figs["heatmap"], use_container_width=True)
 
     st.markdown(
         """
@@ -1032,6 +1035,80 @@ elif section == "📅 Time & Cross Analysis":
     )
 
 
+elif section == "🏢 Organization Types":
+    st.header("🏢 Which Organizations Are Hit Hardest?")
+    st.markdown(
+        """
+        Aid workers do not face the same risks regardless of who they work for.
+        This section looks at incidents through the lens of the **affected organization types** — UN agencies, international NGOs, the ICRC, national Red Cross/Red Crescent societies and the IFRC, and national NGOs.
+
+        Choose one or more organization types below to see **how often they are affected**, **where**, and **who the victims are**.
+        """
+    )
+
+    col1, col2 = st.columns([3, 1])
+    orgs = col1.multiselect("Organization types:", ORG_TYPES, default=["INGO", "ICRC"])
+    match = col2.radio(
+        "Incidents affecting:",
+        ["any", "all"],
+        format_func=lambda m: {"any": "any of them", "all": "all of them"}[m],
+    )
+
+    if not orgs:
+        st.info("ℹ️ Select at least one organization type.")
+    else:
+        figs = organization_types(cubes, view.org_tensor, orgs, match)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Incidents", f"{figs['incidents']:,}")
+        col2.metric("Share of all incidents", f"{figs['share']:.1%}")
+        col3.metric("Victims", f"{figs['victims']:,}")
+
+        # ======================
+        # 👥 Staff Affected by Organization Type
+        # ======================
+        st.subheader("👥 Staff Affected by Organization Type")
+        st.plotly_chart(figs["staff"], use_container_width=True)
+
+        st.markdown(
+            """
+            - **International NGOs** account for the largest number of affected staff, followed by **national NGOs** and **UN agencies**.
+            - National NGOs are often the first and last responders in insecure areas, yet they are the least visible in global security reporting.
+            """
+        )
+
+        # ======================
+        # 📈 Trends by Organization Type
+        # ======================
+        st.subheader("📈 Trends by Organization Type")
+        st.plotly_chart(figs["trend"], use_container_width=True)
+
+        st.markdown(
+            """
+            - Incidents affecting **national NGOs** have grown fastest over the past decade, reflecting the growing localisation of humanitarian response.
+            - An incident is counted once for **every** organization type it affected, so the lines can add up to more than the yearly total.
+            """
+        )
+
+        # ======================
+        # 🗺️ Where Selected Organizations Are Affected
+        # ======================
+        st.subheader("🗺️ Where Are These Organizations Affected?")
+        st.plotly_chart(figs["map"], use_container_width=True)
+
+        # ======================
+        # 🧍 Victims in Selected Incidents
+        # ======================
+        st.subheader("🧍 Who Are the Victims?")
+        st.plotly_chart(figs["victim_breakdown"], use_container_width=True)
+
+        st.markdown(
+            """
+            - Comparing organization types shows how **staffing models shape exposure**: organizations that rely on national staff see national victims dominate every harm type.
+            - Use the selector above to compare, for example, **UN vs. INGO** incidents, or only incidents that affected **both** an INGO and a national partner.
+            """
+        )
+
 elif section == "✅ Conclusion & Recommendations":
     st.header("✅ Conclusions & Recommendations")
     st.markdown(
@@ -1082,3 +1159,241 @@ elif section == "✅ Conclusion & Recommendations":
         - [5]ICRC (2020). *Security of Humanitarian Personnel: Principles and Best Practices*. [https://www.icrc.org](https://www.icrc.org)
         """
     )
+
+elif section == "🔀 Snapshot Comparison":
+    st.header("🔀 What Changed Between Data Versions?")
+    st.markdown(
+        """
+        The Aid Worker Security Database revises past incidents as new information arrives — victim counts are corrected, perpetrators are attributed, and records move from **Archived** to **Verified**.
+        This section compares two versions of the dataset incident by incident and shows how those revisions move the headline numbers of every section.
+
+        Save the current file as a snapshot with `python snapshots.py security_incidents.csv`.
+        """
+    )
+
+    versions = list_snapshots()
+    # 流式模式下当前数据不在内存中，只比较已保存的快照
+    if df is not None and data_version not in [v.split("_")[-1] for v in versions]:
+        versions.append(data_version)
+    labels = {v: ("📌 Current data" if v == data_version else v) for v in versions}
+
+    if len(versions) < 2:
+        st.info("ℹ️ At least two snapshots are needed for a comparison.")
+    else:
+        col1, col2 = st.columns(2)
+        old_name = col1.selectbox(
+            "Older version", versions, index=len(versions) - 2, format_func=labels.get
+        )
+        new_name = col2.selectbox(
+            "Newer version", versions, index=len(versions) - 1, format_func=labels.get
+        )
+        diff = compare_versions(old_name, new_name, data_version, df, text_store)
+        if len(diff["duplicate_ids"]):
+            st.warning(
+                f"⚠️ {len(diff['duplicate_ids'])} Incident IDs appear more than once "
+                "in one of the versions; only their first row is compared "
+                f"({', '.join(map(str, diff['duplicate_ids'][:10]))}"
+                f"{', …' if len(diff['duplicate_ids']) > 10 else ''})."
+            )
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Added incidents", len(diff["added"]))
+        col2.metric("Removed incidents", len(diff["removed"]))
+        col3.metric("Changed incidents", diff["changes"]["Incident ID"].nunique())
+
+        st.subheader("📊 Effect on Headline Numbers")
+        st.dataframe(diff["headlines"], use_container_width=True, hide_index=True)
+
+        if not diff["changes"].empty:
+            st.subheader("✏️ Column-Level Changes")
+            column_counts = diff["changes"]["Column"].value_counts().reset_index()
+            column_counts.columns = ["Column", "Changed incidents"]
+            fig_changes = px.bar(
+                column_counts.sort_values("Changed incidents"),
+                x="Changed incidents",
+                y="Column",
+                orientation="h",
+                color_discrete_sequence=["#457b9d"],
+                title="Which Fields Were Revised Most Often?",
+            )
+            st.plotly_chart(fig_changes, use_container_width=True)
+            st.dataframe(diff["changes"], use_container_width=True, hide_index=True)
+
+        with st.expander(f"➕ Added incidents ({len(diff['added'])})"):
+            st.dataframe(diff["added"], use_container_width=True, hide_index=True)
+        with st.expander(f"➖ Removed incidents ({len(diff['removed'])})"):
+            st.dataframe(diff["removed"], use_container_width=True, hide_index=True)
+
+elif section == "🔎 Similar Incidents":
+    st.header("🔎 Have We Seen This Before?")
+    st.markdown(
+        """
+        When a new incident is reported, comparable historical cases help analysts judge how it may unfold and which precautions worked.
+        Incidents are compared on their **description**, their **circumstances** (means of attack, context, location, actor, motive) and **where** they happened.
+        """
+    )
+
+    index = dataset.similarity_index
+    k = st.slider("Number of similar incidents:", 5, 50, 10)
+    # 索引覆盖全部事件；排除疑似重复时多取几条，过滤后再截取前 k 条
+    hidden = dataset.duplicates.duplicate_ids if exclude_duplicates else []
+    wanted = k + len(hidden)
+    mode = st.radio(
+        "Find incidents similar to:",
+        ["An existing incident", "A new incident"],
+        horizontal=True,
+    )
+
+    if mode == "An existing incident":
+        incident_id = st.number_input(
+            "Incident ID", min_value=int(index.ids.min()), value=int(index.ids.max())
+        )
+        if incident_id in index.ids:
+            matches = index.similar_to(incident_id, wanted)
+            matches = matches[~matches["Incident ID"].isin(hidden)].head(k)
+            ids = [incident_id] + matches["Incident ID"].tolist()
+        else:
+            st.warning("⚠️ No incident with this ID in the current data.")
+            matches = None
+    else:
+        options = dataset.category_options
+        new_incident = {
+            "Details": st.text_area(
+                "Description",
+                "Two national staff of an INGO were abducted by armed men "
+                "while travelling by road.",
+            )
+        }
+        columns = st.columns(3)
+        for i, column in enumerate(CATEGORICAL_COLUMNS + ["Country"]):
+            new_incident[column] = columns[i % 3].selectbox(
+                f"{column}:", [None] + options[column]
+            )
+        new_incident.update(Region=None, Latitude=None, Longitude=None)
+        matches = index.query(pd.DataFrame([new_incident]), wanted).drop(
+            columns="Query"
+        )
+        matches = matches[~matches["Incident ID"].isin(hidden)].head(k)
+        ids = matches["Incident ID"].tolist()
+
+    if matches is not None:
+        rows = (
+            fetch_incidents(data_version, ids)
+            if df is None
+            else text_store.join(df[df["Incident ID"].isin(ids)])
+        )
+        shown = ["Incident ID", "Year", "Country", "Means of attack", "Actor type"]
+        shown += ["Total affected", "Details"]
+        if mode == "An existing incident":
+            st.markdown("**Selected incident**")
+            st.dataframe(
+                rows[rows["Incident ID"] == incident_id][shown],
+                use_container_width=True,
+                hide_index=True,
+            )
+        st.markdown("**Most similar incidents**")
+        st.dataframe(
+            matches.merge(rows[shown], on="Incident ID", how="left"),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Similarity": st.column_config.ProgressColumn(
+                    min_value=0.0, max_value=1.0, format="%.2f"
+                )
+            },
+        )
+
+elif section == "🩺 Data Diagnostics":
+    st.header("🩺 Data Quality Diagnostics")
+    st.markdown(
+        """
+        Every chart in this dashboard relies on the raw incident table being internally consistent.
+        Before anything is plotted, each data version is checked against a set of **validation rules** — victim sub-totals must add up, gender counts must match the number of people affected, dates must be valid, and coordinates must sit inside the reported country's footprint.
+
+        The checks run once per data version and the report below is cached.
+        """
+    )
+
+    flagged = validation_report[validation_report["Violations"] > 0]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rules checked", len(validation_report))
+    col2.metric("Rules flagged", len(flagged))
+    col3.metric(
+        "Rows flagged",
+        len(set().union(*validation_report["Incident IDs"])),
+    )
+
+    st.subheader("📋 Violations by Rule")
+    st.dataframe(
+        validation_report[["Rule", "Description", "Violations"]],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    if flagged.empty:
+        st.success("✅ No violations found in this data version.")
+    else:
+        st.subheader("🔎 Inspect Flagged Incidents")
+        rule = st.selectbox("Choose a rule:", flagged["Rule"].tolist())
+        ids = flagged.set_index("Rule").loc[rule, "Incident IDs"]
+        flagged_rows = (
+            fetch_incidents(data_version, ids)
+            if df is None
+            else text_store.join(df[df["Incident ID"].isin(ids)])
+        )
+        st.dataframe(flagged_rows, use_container_width=True, hide_index=True)
+
+        st.markdown(
+            """
+            - Coordinates are compared with the **spread of all incidents in the same country**, so a flag means the point is far from where that country's incidents usually occur — often a swapped or truncated longitude.
+            - Flagged rows are **not removed** from the other sections; this report is meant to guide corrections in the source data.
+            """
+        )
+
+    st.subheader("🪞 Suspected Duplicates")
+    duplicates = dataset.duplicates
+    st.markdown(
+        f"""
+        Some incidents appear to be recorded twice by different sources. Pairs are found by comparing **MinHash signatures** of the Details text (only incidents sharing a hash band are compared), then confirmed when both are in the **same country**, at most **{MAX_DAYS_APART} days** and **{MAX_KM_APART:.0f} km** apart.
+
+        In each group the incident with the lowest ID is treated as the original; use the sidebar switch to leave the others out of the charts.
+        """
+    )
+    col1, col2 = st.columns(2)
+    col1.metric("Suspected duplicate pairs", len(duplicates.pairs))
+    col2.metric("Incidents excluded by the switch", len(duplicates))
+    if not duplicates.pairs.empty:
+        pairs = duplicates.pairs.sort_values("Similarity", ascending=False)
+        st.dataframe(pairs, use_container_width=True, hide_index=True)
+        pair = st.selectbox(
+            "Compare a pair:",
+            list(pairs[["Incident ID A", "Incident ID B"]].itertuples(index=False)),
+            format_func=lambda p: f"{p[0]} ↔ {p[1]}",
+        )
+        details = text_store.get(list(pair))["Details"]
+        col1, col2 = st.columns(2)
+        for column, incident_id in zip([col1, col2], pair):
+            column.markdown(f"**Incident {incident_id}**")
+            column.write(details.get(incident_id, "—"))
+
+    st.subheader("🔄 Data Refreshes")
+    st.markdown(
+        f"While the dashboard is in use, the data file is checked for changes at most every {refresher.poll_interval} seconds. A new version is built in the background — aggregates, indexes and section charts — and swapped in only once it is complete; sessions keep using the previous version until then."
+    )
+    history = pd.DataFrame(list(refresher.history))
+    history["Finished"] = pd.to_datetime(history["Finished"], unit="s")
+    st.dataframe(history, use_container_width=True, hide_index=True)
+    if dataset.cache is not None:
+        stats = dataset.cache.stats
+        st.caption(
+            f"Shared cache (`{type(dataset.cache.backend).__name__}`): "
+            f"{stats['hits']} results read from peers or earlier runs, "
+            f"{stats['computed']} computed here, {stats['waits']} waits on "
+            "another replica's computation"
+            + ("" if dataset.cache.secret else " (values are not signed)")
+        )
+        if stats["rejected"]:
+            st.warning(
+                f"{stats['rejected']} shared cache values failed signature "
+                "verification and were recomputed."
+            )
@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+import pytest
+
+from aggregates import TEXT_COLUMNS, build_cubes, stream_cubes, stream_validate
+from data_quality import validate
+from geography import GeoRollup
+from snapshots import ID_COLUMN
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "security_incidents.csv")
+CHUNK = 997  # 远小于文件行数，每个分块都要并入累计结果
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return pd.read_csv(CSV, usecols=lambda c: c not in TEXT_COLUMNS)
+
+
+def _sorted(cube):
+    keys = list(cube.columns[: cube.columns.get_loc("Incidents")])
+    return cube.sort_values(keys).reset_index(drop=True)
+
+
+def test_streamed_cubes_match_in_memory(frame):
+    excluded = frame[ID_COLUMN].iloc[::7]
+    full, deduplicated = stream_cubes(CSV, exclude=excluded, chunksize=CHUNK)
+    expected = build_cubes(frame)
+    expected_kept = build_cubes(frame[~frame[ID_COLUMN].isin(excluded)])
+    for name, cube in expected.items():
+        pd.testing.assert_frame_equal(_sorted(full[name]), _sorted(cube))
+        pd.testing.assert_frame_equal(
+            _sorted(deduplicated[name]), _sorted(expected_kept[name])
+        )
+
+
+def test_streamed_validation_adds_chunk_reports(frame):
+    report = stream_validate(CSV, chunksize=CHUNK)
+    chunks = [frame.iloc[lo : lo + CHUNK] for lo in range(0, len(frame), CHUNK)]
+    expected = sum(validate(chunk)["Violations"].to_numpy() for chunk in chunks)
+    assert list(report["Violations"]) == list(expected)
+    assert [len(ids) for ids in report["Incident IDs"]] == list(expected)
+
+
+def test_streamed_rollup_matches_in_memory(frame):
+    excluded = frame[ID_COLUMN].iloc[::5]
+    streamed = GeoRollup.from_csv(CSV, exclude=excluded, chunksize=CHUNK)
+    expected = GeoRollup.from_frame(frame[~frame[ID_COLUMN].isin(excluded)])
+    for level, expected_level in zip(streamed.levels, expected.levels):
+        pd.testing.assert_frame_equal(level, expected_level)
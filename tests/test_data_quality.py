@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_quality import COUNT_COLUMNS, RULES, validate
+
+BAD_ID = 105
+
+
+def clean_frame():
+    """Twenty consistent incidents in one country: one national killed each."""
+    n = 20
+    rng = np.random.default_rng(3)
+    frame = pd.DataFrame(
+        {
+            "Incident ID": np.arange(100, 100 + n),
+            "Year": 2020,
+            "Month": np.arange(n) % 12 + 1,
+            "Day": np.arange(n) + 1,
+            "Country": "Sudan",
+            "Country Code": "SD",
+            "Latitude": 13.0 + rng.uniform(-2, 2, n),
+            "Longitude": 30.0 + rng.uniform(-2, 2, n),
+        }
+    )
+    for column in COUNT_COLUMNS:
+        frame[column] = 0
+    for column in [
+        "Nationals killed",
+        "Total nationals",
+        "Total killed",
+        "Total affected",
+        "Gender Male",
+    ]:
+        frame[column] = 1
+    return frame
+
+
+# 每条规则一处构造的错误，都改在 BAD_ID 这一行
+BREAKS = {
+    "killed_staff_sum": {"Total killed": 2},
+    "wounded_staff_sum": {"Nationals wounded": 1},
+    "kidnapped_staff_sum": {"Total kidnapped": 1},
+    "nationals_sum": {"Total nationals": 2},
+    "internationals_sum": {"Total internationals": 1},
+    "affected_by_staff": {"Total internationals": 1, "Internationals killed": 1},
+    "affected_by_harm": {"Total wounded": 1},
+    "affected_by_gender": {"Gender Female": 1},
+    "negative_counts": {"Gender Unknown": -1},
+    "coordinates_missing": {"Latitude": np.nan},
+    "coordinates_out_of_range": {"Longitude": 200.0},
+    "coordinates_outside_country": {"Latitude": -40.0},
+    "country_code_conflict": {"Country Code": "SS"},
+    "invalid_date": {"Month": 13},
+    "duplicate_incident_id": {"Incident ID": 100},
+}
+
+
+def test_clean_frame_passes_every_rule():
+    report = validate(clean_frame())
+    assert report["Violations"].sum() == 0
+
+
+def test_every_rule_has_a_crafted_break():
+    assert set(BREAKS) == {rule for rule, _, _ in RULES}
+
+
+@pytest.mark.parametrize("rule", sorted(BREAKS))
+def test_rule_flags_crafted_row(rule):
+    frame = clean_frame()
+    row = frame.index[frame["Incident ID"] == BAD_ID][0]
+    for column, value in BREAKS[rule].items():
+        frame.loc[row, column] = value
+    flagged = validate(frame).set_index("Rule").loc[rule, "Incident IDs"]
+    expected_id = frame.loc[row, "Incident ID"]
+    assert expected_id in flagged
+    if rule not in ("country_code_conflict", "duplicate_incident_id"):
+        # 逐行规则只标出被改动的那一行
+        assert flagged == [expected_id]
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from dedup import (
+    _EMPTY,
+    DuplicateIndex,
+    DuplicateReport,
+    index_path,
+    remove_index,
+    saved_indexes,
+    signatures,
+)
+from snapshots import ID_COLUMN
+
+REPORT = (
+    "Armed men stopped a clearly marked aid convoy on the road north of the town, "
+    "beat two national drivers and stole both vehicles and their cargo."
+)
+
+
+def incidents():
+    return pd.DataFrame(
+        {
+            ID_COLUMN: [1, 2, 3, 4, 5],
+            "Year": [2023, 2023, 2023, 2023, 2023],
+            "Month": [4, 4, 4, 4, 9],
+            "Day": [10, 12, 10, 11, 1],
+            "Country": ["Sudan", "Sudan", "Sudan", "Sudan", "Mali"],
+            "Latitude": [13.60, 13.65, 15.50, 15.52, 12.6],
+            "Longitude": [25.35, 25.36, 32.50, 32.51, -8.0],
+            "Details": [
+                None,
+                np.nan,
+                REPORT,
+                REPORT.replace("two national drivers", "two drivers"),
+                "Unrelated incident at a health clinic in the capital.",
+            ],
+        }
+    )
+
+
+def find(frame):
+    index = DuplicateIndex.build(frame[ID_COLUMN], frame["Details"].tolist(), "v1")
+
+    def rows(ids):
+        return frame[frame[ID_COLUMN].isin(ids)]
+
+    return index.find(rows)
+
+
+def test_missing_texts_get_empty_signatures():
+    sigs = signatures([None, np.nan, ""])
+    assert (sigs == _EMPTY).all()
+
+
+def test_missing_texts_are_never_paired():
+    pairs = find(incidents())
+    pairs = set(zip(pairs["Incident ID A"], pairs["Incident ID B"]))
+    assert pairs == {(3, 4)}
+
+
+def test_report_keeps_lowest_id_as_original():
+    report = DuplicateReport(find(incidents()))
+    assert list(report.duplicate_ids) == [4]
+    assert list(report.is_duplicate([1, 2, 3, 4, 5])) == [0, 0, 0, 1, 0]
+
+
+def test_saved_signatures_round_trip(tmp_path):
+    frame = incidents()
+    index = DuplicateIndex.build(frame[ID_COLUMN], frame["Details"].tolist(), "abc")
+    loaded = DuplicateIndex.load(index.save(tmp_path))
+    assert loaded.version == "abc"
+    assert (loaded.sigs == index.sigs).all()
+    assert saved_indexes(tmp_path) == [index_path("abc", tmp_path)]
+    remove_index("abc", tmp_path)
+    assert saved_indexes(tmp_path) == []
@@ -0,0 +1,104 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from organizations import ORG_TYPES
+from patterns import (
+    OUTCOMES,
+    PATTERN_ATTRIBUTES,
+    ItemBitsets,
+    association_rules,
+    attribute,
+    exclusive,
+    frequent_itemsets,
+)
+
+MIN_SUPPORT = 0.05
+MAX_LENGTH = 3
+
+
+@pytest.fixture(scope="module")
+def frame():
+    # 行数不是 64 的倍数，位集末尾有不完整的字
+    rng = np.random.default_rng(7)
+    n = 301
+    values = ["A", "B", "C", "Unknown", None]
+    frame = pd.DataFrame(
+        {
+            c: rng.choice(values, n, p=[0.4, 0.3, 0.1, 0.1, 0.1])
+            for c in PATTERN_ATTRIBUTES
+        }
+    )
+    for column in ORG_TYPES + list(OUTCOMES.values()):
+        frame[column] = rng.choice([0, 1, 2, np.nan], n, p=[0.6, 0.25, 0.1, 0.05])
+    return frame
+
+
+def item_masks(frame):
+    """Brute-force row mask per item, straight from the frame."""
+    masks = {}
+    for column in PATTERN_ATTRIBUTES:
+        for value in frame[column].dropna().unique():
+            if value != "Unknown":
+                masks[f"{column}={value}"] = (frame[column] == value).to_numpy()
+    for org in ORG_TYPES:
+        masks[f"Organization={org}"] = frame[org].fillna(0).to_numpy() > 0
+    for item, column in OUTCOMES.items():
+        masks[item] = frame[column].fillna(0).to_numpy() > 0
+    return masks
+
+
+def brute_force(frame):
+    masks = item_masks(frame)
+    min_count = int(np.ceil(MIN_SUPPORT * len(frame)))
+    found = {}
+    for length in range(1, MAX_LENGTH + 1):
+        for itemset in combinations(sorted(masks), length):
+            exclusive_attributes = [attribute(i) for i in itemset if exclusive(i)]
+            if len(set(exclusive_attributes)) < len(exclusive_attributes):
+                continue
+            count = int(np.logical_and.reduce([masks[i] for i in itemset]).sum())
+            if count >= min_count:
+                found[itemset] = count
+    return found
+
+
+def test_support_counts_match_brute_force(frame):
+    itemsets = frequent_itemsets(ItemBitsets(frame), MIN_SUPPORT, MAX_LENGTH)
+    assert itemsets.to_dict() == brute_force(frame)
+
+
+def test_chunked_bitsets_match_whole_frame(frame):
+    whole = ItemBitsets(frame)
+    chunked = ItemBitsets.from_chunks([frame.iloc[:128], frame.iloc[128:]])
+    assert chunked.n == whole.n
+    assert chunked.items.keys() == whole.items.keys()
+    for item, bits in whole.items.items():
+        assert (chunked.items[item] == bits).all()
+
+
+def test_restrict_counts_only_masked_rows(frame):
+    mask = (frame["Location"] == "A").to_numpy()
+    itemsets = frequent_itemsets(ItemBitsets(frame).restrict(mask), MIN_SUPPORT, 2)
+    expected = brute_force(frame[mask].reset_index(drop=True))
+    assert {k: v for k, v in itemsets.items() if len(k) <= 2} == {
+        k: v for k, v in expected.items() if len(k) <= 2
+    }
+
+
+def test_rule_measures(frame):
+    itemsets = frequent_itemsets(ItemBitsets(frame), MIN_SUPPORT, MAX_LENGTH)
+    rules = association_rules(itemsets, len(frame))
+    masks = item_masks(frame)
+    rule = rules.iloc[0]
+    antecedent = np.logical_and.reduce(
+        [masks[i] for i in rule["Antecedent"].split(" + ")]
+    )
+    both = antecedent & masks[rule["Consequent"]]
+    assert rule["Incidents"] == both.sum()
+    assert rule["Confidence"] == pytest.approx(both.sum() / antecedent.sum())
+    assert rule["Lift"] == pytest.approx(
+        rule["Confidence"] / masks[rule["Consequent"]].mean()
+    )
@@ -0,0 +1,64 @@
+import gc
+import os
+
+import pytest
+
+import refresh
+from data_quality import file_fingerprint
+from refresh import DataRefresher
+
+
+class Data:
+    def __init__(self, path, version):
+        self.version = version
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(refresh, "SETTLE_SECONDS", 0.01)
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    return str(path)
+
+
+def _refresh(refresher):
+    assert refresher.check(force=True)
+    refresher._thread.join()
+
+
+def test_unchanged_content_is_not_rebuilt(data_file):
+    builds = []
+    refresher = DataRefresher(
+        data_file, lambda p, **kw: builds.append(p) or Data(p, **kw)
+    )
+    os.utime(data_file, (0, 0))
+    _refresh(refresher)
+    assert len(builds) == 1
+    assert refresher.error is None
+
+
+def test_retired_version_is_cleaned_up(data_file):
+    retired = []
+    refresher = DataRefresher(data_file, Data, retire=retired.append)
+    first = refresher.current.version
+    with open(data_file, "a") as f:
+        f.write("3,4\n")
+    _refresh(refresher)
+    assert refresher.current.version != first
+    gc.collect()
+    assert retired == [first]
+
+
+def test_file_is_fingerprinted_once_per_refresh(data_file):
+    fingerprints = []
+
+    def fingerprint(path):
+        fingerprints.append(path)
+        return file_fingerprint(path)
+
+    refresher = DataRefresher(data_file, Data, fingerprint=fingerprint)
+    with open(data_file, "a") as f:
+        f.write("3,4\n")
+    _refresh(refresher)
+    assert len(fingerprints) == 2
+    assert refresher.current.version == file_fingerprint(data_file)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from risk import (
+    BANDWIDTH,
+    KERNEL_RADIUS,
+    RiskSurface,
+    _kernel,
+    build_surfaces,
+    grid_shape,
+)
+
+
+def test_kernel_truncated_to_a_disk():
+    resolution, pad = 0.5, int(np.ceil(KERNEL_RADIUS * BANDWIDTH / 0.5))
+    kernel = _kernel((200, 720), resolution, pad)
+    rows, cols = np.nonzero(kernel)
+    dy = np.minimum(rows, 200 - rows) * resolution
+    dx = np.minimum(cols, 720 - cols) * resolution
+    assert np.hypot(dy, dx).max() <= pad * resolution
+    # 纬度与经度方向的支撑范围相同
+    assert dy.max() == dx.max()
+
+
+def test_route_across_antimeridian_takes_the_short_way():
+    resolution = 1.0
+    hist = np.zeros(grid_shape(resolution))
+    hist[90, 0] = 1.0  # 赤道上、经度 -180° 附近的热点
+    hist[90, 180] = 1.0  # 经度 0° 附近的热点
+    surface = RiskSurface(hist, resolution, latest=2000.0)
+    route = pd.DataFrame(
+        {"Route": ["R", "R"], "Latitude": [0.5, 0.5], "Longitude": [179.5, -179.5]}
+    )
+    scored = surface.score_routes(route).iloc[0]
+    assert scored["Peak risk"] > 50
+    # 绕远路会经过经度 0° 的热点并采样数百个格子，均值会被拉低
+    assert scored["Mean risk"] > 20
+
+
+def test_no_located_incidents_give_an_empty_surface():
+    frame = pd.DataFrame(
+        {
+            "Latitude": [np.nan],
+            "Longitude": [np.nan],
+            "Year": [2020],
+            "Month": [5],
+            "Total killed": [1],
+            "Total kidnapped": [0],
+            "Total wounded": [0],
+        }
+    )
+    for incidents in [frame, frame.iloc[:0]]:
+        surfaces = build_surfaces(incidents, resolutions=[2.0])
+        surface = surfaces[2.0]
+        assert surface.empty
+        assert not np.isnan(surface.score_grid).any()
+        assert surface.score(10.0, 20.0).item() == 0
+        assert surface.frame().empty
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from sharedcache import FileBackend, KeyValueBackend, MemoryKV, SharedCache
+
+
+@pytest.fixture(params=["memory", "file"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return KeyValueBackend(MemoryKV())
+    return FileBackend(str(tmp_path))
+
+
+def test_single_flight(backend, monkeypatch):
+    monkeypatch.setattr("sharedcache.POLL_SECONDS", 0.01)
+    replicas = [SharedCache(backend) for _ in range(8)]
+    calls = []
+    started = threading.Barrier(len(replicas))
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"value": 42}
+
+    results = []
+
+    def run(cache):
+        started.wait()
+        results.append(cache.get_or_compute("key", compute))
+
+    threads = [threading.Thread(target=run, args=(c,)) for c in replicas]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"value": 42}] * len(replicas)
+    assert sum(c.stats["computed"] for c in replicas) == 1
+    assert sum(c.stats["waits"] for c in replicas) > 0
+
+
+def test_lock_expires(backend):
+    token = backend.acquire("key.lock", ttl=0.1)
+    assert token is not None
+    assert backend.acquire("key.lock", ttl=0.1) is None
+    time.sleep(0.2)
+    # 文件后端在发现过期时删除旧锁，下一次争抢才能取得
+    fresh = backend.acquire("key.lock", 0.1) or backend.acquire("key.lock", 0.1)
+    assert fresh is not None and fresh != token
+
+
+def test_release_keeps_a_lock_taken_over_after_expiry(backend):
+    stale = backend.acquire("key.lock", ttl=0.1)
+    time.sleep(0.2)
+    fresh = backend.acquire("key.lock", 0.1) or backend.acquire("key.lock", 0.1)
+    assert fresh is not None
+    backend.release("key.lock", stale)
+    assert backend.acquire("key.lock", ttl=10) is None
+    backend.release("key.lock", fresh)
+    assert backend.acquire("key.lock", ttl=10) is not None
+
+
+def test_expired_holder_is_taken_over(monkeypatch):
+    monkeypatch.setattr("sharedcache.POLL_SECONDS", 0.01)
+    backend = KeyValueBackend(MemoryKV())
+    backend.acquire("key.lock", ttl=0.1)  # 持锁副本崩溃，没有释放
+    cache = SharedCache(backend, lock_ttl=0.1)
+    assert cache.get_or_compute("key", lambda: "recomputed") == "recomputed"
+    assert cache.stats["waits"] > 0
+
+
+def test_bad_signature_is_recomputed(backend):
+    SharedCache(backend, secret="old").get_or_compute("key", lambda: "old")
+    cache = SharedCache(backend, secret="new")
+    assert cache.get_or_compute("key", lambda: "new") == "new"
+    assert cache.stats["rejected"] > 0
+    assert cache.get_or_compute("key", lambda: "again") == "new"
+
+
+def test_long_computation_keeps_its_lock(backend, monkeypatch):
+    monkeypatch.setattr("sharedcache.POLL_SECONDS", 0.01)
+    replicas = [SharedCache(backend, lock_ttl=0.2) for _ in range(2)]
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.8)  # 远长于锁的过期时间
+        return "value"
+
+    first = threading.Thread(target=replicas[0].get_or_compute, args=("key", compute))
+    first.start()
+    time.sleep(0.05)
+    assert replicas[1].get_or_compute("key", compute) == "value"
+    first.join()
+    assert len(calls) == 1
+
+
+def test_renew_only_own_lock(backend):
+    token = backend.acquire("key.lock", ttl=0.2)
+    other = backend.acquire("other.lock", ttl=0.2)
+    assert not backend.renew("key.lock", other, 0.2)
+    for _ in range(3):
+        time.sleep(0.1)
+        assert backend.renew("key.lock", token, 0.2)
+    assert backend.acquire("key.lock", ttl=0.2) is None
+    backend.release("key.lock", token)
+    assert not backend.renew("key.lock", token, 0.2)
+
+
+def test_guard_files_are_removed(tmp_path):
+    backend = FileBackend(str(tmp_path))
+    stale = backend.acquire("key.lock", ttl=0.05)
+    time.sleep(0.1)
+    backend.acquire("key.lock", ttl=0.05)  # 删除过期的锁
+    token = backend.acquire("key.lock", ttl=10)
+    backend.renew("key.lock", token)
+    backend.release("key.lock", stale)
+    backend.release("key.lock", token)
+    SharedCache(backend).get_or_compute("key", lambda: 1)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["key"]
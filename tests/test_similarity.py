@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+import pytest
+
+from similarity import SimilarityIndex, embed
+from snapshots import ID_COLUMN
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "security_incidents.csv")
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return pd.read_csv(CSV, nrows=200)
+
+
+def test_embed_empty_frame(frame):
+    vectors = embed(frame.iloc[:0])
+    assert vectors.shape == (0, embed(frame.iloc[:1]).shape[1])
+
+
+def test_update_that_only_removes_incidents(frame):
+    index = SimilarityIndex.build(frame, "v1")
+    updated = index.update(frame.iloc[10:], "v2")
+    assert len(updated) == len(frame) - 10
+    assert set(updated.ids) == set(frame[ID_COLUMN].iloc[10:])
+    kept = index.vectors[10:]
+    assert (
+        updated.vectors[updated._position.get_indexer(index.ids[10:])] != kept
+    ).nnz == 0
+
+
+def test_update_reembeds_changed_incidents(frame):
+    index = SimilarityIndex.build(frame, "v1")
+    changed = frame.copy()
+    changed.loc[0, "Details"] = "Completely different text about a convoy ambush."
+    updated = index.update(changed, "v2")
+    rebuilt = SimilarityIndex.build(changed, "v2")
+    position = list(updated.ids).index(changed[ID_COLUMN].iloc[0])
+    assert (updated.vectors[position] != rebuilt.vectors[0]).nnz == 0
@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+import pytest
+
+from snapshots import ID_COLUMN, diff_snapshots, row_hashes
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "security_incidents.csv")
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return pd.read_csv(CSV, nrows=300)
+
+
+def test_hashes_ignore_dtype_and_column_order(frame, tmp_path):
+    drifted = frame.astype({"Total killed": "float64", "Year": "int32"})
+    drifted = drifted[list(reversed(drifted.columns))]
+    drifted.to_parquet(tmp_path / "snapshot.parquet")
+    reloaded = pd.read_parquet(tmp_path / "snapshot.parquet")
+    assert (row_hashes(reloaded) == row_hashes(frame)).all()
+    assert diff_snapshots(frame, reloaded)["changes"].empty
+
+
+def test_duplicate_ids_are_reported_not_misaligned(frame):
+    extra = frame.iloc[[5]].assign(Details="A second row with the same ID.")
+    new = pd.concat([frame, extra], ignore_index=True)
+    new.loc[10, "Country"] = "Changed"
+    diff = diff_snapshots(frame, new)
+    assert list(diff["duplicate_ids"]) == [frame[ID_COLUMN].iloc[5]]
+    assert diff["changes"][ID_COLUMN].tolist() == [frame[ID_COLUMN].iloc[10]]
@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+
+from snapshots import ID_COLUMN
+from textstore import TextStore, _write, build_store, remove_store, store_path
+
+TEXTS = pd.DataFrame(
+    {
+        ID_COLUMN: [30, 10, 20, 40, 50],
+        "Details": ["Convoy stopped.", None, "", "a\x1fb\x1fc", "\x00"],
+        "Source": [None, "Media", "\x1f", "", "NGO report — 2024"],
+    }
+)
+
+
+def test_round_trip_keeps_missing_empty_and_control_characters(tmp_path):
+    _write(tmp_path, TEXTS.columns, [TEXTS.iloc[:2], TEXTS.iloc[2:]])
+    store = TextStore.open(tmp_path)
+    texts = store.get(TEXTS[ID_COLUMN])
+    expected = TEXTS.set_index(ID_COLUMN).astype("object")
+    expected = expected.where(expected.notna(), None)
+    assert texts.to_dict("index") == expected.to_dict("index")
+    assert list(store.get([10, 99, 40]).index) == [10, 40]
+
+
+def test_join_restores_column_order(tmp_path):
+    csv = tmp_path / "incidents.csv"
+    TEXTS.assign(Country="Sudan")[[ID_COLUMN, "Details", "Country", "Source"]].to_csv(
+        csv, index=False
+    )
+    store = build_store(csv, "v1", store_dir=tmp_path / "store")
+    frame = pd.DataFrame({ID_COLUMN: [40, 30], "Country": ["Sudan", "Sudan"]})
+    joined = store.join(frame)
+    assert list(joined.columns) == [ID_COLUMN, "Details", "Country", "Source"]
+    assert list(joined["Details"]) == ["a\x1fb\x1fc", "Convoy stopped."]
+    assert list(joined[ID_COLUMN]) == [40, 30]
+
+
+def test_remove_store(tmp_path):
+    csv = tmp_path / "incidents.csv"
+    TEXTS.to_csv(csv, index=False)
+    store_dir = tmp_path / "store"
+    build_store(csv, "v1", store_dir=store_dir)
+    build_store(csv, "v2", store_dir=store_dir)
+    remove_store("v1", store_dir=store_dir)
+    assert not os.path.exists(store_path("v1", store_dir))
+    assert os.path.exists(store_path("v2", store_dir))
+    remove_store("missing", store_dir=tmp_path / "nowhere")
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import build_cubes
+from timeindex import TIME_MEASURES, build_time_indexes, compare_periods
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(__file__)), "security_incidents.csv")
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return pd.read_csv(CSV).assign(Incidents=1)
+
+
+@pytest.fixture(scope="module")
+def indexes(frame):
+    return build_time_indexes(build_cubes(frame))
+
+
+def _bound(value, month):
+    return value if isinstance(value, tuple) else (value, month)
+
+
+def brute_force(frame, dimension, start, end):
+    """Totals by filtering raw rows: dated incidents inside the range, and
+    undated incidents whose whole year lies inside it."""
+    (y1, m1), (y2, m2) = _bound(start, 1), _bound(end, 12)
+    key = frame["Year"] * 12 + frame["Month"]
+    dated = frame["Month"].notna() & key.between(y1 * 12 + m1, y2 * 12 + m2)
+    undated = (
+        frame["Month"].isna()
+        & (frame["Year"] * 12 + 1 >= y1 * 12 + m1)
+        & (frame["Year"] * 12 + 12 <= y2 * 12 + m2)
+    )
+    rows = frame[dated | undated]
+    if dimension is None:
+        return rows[TIME_MEASURES].sum().to_frame("All").T
+    return rows.groupby(dimension)[TIME_MEASURES].sum()
+
+
+def random_bound(rng, month):
+    year = int(rng.integers(1990, 2031))
+    return (year, int(rng.integers(1, 13))) if rng.random() < 0.5 else year
+
+
+def test_ranges_match_brute_force(frame, indexes):
+    rng = np.random.default_rng(0)
+    for _ in range(1500):
+        dimension = rng.choice([None, "Country", "Means of attack"])
+        index = indexes[dimension]
+        start, end = random_bound(rng, 1), random_bound(rng, 12)
+        expected = brute_force(frame, dimension, start, end)
+        actual = index.frame(start, end)
+        actual = actual[actual.sum(axis=1) > 0]
+        expected = expected[expected.sum(axis=1) > 0]
+        pd.testing.assert_frame_equal(
+            actual.sort_index(),
+            expected.sort_index().astype("int64"),
+            check_names=False,
+            check_index_type=False,
+        )
+
+
+def test_rates_use_months_covered_by_data(frame, indexes):
+    index = indexes[None]
+    first_year = int(frame["Year"].min())
+    # 只有 first_year 起的部分与数据重叠
+    periods = compare_periods(index, (first_year - 5, first_year + 1), (2000, 2001))
+    assert periods["first_months"] == 24
+    expected = frame[frame["Year"].between(first_year, first_year + 1)]
+    assert periods["first_rate"].loc["All", "Incidents"] == pytest.approx(
+        len(expected) / 2
+    )
+    outside = compare_periods(index, (1900, 1950), (2000, 2001))
+    assert outside["first_months"] == 0
+    assert outside["first_rate"].isna().all().all()
@@ -0,0 +1,210 @@
+# textstore.py
+# 长文本列（Details、Source）的独立存储：每个事件一条压缩记录，按 Incident ID 寻址。
+# 记录用共享预置字典的 raw deflate 单独压缩，可随机访问；数据文件以内存映射方式打开，
+# 只有查看事件详情或运行文本功能时才解压对应记录，分析用的数据框只保留结构化列。
+# 记录内各字段直接拼接，各字段的字节长度存在索引里（-1 表示缺失），文本中出现任何字符都能原样还原。
+#
+# 用法: python textstore.py [csv_path]   # 为当前 CSV 构建文本存储
+import json
+import os
+import shutil
+import sys
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from aggregates import CHUNK_SIZE, TEXT_COLUMNS
+from data_quality import file_fingerprint
+from snapshots import ID_COLUMN
+
+STORE_DIR = "textstore"
+ZDICT_SIZE = 32 * 1024  # deflate 预置字典上限
+MISSING = -1  # 缺失字段的长度
+# 存储的记录格式改变时递增；目录名带上它，旧格式的存储不会被打开
+STORE_FORMAT = 2
+
+
+def _compressor(zdict):
+    return zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+
+
+def _encode(frame):
+    """Records (the fields' UTF-8 bytes concatenated) and an (n, fields)
+    array of byte lengths, ``MISSING`` for a missing value."""
+    fields = [
+        [None if pd.isna(v) else str(v).encode("utf-8") for v in frame[c]]
+        for c in TEXT_COLUMNS
+    ]
+    lengths = np.array(
+        [[MISSING if v is None else len(v) for v in column] for column in fields],
+        dtype=np.int64,
+    ).reshape(len(TEXT_COLUMNS), len(frame))
+    records = [b"".join(v for v in row if v is not None) for row in zip(*fields)]
+    return records, lengths.T
+
+
+def _decode(record, lengths):
+    values, start = [], 0
+    for length in lengths:
+        if length == MISSING:
+            values.append(None)
+            continue
+        values.append(record[start : start + length].decode("utf-8"))
+        start += length
+    return values
+
+
+def _train_zdict(records):
+    """Preset dictionary from a sample of records; deflate favours the end of
+    the dictionary, so the most common records go last."""
+    sample = pd.Series(records).value_counts().index[:2000][::-1]
+    return b"".join(sample)[-ZDICT_SIZE:]
+
+
+class TextStore:
+    """Read side of a store: ids, offsets, field lengths and the compressed
+    blob (memory-mapped when opened from a directory)."""
+
+    def __init__(self, meta, ids, starts, lengths, fields, zdict, blob):
+        self.meta = meta
+        self.ids, self.starts, self.lengths = ids, starts, lengths
+        self.fields = fields
+        self.zdict = zdict
+        self.blob = blob
+
+    @classmethod
+    def open(cls, directory):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        index = np.load(os.path.join(directory, "index.npz"))
+        with open(os.path.join(directory, "zdict.bin"), "rb") as f:
+            zdict = f.read()
+        blob = os.path.join(directory, "texts.bin")
+        blob = (
+            np.memmap(blob, dtype=np.uint8, mode="r")
+            if os.path.getsize(blob)
+            else np.zeros(0, dtype=np.uint8)
+        )
+        return cls(
+            meta,
+            index["ids"],
+            index["starts"],
+            index["lengths"],
+            index["fields"],
+            zdict,
+            blob,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        return len(self.blob)
+
+    def _record(self, position):
+        start = self.starts[position]
+        data = self.blob[start : start + self.lengths[position]].tobytes()
+        return zlib.decompressobj(-15, zdict=self.zdict).decompress(data)
+
+    def get(self, incident_ids):
+        """Text columns for the given Incident IDs (missing IDs are skipped)."""
+        wanted = np.asarray(incident_ids)
+        positions = np.searchsorted(self.ids, wanted)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == wanted[found]
+        rows = [_decode(self._record(p), self.fields[p]) for p in positions[found]]
+        return pd.DataFrame(
+            rows,
+            columns=TEXT_COLUMNS,
+            index=pd.Index(wanted[found], name=ID_COLUMN),
+            dtype="object",
+        )
+
+    def join(self, frame):
+        """``frame`` with its text columns restored, in the original column order."""
+        text = self.get(frame[ID_COLUMN].to_numpy())
+        joined = frame.join(text, on=ID_COLUMN)
+        order = [c for c in self.meta["header"] if c in joined.columns]
+        return joined[order + [c for c in joined.columns if c not in order]]
+
+
+def _write(directory, header, chunks):
+    """Compress records chunk by chunk; the preset dictionary is trained on
+    the first chunk."""
+    os.makedirs(directory, exist_ok=True)
+    zdict, ids, lengths, fields = None, [], [], []
+    with open(os.path.join(directory, "texts.bin"), "wb") as f:
+        for chunk in chunks:
+            records, field_lengths = _encode(chunk)
+            fields.append(field_lengths)
+            if zdict is None:
+                zdict = _train_zdict(records)
+            for record in records:
+                compressor = _compressor(zdict)
+                data = compressor.compress(record) + compressor.flush()
+                lengths.append(len(data))
+                f.write(data)
+            ids.append(chunk[ID_COLUMN].to_numpy())
+    ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+    fields = (
+        np.concatenate(fields)
+        if fields
+        else np.zeros((0, len(TEXT_COLUMNS)), dtype=np.int64)
+    )
+    lengths = np.asarray(lengths, dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    # 按 Incident ID 排序，查找用二分
+    order = np.argsort(ids, kind="stable")
+    np.savez(
+        os.path.join(directory, "index.npz"),
+        ids=ids[order],
+        starts=starts[order],
+        lengths=lengths[order],
+        fields=fields[order],
+    )
+    with open(os.path.join(directory, "zdict.bin"), "wb") as f:
+        f.write(zdict or b"")
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"header": list(header), "columns": TEXT_COLUMNS}, f)
+
+
+def store_path(version, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{version}_v{STORE_FORMAT}")
+
+
+def remove_store(version, store_dir=STORE_DIR):
+    """Delete the stores of a retired data version (any format)."""
+    if not os.path.isdir(store_dir):
+        return
+    for name in os.listdir(store_dir):
+        if name == version or name.startswith(f"{version}_"):
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+
+
+def build_store(csv_path, version=None, store_dir=STORE_DIR, chunksize=CHUNK_SIZE):
+    """Write the text store for a CSV (once per data version) and open it.
+
+    Only the ID and text columns are read, chunk by chunk.
+    """
+    version = file_fingerprint(csv_path) if version is None else version
+    directory = store_path(version, store_dir)
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        header = pd.read_csv(csv_path, nrows=0).columns
+        chunks = pd.read_csv(
+            csv_path, usecols=[ID_COLUMN] + TEXT_COLUMNS, chunksize=chunksize
+        )
+        # 先写到临时目录再改名，其他进程不会读到写了一半的存储
+        partial = f"{directory}.{os.getpid()}.partial"
+        _write(partial, header, chunks)
+        try:
+            os.rename(partial, directory)
+        except OSError:  # 其他进程已写好同一版本
+            shutil.rmtree(partial)
+    return TextStore.open(directory)
+
+
+if __name__ == "__main__":
+    store = build_store(sys.argv[1] if len(sys.argv) > 1 else "security_incidents.csv")
+    print(f"{len(store)} records, {store.nbytes / 1024:.0f} KiB")
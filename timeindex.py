@@ -0,0 +1,149 @@
+# timeindex.py
+# 时间前缀和索引：在稠密的年-月轴上保存事件数与受害人数的累积和（总体、按国家、按攻击方式），
+# 任意日期区间的合计都是两次数组查找之差，两个时期的对比无需重新筛选与求和原始行。
+import numpy as np
+import pandas as pd
+
+TIME_MEASURES = [
+    "Incidents",
+    "Total killed",
+    "Total wounded",
+    "Total kidnapped",
+    "Total affected",
+]
+TIME_DIMENSIONS = ["Country", "Means of attack"]
+# 维度 -> 提供该维度的按月立方体（aggregates.SECTION_CUBES）
+TIME_CUBES = {
+    None: "monthly",
+    "Country": "monthly",
+    "Means of attack": "monthly_attacks",
+}
+
+
+def _prefix(values, axis):
+    """Cumulative sums with a leading zero, so sum(lo..hi) = p[hi + 1] - p[lo]."""
+    shape = list(values.shape)
+    shape[axis] = 1
+    return np.concatenate(
+        [np.zeros(shape, dtype=np.int64), np.cumsum(values, axis=axis)], axis=axis
+    )
+
+
+class TimeIndex:
+    """Prefix sums over a dense year-month axis for every value of one dimension
+    (or for all incidents when ``dimension`` is None).
+
+    Incidents without a month only count towards ranges that cover their
+    whole year; they are kept in a separate per-year prefix array.
+    """
+
+    def __init__(self, cube, dimension=None):
+        self.dimension = dimension
+        self.first_year = int(cube["Year"].min())
+        self.last_year = int(cube["Year"].max())
+        n_years = self.last_year - self.first_year + 1
+        if dimension is None:
+            codes, self.labels = np.zeros(len(cube), dtype=np.int64), pd.Index(["All"])
+        else:
+            codes, self.labels = pd.factorize(cube[dimension], sort=True)
+        year = cube["Year"].to_numpy().astype(np.int64) - self.first_year
+        month = cube["Month"].to_numpy()
+        # 数据实际覆盖的月份 [data_lo, data_hi)：有日期事件的首末月，月份未知的事件按整年计
+        known = ~np.isnan(month)
+        slots = year[known] * 12 + month[known].astype(np.int64) - 1
+        starts = np.concatenate([slots, year[~known] * 12])
+        ends = np.concatenate([slots + 1, year[~known] * 12 + 12])
+        self.data_lo, self.data_hi = int(starts.min()), int(ends.max())
+
+        keep = codes >= 0
+        k = len(self.labels)
+        year, month, codes = year[keep], month[keep], codes[keep]
+        values = cube[TIME_MEASURES].to_numpy(dtype=np.int64)[keep]
+
+        known = ~np.isnan(month)
+        monthly = np.zeros((k, n_years * 12, len(TIME_MEASURES)), dtype=np.int64)
+        slot = year[known] * 12 + month[known].astype(np.int64) - 1
+        np.add.at(monthly, (codes[known], slot), values[known])
+        undated = np.zeros((k, n_years, len(TIME_MEASURES)), dtype=np.int64)
+        np.add.at(undated, (codes[~known], year[~known]), values[~known])
+
+        self.monthly = _prefix(monthly, axis=1)
+        self.undated = _prefix(undated, axis=1)
+
+    def _bounds(self, start, end):
+        """Normalise (year, month) or year bounds to prefix-array positions."""
+        y1, m1 = start if isinstance(start, tuple) else (start, 1)
+        y2, m2 = end if isinstance(end, tuple) else (end, 12)
+        # 超出数据范围的端点截到首年年初或末年年底
+        if y1 < self.first_year:
+            y1, m1 = self.first_year, 1
+        if y2 > self.last_year:
+            y2, m2 = self.last_year, 12
+        if (y1, m1) > (y2, m2):
+            return 0, 0, 0, 0
+        lo = (y1 - self.first_year) * 12 + m1 - 1
+        hi = (y2 - self.first_year) * 12 + m2
+        # 月份未知的事件只计入完整覆盖其所在年份的区间
+        full_lo = y1 - self.first_year + (m1 != 1)
+        full_hi = y2 - self.first_year + (m2 == 12)
+        return lo, hi, full_lo, max(full_lo, full_hi)
+
+    def totals(self, start, end):
+        """(k, measures) totals for every label over an inclusive date range."""
+        lo, hi, full_lo, full_hi = self._bounds(start, end)
+        return (
+            self.monthly[:, hi]
+            - self.monthly[:, lo]
+            + self.undated[:, full_hi]
+            - self.undated[:, full_lo]
+        )
+
+    def covered_months(self, start, end):
+        """Months of an inclusive date range that overlap the data."""
+        lo, hi, _, _ = self._bounds(start, end)
+        return max(0, min(hi, self.data_hi) - max(lo, self.data_lo))
+
+    def frame(self, start, end):
+        """Totals over a range as a DataFrame indexed by label."""
+        return pd.DataFrame(
+            self.totals(start, end),
+            index=self.labels.rename(self.dimension or "All"),
+            columns=TIME_MEASURES,
+        )
+
+    def total(self, start, end, label="All"):
+        """Totals for one label as a Series."""
+        return pd.Series(
+            self.totals(start, end)[self.labels.get_loc(label)], index=TIME_MEASURES
+        )
+
+
+def compare_periods(index, first, second):
+    """Side-by-side totals and per-year rates for two (start, end) periods.
+
+    Rates divide by the part of each period that overlaps the data, so a
+    period reaching past the last recorded month is not diluted by months
+    without data; a period entirely outside the data has NaN rates.
+    """
+    a, b = index.frame(*first), index.frame(*second)
+    months_a, months_b = index.covered_months(*first), index.covered_months(*second)
+    rate_a = a / (months_a / 12) if months_a else a * np.nan
+    rate_b = b / (months_b / 12) if months_b else b * np.nan
+    return {
+        "first": a,
+        "second": b,
+        "first_months": months_a,
+        "second_months": months_b,
+        "first_rate": rate_a,
+        "second_rate": rate_b,
+        "change": (rate_b - rate_a) / rate_a.replace(0, np.nan),
+    }
+
+
+def build_time_indexes(cubes):
+    """Overall index plus one per dimension, keyed by dimension (None = overall),
+    each built from the monthly section cube that has that dimension."""
+    return {
+        dimension: TimeIndex(cubes[name], dimension)
+        for dimension, name in TIME_CUBES.items()
+    }
@@ -0,0 +1,96 @@
+# victims.py
+# 受害人张量：每个数据版本构建一次，
+# harm[i, staff, harm_type] 与 gender[i, gender]，任意维度的分解都是一次向量化归约
+import numpy as np
+import pandas as pd
+
+from data_quality import GENDER_COLUMNS, HARM_TYPES
+
+STAFF_TYPES = ["National", "International"]
+HARM_LABELS = ["Killed", "Wounded", "Kidnapped"]
+GENDER_LABELS = ["Male", "Female", "Unknown"]
+TENSOR_DIMENSIONS = ["Year", "Country", "Actor type"]
+
+
+class VictimTensor:
+    """Compact NumPy victim counts for a frame of incidents (or cube groups)."""
+
+    def __init__(self, harm, gender, codes, labels):
+        self.harm = harm  # (n, 2, 3)：n × {national, international} × {killed, wounded, kidnapped}
+        self.gender = gender  # (n, 3)：n × {male, female, unknown}
+        self.codes = codes  # 维度 -> 每行的整数编码（-1 表示缺失）
+        self.labels = labels  # 维度 -> 编码对应的取值
+
+    @classmethod
+    def from_frame(cls, frame, dimensions=TENSOR_DIMENSIONS):
+        columns = [f"{staff}s {h}" for staff in STAFF_TYPES for h in HARM_TYPES]
+        harm = (
+            frame[columns]
+            .fillna(0)
+            .to_numpy(dtype=np.int32)
+            .reshape(len(frame), len(STAFF_TYPES), len(HARM_TYPES))
+        )
+        gender = frame[GENDER_COLUMNS].fillna(0).to_numpy(dtype=np.int32)
+        codes, labels = {}, {}
+        for dim in dimensions:
+            codes[dim], labels[dim] = pd.factorize(frame[dim], sort=True)
+        return cls(harm, gender, codes, labels)
+
+    def __len__(self):
+        return len(self.harm)
+
+    def mask(self, **filters):
+        """Boolean row index, e.g. ``mask(Country="Sudan")``. Underscores in
+        keyword names stand for spaces (``Actor_type``)."""
+        selected = np.ones(len(self), dtype=bool)
+        for key, value in filters.items():
+            dim = key.replace("_", " ")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            wanted = self.labels[dim].get_indexer(list(values))
+            selected &= np.isin(self.codes[dim], wanted[wanted >= 0])
+        return selected
+
+    def totals(self, mask=None):
+        """(2, 3) staff × harm totals over the selected rows."""
+        harm = self.harm if mask is None else self.harm[mask]
+        return harm.sum(axis=0)
+
+    def gender_totals(self, mask=None):
+        gender = self.gender if mask is None else self.gender[mask]
+        return gender.sum(axis=0)
+
+    def _grouped(self, values, dimension, mask):
+        codes = self.codes[dimension]
+        keep = codes >= 0 if mask is None else (codes >= 0) & mask
+        k = len(self.labels[dimension])
+        flat = values[keep].reshape(int(keep.sum()), -1)
+        group = codes[keep]
+        # 每个单元格一次 bincount，即按维度取值分组求和
+        out = np.stack(
+            [np.bincount(group, weights=col, minlength=k) for col in flat.T], axis=1
+        )
+        return out.astype(np.int64).reshape((k,) + values.shape[1:])
+
+    def breakdown(self, dimension, mask=None):
+        """(k, 2, 3) staff × harm totals for each value of a dimension."""
+        return self._grouped(self.harm, dimension, mask)
+
+    def gender_breakdown(self, dimension, mask=None):
+        """(k, 3) gender totals for each value of a dimension."""
+        return self._grouped(self.gender, dimension, mask)
+
+    def breakdown_frame(self, dimension, mask=None):
+        """Long-form breakdown for plotting: dimension, Staff Type, Harm Type, Count."""
+        grouped = self.breakdown(dimension, mask)
+        index = pd.MultiIndex.from_product(
+            [self.labels[dimension], STAFF_TYPES, HARM_LABELS],
+            names=[dimension, "Staff Type", "Harm Type"],
+        )
+        return pd.Series(grouped.ravel(), index=index, name="Count").reset_index()
+
+    def gender_frame(self, dimension, mask=None):
+        grouped = self.gender_breakdown(dimension, mask)
+        index = pd.MultiIndex.from_product(
+            [self.labels[dimension], GENDER_LABELS], names=[dimension, "Gender"]
+        )
+        return pd.Series(grouped.ravel(), index=index, name="Count").reset_index()
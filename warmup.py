@@ -0,0 +1,67 @@
+# warmup.py
+# 后台预热：数据加载后在线程池中预先计算所有章节的聚合与图表，
+# 用户当前所在章节优先计算，首次点击任一章节即可命中缓存。
+import threading
+import time
+from collections import deque
+
+
+class WarmupScheduler:
+    """Runs one task per key in background threads, most-wanted key first."""
+
+    def __init__(self, tasks, workers=2):
+        self._tasks = dict(tasks)
+        self._pending = deque(self._tasks)
+        self._results = {}
+        self._errors = {}
+        self._done = {key: threading.Event() for key in self._tasks}
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.durations = {}
+        for i in range(workers):
+            threading.Thread(
+                target=self._work, name=f"warmup-{i}", daemon=True
+            ).start()
+
+    def _take(self, key=None):
+        with self._lock:
+            if key is None:
+                return self._pending.popleft() if self._pending else None
+            if key in self._pending:
+                self._pending.remove(key)
+                return key
+            return None
+
+    def _run(self, key):
+        start = time.perf_counter()
+        try:
+            self._results[key] = self._tasks[key]()
+        except Exception as e:  # 在 result() 中重新抛出
+            self._errors[key] = e
+        self.durations[key] = time.perf_counter() - start
+        self._done[key].set()
+
+    def _work(self):
+        while (key := self._take()) is not None:
+            self._run(key)
+
+    def prioritize(self, key):
+        """Move a key to the front of the queue."""
+        with self._lock:
+            if key in self._pending:
+                self._pending.remove(key)
+                self._pending.appendleft(key)
+
+    def result(self, key):
+        """Return a key's result; if it has not started yet, compute it now in
+        the calling thread rather than waiting behind the queue."""
+        if self._take(key) is not None:
+            self._run(key)
+        self._done[key].wait()
+        if key in self._errors:
+            raise self._errors[key]
+        return self._results[key]
+
+    def progress(self):
+        """(finished, total)"""
+        return sum(e.is_set() for e in self._done.values()), len(self._tasks)